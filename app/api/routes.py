@@ -2,18 +2,37 @@
 import logging
 import asyncio
 from fastapi import APIRouter, HTTPException, Query, Depends
-from app.models.schemas import ChannelRequest, JobStatus, RelevantChunksResponse, RelevantChunk, RecentChunksResponse, RecentChunk
-from app.services.youtube_scraper import start_channel_processing
+from app.models.schemas import (
+    ChannelRequest, JobStatus, RelevantChunksResponse, RelevantChunk, RecentChunksResponse, RecentChunk,
+    BatchRelevantChunksRequest, BatchRelevantChunksResponse, QueryRelevantChunks,
+    BulkChannelMetadataRequest, BulkChannelMetadataResponse, BulkChannelRequest, BulkChannelResponse,
+    DeadLetter, DeadLettersResponse
+)
+from app.services.youtube_scraper import start_channel_processing, retry_channel_video
 from app.core.celery_config import celery_app
-from app.services.pinecone_service import retrieve_relevant_transcripts, retrieve_recent_chunks
-from app.services.channel_service import get_channel_info as get_channel_info_service, get_channel_metadata, store_channel_metadata
+from app.services.pinecone_service import retrieve_relevant_transcripts, retrieve_relevant_transcripts_batch, retrieve_recent_chunks
+from app.services.channel_service import get_channel_info as get_channel_info_service, get_channel_metadata, get_channels_metadata, store_channel_metadata
+from app.services.query_cache import relevant_chunks_cache_key, get_cached_result, cache_result
+from app.services.semantic_cache import semantic_cache
+from app.services.job_service import (
+    claim_channel_job, finish_job, get_job, get_recent_channel_run, job_progress, default_priority, highest_priority,
+    queue_for_priority
+)
+from app.services.dead_letter_service import list_dead_letters, get_dead_letter, remove_dead_letter
+from app.services.quota_service import get_quota_status, QuotaExceededError, PRIORITY_HIGH
 from app.api.deps import get_api_key
-from typing import Optional
+from app.core.config import settings
+from typing import Dict, List, Optional
+import uuid
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+def quota_exceeded_http_error(error: QuotaExceededError) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(error), headers={"Retry-After": str(error.retry_after)})
+
+
 @router.get("/channel_info")
 async def channel_info(
     channel_id: Optional[str] = Query(None, description="Channel ID to search for, e.g., 'UC6vLzWN-3aFG8dgTgEOlx5g'"),
@@ -23,11 +42,15 @@ async def channel_info(
 ):
     if not channel_id and not channel_name and not channel_url:
         raise HTTPException(status_code=400, detail="Please provide a channel ID, channel name, or channel URL")
-    info = get_channel_info_service(
-        channel_id=channel_id,
-        channel_name=channel_name,
-        channel_url=channel_url
-    )
+    try:
+        info = get_channel_info_service(
+            channel_id=channel_id,
+            channel_name=channel_name,
+            channel_url=channel_url,
+            priority=PRIORITY_HIGH
+        )
+    except QuotaExceededError as e:
+        raise quota_exceeded_http_error(e)
     if not info:
         logger.info(f"channel_id: {channel_id}")
         logger.info(f"channel_name: {channel_name}")
@@ -46,8 +69,8 @@ async def refresh_channel_metadata(
     if not channel_id and not channel_name and not channel_url:
         raise HTTPException(status_code=400, detail="Please provide a channel ID, channel name, or channel URL")
     try:
-        logger.info(f"Refreshing metadata for channel: {channel_id}")
-        metadata = get_channel_metadata(channel_id)
+        logger.info(f"Refreshing metadata for channel: {channel_id or channel_name or channel_url}")
+        metadata = get_channel_metadata(channel_id, channel_name, channel_url, force_refresh=True, priority=PRIORITY_HIGH)
         if metadata is None:
             logger.error(f"Failed to fetch metadata for channel: {channel_id}")
             raise HTTPException(status_code=404, detail="Channel not found or unable to fetch metadata")
@@ -60,34 +83,145 @@ async def refresh_channel_metadata(
         return {"message": "Channel metadata refreshed successfully", "metadata": metadata}
     except HTTPException:
         raise
+    except QuotaExceededError as e:
+        raise quota_exceeded_http_error(e)
     except Exception as e:
         logger.error(f"Unexpected error in refresh_channel_metadata: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-# TODO: add a check to see if the channel has been processed in the last 24 hours
-# TODO: store the channel username in the index, not just the channel ID for faster lookups
-@router.post("/process_channel", response_model=JobStatus)
-async def process_channel(channel_request: ChannelRequest, api_key: str = Depends(get_api_key)):
+@router.post("/channels_metadata", response_model=BulkChannelMetadataResponse)
+async def channels_metadata(bulk_request: BulkChannelMetadataRequest, api_key: str = Depends(get_api_key)):
+    if not bulk_request.channel_ids:
+        raise HTTPException(status_code=400, detail="Please provide at least one channel ID")
+    if len(bulk_request.channel_ids) > settings.MAX_BULK_METADATA_CHANNELS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.MAX_BULK_METADATA_CHANNELS} channel IDs may be requested at once")
+    try:
+        metadata = get_channels_metadata(bulk_request.channel_ids)
+        missing = [channel_id for channel_id in dict.fromkeys(bulk_request.channel_ids) if channel_id not in metadata]
+        return BulkChannelMetadataResponse(metadata=metadata, missing=missing)
+    except QuotaExceededError as e:
+        raise quota_exceeded_http_error(e)
+    except Exception as e:
+        logger.error(f"Unexpected error in channels_metadata: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+def deduplicated_job_status(job: dict, channel_id: str) -> JobStatus:
+    logger.info(f"Channel {channel_id} already has active job {job['job_id']}")
+    return JobStatus(
+        job_id=job['job_id'],
+        status=job['status'],
+        progress=job_progress(job),
+        channel_id=channel_id,
+        deduplicated=True
+    )
+
+
+def submit_channel_job(channel_request: ChannelRequest) -> JobStatus:
+    channel_id = str(channel_request.channel_id)
+    if not channel_request.force:
+        recent_run = get_recent_channel_run(channel_id, channel_request.video_limit)
+        if recent_run and recent_run['job_id']:
+            logger.info(f"Channel {channel_id} was processed within the freshness window, skipping")
+            return JobStatus(
+                job_id=recent_run['job_id'],
+                status="SUCCESS",
+                progress=100,
+                channel_id=channel_id,
+                deduplicated=True
+            )
+
+    priority = channel_request.priority or default_priority(channel_request.video_limit)
+    job_id = str(uuid.uuid4())
+    # Claiming is atomic, so of two concurrent submissions only one starts a task
+    active_job = claim_channel_job(job_id, channel_id, channel_request.video_limit, priority, force=channel_request.force)
+    if active_job:
+        return deduplicated_job_status(active_job, channel_id)
     try:
-        logger.info(f"Received request to process channel_id: {channel_request.channel_id} for {channel_request.video_limit} videos")
         job = start_channel_processing.apply_async(
             kwargs={
-                'channel_id': str(channel_request.channel_id),
-                'video_limit': channel_request.video_limit
+                'channel_id': channel_id,
+                'video_limit': channel_request.video_limit,
+                'job_id': job_id
             },
-            queue='celery'
+            queue=queue_for_priority(priority),
+            task_id=job_id
         )
-        logger.info(f"Started channel processing job with ID: {job.id}")
-        return JobStatus(job_id=job.id, status="STARTED")
+    except Exception as e:
+        finish_job(job_id, channel_id, status='FAILED', error=str(e))
+        raise
+    logger.info(f"Started channel processing job with ID: {job.id} on {queue_for_priority(priority)}")
+    return JobStatus(job_id=job.id, status="STARTED", channel_id=channel_id)
+
+
+# TODO: store the channel username in the index, not just the channel ID for faster lookups
+@router.post("/process_channel", response_model=JobStatus)
+async def process_channel(channel_request: ChannelRequest, api_key: str = Depends(get_api_key)):
+    try:
+        logger.info(f"Received request to process channel_id: {channel_request.channel_id} for {channel_request.video_limit} videos")
+        return submit_channel_job(channel_request)
     except Exception as e:
         logger.error(f"Error processing channel: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+def merge_channel_requests(channel_requests: List[ChannelRequest]) -> Dict[str, ChannelRequest]:
+    """Folds repeats of a channel into one request with the largest video_limit and the highest priority."""
+    merged = {}
+    for channel_request in channel_requests:
+        priority = channel_request.priority or default_priority(channel_request.video_limit)
+        existing = merged.get(channel_request.channel_id)
+        if existing is None:
+            merged[channel_request.channel_id] = channel_request.model_copy(update={'priority': priority})
+            continue
+        merged[channel_request.channel_id] = existing.model_copy(update={
+            'video_limit': max(existing.video_limit or 0, channel_request.video_limit or 0),
+            'priority': highest_priority(existing.priority, priority),
+            'force': existing.force or channel_request.force
+        })
+    return merged
+
+
+@router.post("/process_channels", response_model=BulkChannelResponse)
+async def process_channels(request: BulkChannelRequest, api_key: str = Depends(get_api_key)):
+    if not request.channels:
+        raise HTTPException(status_code=400, detail="Please provide at least one channel")
+    if len(request.channels) > settings.MAX_BULK_CHANNEL_SUBMISSIONS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.MAX_BULK_CHANNEL_SUBMISSIONS} channels per request")
+    try:
+        logger.info(f"Received request to process {len(request.channels)} channels")
+        submitted = {
+            channel_id: submit_channel_job(channel_request)
+            for channel_id, channel_request in merge_channel_requests(request.channels).items()
+        }
+        # One entry per submitted channel; repeats point at the job started for the channel's first entry
+        jobs = []
+        seen = set()
+        for channel_request in request.channels:
+            job = submitted[channel_request.channel_id]
+            jobs.append(job.model_copy(update={'deduplicated': True}) if channel_request.channel_id in seen else job)
+            seen.add(channel_request.channel_id)
+        return BulkChannelResponse(jobs=jobs)
+    except Exception as e:
+        logger.error(f"Error processing channels: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
 @router.get("/job_status/{job_id}", response_model=JobStatus)
 async def get_job_status(job_id: str, api_key: str = Depends(get_api_key)):
     try:
+        # Sliced channel jobs span several tasks, so their registry record is authoritative
+        registered_job = get_job(job_id)
+        if registered_job:
+            return JobStatus(
+                job_id=job_id,
+                status=registered_job['status'],
+                progress=job_progress(registered_job),
+                channel_id=registered_job['channel_id'],
+                error=registered_job.get('error')
+            )
+
         job = celery_app.AsyncResult(job_id)
         logger.info(f"Job status for {job_id}: {job.state}")
 
@@ -128,7 +262,11 @@ async def get_relevant_chunks(
     api_key: str = Depends(get_api_key)
 ):
     try:
-        relevant_chunks = retrieve_relevant_transcripts(query, [channel_id], chunk_limit, context_window)
+        cache_key = relevant_chunks_cache_key(query, [channel_id], chunk_limit, context_window)
+        relevant_chunks = get_cached_result(cache_key)
+        if relevant_chunks is None:
+            relevant_chunks = retrieve_relevant_transcripts(query, [channel_id], chunk_limit, context_window)
+            cache_result(cache_key, relevant_chunks)
         return RelevantChunksResponse(chunks=[
             RelevantChunk(
                 main_chunk=chunk['main_chunk'],
@@ -142,6 +280,49 @@ async def get_relevant_chunks(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/relevant_chunks/batch", response_model=BatchRelevantChunksResponse)
+async def get_relevant_chunks_batch(batch_request: BatchRelevantChunksRequest, api_key: str = Depends(get_api_key)):
+    if not batch_request.queries:
+        raise HTTPException(status_code=400, detail="Please provide at least one query")
+    if len(batch_request.queries) > settings.MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {settings.MAX_BATCH_QUERIES} queries")
+    if not batch_request.channel_ids:
+        raise HTTPException(status_code=400, detail="Please provide at least one channel ID")
+    try:
+        cache_keys = [
+            relevant_chunks_cache_key(query, batch_request.channel_ids, batch_request.chunk_limit, batch_request.context_window)
+            for query in batch_request.queries
+        ]
+        results = [get_cached_result(cache_key) for cache_key in cache_keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            fresh_results = retrieve_relevant_transcripts_batch(
+                [batch_request.queries[i] for i in missing],
+                batch_request.channel_ids,
+                batch_request.chunk_limit,
+                batch_request.context_window
+            )
+            for i, result in zip(missing, fresh_results):
+                results[i] = result
+                cache_result(cache_keys[i], result)
+        return BatchRelevantChunksResponse(results=[
+            QueryRelevantChunks(
+                query=query,
+                chunks=[
+                    RelevantChunk(
+                        main_chunk=chunk['main_chunk'],
+                        context_before=chunk['context_before'],
+                        context_after=chunk['context_after'],
+                        score=chunk['score']
+                    ) for chunk in chunks
+                ]
+            ) for query, chunks in zip(batch_request.queries, results)
+        ])
+    except Exception as e:
+        logger.error(f"Error retrieving relevant chunks in batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/recent_chunks", response_model=RecentChunksResponse)
 async def get_recent_chunks(
     channel_id: str = Query(..., description="Channel ID to search in"),
@@ -161,3 +342,55 @@ async def get_recent_chunks(
     except Exception as e:
         logger.error(f"Error retrieving recent chunks: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache_stats")
+async def get_cache_stats(api_key: str = Depends(get_api_key)):
+    return {"semantic_cache": semantic_cache.stats()}
+
+
+@router.get("/youtube_quota")
+async def youtube_quota(api_key: str = Depends(get_api_key)):
+    try:
+        return get_quota_status()
+    except Exception as e:
+        logger.error(f"Error getting YouTube quota status: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/dead_letters", response_model=DeadLettersResponse)
+async def dead_letters(
+    limit: int = Query(50, description="Number of dead letters to return, most recent first"),
+    offset: int = Query(0, description="Number of dead letters to skip"),
+    api_key: str = Depends(get_api_key)
+):
+    try:
+        entries, total = list_dead_letters(limit=limit, offset=offset)
+        return DeadLettersResponse(dead_letters=[DeadLetter(**entry) for entry in entries], total=total)
+    except Exception as e:
+        logger.error(f"Error listing dead letters: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/dead_letters/{video_id}/replay", response_model=JobStatus)
+async def replay_dead_letter(video_id: str, api_key: str = Depends(get_api_key)):
+    try:
+        entry = get_dead_letter(video_id)
+    except Exception as e:
+        logger.error(f"Error reading dead letter {video_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if not entry:
+        raise HTTPException(status_code=404, detail=f"No dead letter for video {video_id}")
+    try:
+        task = retry_channel_video.apply_async(kwargs={
+            'channel_id': entry['channel_id'],
+            'video_id': video_id,
+            'job_id': entry.get('job_id'),
+            'attempt': 1
+        })
+        remove_dead_letter(video_id)
+        logger.info(f"Replaying dead-lettered video {video_id} as task {task.id}")
+        return JobStatus(job_id=task.id, status="STARTED", channel_id=entry['channel_id'])
+    except Exception as e:
+        logger.error(f"Error replaying dead letter {video_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
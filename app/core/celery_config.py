@@ -1,6 +1,9 @@
 # app/core/celery_config.py
 from celery import Celery
+from celery.concurrency.prefork import TaskPool as PreforkPool
+from celery.signals import worker_process_init, worker_ready
 from app.core.config import settings
+from app.core.clients import reset_clients, warm_up_clients
 import logging
 import ssl
 
@@ -25,7 +28,7 @@ def create_celery_app():
         backend=result_backend,
         broker_use_ssl=broker_use_ssl,
         redis_backend_use_ssl=redis_backend_use_ssl,
-        include=["app.services.youtube_scraper", "app.services.transcript_processor", "app.main"]
+        include=["app.services.youtube_scraper", "app.services.transcript_processor", "app.services.channel_service", "app.main"]
     )
 
     celery_app.conf.broker_connection_retry_on_startup = True
@@ -33,16 +36,37 @@ def create_celery_app():
     celery_app.conf.task_routes = {
         "app.services.youtube_scraper.start_channel_processing": {"queue": "celery"},
         "app.services.youtube_scraper.process_video": {"queue": "video-queue"},
+        "app.services.youtube_scraper.retry_channel_video": {"queue": "video-queue"},
+        "app.services.youtube_scraper.check_job_completion": {"queue": "celery"},
+        "app.services.transcript_processor.chunk_transcript": {"queue": "chunk-queue"},
         "app.services.transcript_processor.process_transcript": {"queue": "transcript-queue"},
+        "app.services.transcript_processor.embed_chunk_range": {"queue": "transcript-queue"},
+        "app.services.channel_service.refresh_channel_metadata_task": {"queue": "celery"},
+        "app.services.channel_service.refresh_channels_metadata_task": {"queue": "celery"},
     }
 
     celery_app.conf.update(
         task_track_started=True,
-        task_serializer='json',
-        result_serializer='json',
-        accept_content=['json'],
-        result_expires=3600,
-        broker_transport_options={'visibility_timeout': 3600},
+        # CELERY_SERIALIZER=msgpack with CELERY_COMPRESSION=zlib keeps broker messages and stored results small;
+        # JSON stays accepted so messages queued before a switch still decode
+        task_serializer=settings.CELERY_SERIALIZER,
+        result_serializer=settings.CELERY_SERIALIZER,
+        accept_content=['json', 'msgpack'],
+        result_accept_content=['json', 'msgpack'],
+        task_compression=settings.CELERY_COMPRESSION,
+        result_compression=settings.CELERY_COMPRESSION,
+        # Channel jobs report progress from the job registry, so results only need to outlive a status poll
+        result_expires=settings.CELERY_RESULT_EXPIRES,
+        # Late-acked tasks should not sit prefetched on a worker that may be restarted
+        worker_prefetch_multiplier=1,
+        # Workers drain queues in their -Q order: channel-high, celery (normal), chunk-queue, then channel-backfill, so
+        # chunking for videos already fetched never waits behind bulk backfill
+        broker_transport_options={'visibility_timeout': settings.BROKER_VISIBILITY_TIMEOUT, 'queue_order_strategy': 'priority'},
+        # The result backend gets the same bounds as app.core.redis_pool
+        redis_max_connections=settings.REDIS_MAX_CONNECTIONS,
+        redis_socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        redis_socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        redis_backend_health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
         broker_connection_retry=True,
         broker_pool_limit=None,
         broker_transport='redis',
@@ -56,3 +80,17 @@ def create_celery_app():
 
 
 celery_app = create_celery_app()
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    # Each prefork child builds its own Pinecone, OpenAI and Redis clients instead of inheriting the parent's sockets
+    reset_clients()
+    warm_up_clients()
+
+
+@worker_ready.connect
+def warm_up_worker(sender=None, **kwargs):
+    # Thread (and solo) pools run tasks in the main process; prefork children warm up in init_worker_process
+    if not isinstance(getattr(sender, 'pool', None), PreforkPool):
+        warm_up_clients()
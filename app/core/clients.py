@@ -0,0 +1,78 @@
+# app/core/clients.py
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+_factories: Dict[str, Callable[[], Any]] = {}
+_pings: Dict[str, Callable[[Any], Any]] = {}
+_clients: Dict[str, Any] = {}
+_lock = threading.Lock()
+_pid = os.getpid()
+
+
+def register_client(name: str, factory: Callable[[], Any], ping: Optional[Callable[[Any], Any]] = None):
+    """Registers how to build a client; nothing is created until the client is first used."""
+    _factories[name] = factory
+    if ping is not None:
+        _pings[name] = ping
+
+
+def get_client(name: str) -> Any:
+    # A forked child must never reuse its parent's sockets, so clients are per process
+    if _pid != os.getpid():
+        reset_clients()
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _factories[name]()
+                _clients[name] = client
+                logger.debug(f"Created {name} client in process {os.getpid()}")
+    return client
+
+
+def reset_clients():
+    global _pid
+    with _lock:
+        _clients.clear()
+        _pid = os.getpid()
+
+
+def warm_up_clients(names: Optional[Iterable[str]] = None):
+    """Creates clients and pings them, so the first request or task doesn't pay for connection setup."""
+    for name in names or list(_factories):
+        try:
+            client = get_client(name)
+            if name in _pings:
+                _pings[name](client)
+            logger.info(f"Warmed up {name} client")
+        except Exception as e:
+            # A service being down at startup shouldn't stop the process; the first real call will retry
+            logger.warning(f"Could not warm up {name} client: {str(e)}")
+
+
+class LazyClient:
+    """
+    Module-level stand-in for a registered client that resolves it on first attribute access. Modules keep exposing
+    `index`, `client` and so on (and tests keep patching them) without building anything at import time. Patching a
+    method on the stand-in, e.g. `index.upsert`, still builds the real client, so patch the stand-in itself instead.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr: str):
+        # Dunder and private lookups come from introspection (mock, copy, pickle), not from callers of the client
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(get_client(self._name), attr)
+
+    def __dir__(self):
+        return dir(get_client(self._name))
+
+    def __repr__(self):
+        return f"<LazyClient {self._name}>"
@@ -11,16 +11,90 @@ class Settings(BaseSettings):
     REDIS_DB: int = 0
     REDIS_PASSWORD: Optional[str] = None
     REDIS_URL: Optional[str] = None
+    REDIS_MAX_CONNECTIONS: int = 20
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
     PINECONE_API_KEY: str
     PINECONE_ENVIRONMENT: str
     PINECONE_INDEX_NAME: str
     MAX_VIDEOS_PER_CHANNEL: int = 1000
     CHUNK_SIZE: int = 200
     OPENAI_API_KEY: Optional[str] = None
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    EMBEDDING_DIMENSIONS: int = 1536
     PINECONE_HOST: Optional[str] = None
     PINECONE_PROJECT_ID: Optional[str] = None
+    PINECONE_METRIC: str = "cosine"
+    PINECONE_CLOUD: str = "aws"
+    PINECONE_REGION: str = "us-east-1"
     YOUTUBE_API_KEY: str
     YES_API_KEY: str
+    MAX_BATCH_QUERIES: int = 32
+    SEARCH_MAX_CONCURRENCY: int = 8
+    PINECONE_UPSERT_CONCURRENCY: int = 4
+    CONTEXT_FETCH_BATCH_SIZE: int = 200
+    RECENT_CHUNKS_PER_CHANNEL: int = 10000
+    QUERY_CACHE_ENABLED: bool = True
+    QUERY_EMBEDDING_LRU_SIZE: int = 2048
+    QUERY_EMBEDDING_CACHE_TTL: int = 30 * 24 * 3600
+    QUERY_RESULT_CACHE_TTL: int = 24 * 3600
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95
+    SEMANTIC_CACHE_SIZE: int = 256
+    SEMANTIC_CACHE_MAX_SCOPES: int = 512
+    YOUTUBE_API_LOCK_TIMEOUT: float = 10.0
+    YOUTUBE_API_NEGATIVE_CACHE_TTL: int = 60
+    YOUTUBE_API_CONNECT_TIMEOUT: float = 3.05
+    YOUTUBE_API_READ_TIMEOUT: float = 10.0
+    YOUTUBE_API_ETAG_TTL: int = 7 * 24 * 3600
+    YOUTUBE_HTTP_POOL_SIZE: int = 10
+    CHANNEL_METADATA_SOFT_TTL: int = 24 * 3600
+    CHANNEL_METADATA_HARD_TTL: int = 7 * 24 * 3600
+    CHANNEL_METADATA_L1_SIZE: int = 1024
+    CHANNEL_METADATA_L1_TTL: int = 60
+    CHANNEL_METADATA_REFRESH_LOCK_TTL: int = 300
+    YOUTUBE_API_MAX_CONCURRENCY: int = 4
+    MAX_BULK_METADATA_CHANNELS: int = 5000
+    YOUTUBE_DAILY_QUOTA: int = 10000
+    YOUTUBE_QUOTA_HIGH_RESERVE: float = 0.1
+    YOUTUBE_QUOTA_NORMAL_RESERVE: float = 0.2
+    CHANNEL_PROCESSING_SLICE_SIZE: int = 10
+    BACKFILL_VIDEO_THRESHOLD: int = 100
+    JOB_RECORD_TTL: int = 7 * 24 * 3600
+    # An active job not updated for this long is taken over by the next submission: several broker visibility
+    # timeouts, and longer than chunked videos (CHUNKED_VIDEO_TTL) can keep a finished slice waiting
+    JOB_STALE_AFTER: int = 8 * 3600
+    MAX_BULK_CHANNEL_SUBMISSIONS: int = 500
+    CHANNEL_FRESHNESS_WINDOW: int = 24 * 3600
+    CHANNEL_LOCK_TTL: int = 600
+    CHANNEL_LOCK_RETRY_DELAY: int = 30
+    VIDEO_LOCK_TTL: int = 900
+    VIDEO_MAX_ATTEMPTS: int = 5
+    VIDEO_RETRY_BASE_DELAY: float = 30.0
+    VIDEO_RETRY_MAX_DELAY: float = 1800.0
+    TRANSCRIPT_FAILURE_PERMANENT_TTL: int = 7 * 24 * 3600
+    TRANSCRIPT_FAILURE_TRANSIENT_TTL: int = 3600
+    TRANSCRIPT_FETCH_CONCURRENCY: int = 8
+    TRANSCRIPT_FETCH_PER_HOST: int = 4
+    TRANSCRIPT_FETCH_ATTEMPTS: int = 3
+    VIDEO_LISTING_REFRESH_INTERVAL: int = 3600
+    VIDEO_LISTING_TTL: int = 30 * 24 * 3600
+    VIDEO_LISTING_PAGE_SIZE: int = 500
+    VIDEO_LISTING_LOCK_TTL: int = 300
+    PAYLOAD_TTL: int = 24 * 3600
+    PARALLEL_EMBEDDING_CHUNK_THRESHOLD: int = 100
+    CHUNK_RANGE_SIZE: int = 50
+    # Upper bound on a chunked video's ranges: VIDEO_MAX_ATTEMPTS tries per range at up to VIDEO_RETRY_MAX_DELAY apart
+    CHUNKED_VIDEO_TTL: int = 6 * 3600
+    # How often a job waiting on chunked videos re-checks them, in case their last range never reports back
+    JOB_COMPLETION_CHECK_INTERVAL: int = 900
+    CELERY_SERIALIZER: str = "json"
+    CELERY_COMPRESSION: Optional[str] = None
+    CELERY_RESULT_EXPIRES: int = 900
+    # Redis redelivers unacked and ETA messages held longer than this, so task countdowns must stay below it
+    BROKER_VISIBILITY_TIMEOUT: int = 3600
+    QUOTA_RETRY_MAX_COUNTDOWN: int = 3000
 
     @property
     def get_redis_url(self) -> str:
@@ -0,0 +1,24 @@
+# app/core/http_client.py
+import requests
+from requests.adapters import HTTPAdapter
+from app.core.config import settings
+from app.core.clients import register_client, LazyClient
+
+
+def create_youtube_session() -> requests.Session:
+    """
+    Keep-alive session for the YouTube Data API, so repeated calls reuse TLS connections. Requests are gzip-compressed;
+    Google only compresses responses for user agents that mention gzip.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.YOUTUBE_HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.headers.update({
+        'Accept-Encoding': 'gzip',
+        'User-Agent': f"{settings.PROJECT_NAME} (gzip)",
+    })
+    return session
+
+
+register_client("youtube_http", create_youtube_session)
+youtube_session = LazyClient("youtube_http")
@@ -0,0 +1,31 @@
+# app/core/redis_pool.py
+import ssl
+import redis
+from app.core.config import settings
+from app.core.clients import register_client, LazyClient
+
+
+def create_redis_client() -> redis.Redis:
+    """
+    The one connection pool per process that every cache, registry, lock and progress key goes through. The pool is
+    bounded and blocks for REDIS_POOL_TIMEOUT when exhausted instead of opening more connections than the hosted
+    Redis allows, and idle connections are health-checked before reuse.
+    """
+    options = {
+        'max_connections': settings.REDIS_MAX_CONNECTIONS,
+        'timeout': settings.REDIS_POOL_TIMEOUT,
+        'socket_timeout': settings.REDIS_SOCKET_TIMEOUT,
+        'socket_connect_timeout': settings.REDIS_SOCKET_TIMEOUT,
+        'socket_keepalive': True,
+        'retry_on_timeout': True,
+        'health_check_interval': settings.REDIS_HEALTH_CHECK_INTERVAL,
+    }
+    if settings.get_redis_url.startswith("rediss://"):
+        # Same TLS setup as the Celery broker and backend
+        options['ssl_cert_reqs'] = ssl.CERT_NONE
+    pool = redis.BlockingConnectionPool.from_url(settings.get_redis_url, **options)
+    return redis.Redis(connection_pool=pool)
+
+
+register_client("redis", create_redis_client, ping=lambda client: client.ping())
+redis_client = LazyClient("redis")
@@ -1,9 +1,12 @@
+import asyncio
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes import router
 from app.core.config import settings
 from app.core.celery_config import celery_app
+from app.core.clients import warm_up_clients
+from app.services.pinecone_service import ensure_index
 from celery import shared_task
 from contextlib import asynccontextmanager
 
@@ -19,6 +22,9 @@ async def lifespan(app: FastAPI):
     logger.info(f"Celery broker URL: {celery_app.conf.broker_url}")
     logger.info(f"Celery result backend: {celery_app.conf.result_backend}")
     logger.info(f"Redis URL: {settings.get_redis_url}")
+    # Connect to Pinecone, OpenAI and Redis before the first request rather than during it
+    await asyncio.to_thread(ensure_index)
+    await asyncio.to_thread(warm_up_clients)
 
     yield  # Control is returned to FastAPI for handling requests
 
@@ -1,10 +1,12 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 
 
 class ChannelRequest(BaseModel):
     channel_id: str
     video_limit: Optional[int] = 5
+    priority: Optional[Literal['high', 'normal', 'backfill']] = None
+    force: bool = False
 
 
 class JobStatus(BaseModel):
@@ -13,6 +15,15 @@ class JobStatus(BaseModel):
     progress: float = 0
     error: Optional[str] = None
     channel_id: Optional[str] = None
+    deduplicated: bool = False
+
+
+class BulkChannelRequest(BaseModel):
+    channels: List[ChannelRequest]
+
+
+class BulkChannelResponse(BaseModel):
+    jobs: List[JobStatus]
 
 
 class ChunkMetadata(BaseModel):
@@ -42,3 +53,43 @@ class RecentChunk(BaseModel):
 
 class RecentChunksResponse(BaseModel):
     chunks: List[RecentChunk]
+
+
+class BatchRelevantChunksRequest(BaseModel):
+    queries: List[str]
+    channel_ids: List[str]
+    chunk_limit: int = 5
+    context_window: int = 1
+
+
+class QueryRelevantChunks(BaseModel):
+    query: str
+    chunks: List[RelevantChunk]
+
+
+class BatchRelevantChunksResponse(BaseModel):
+    results: List[QueryRelevantChunks]
+
+
+class BulkChannelMetadataRequest(BaseModel):
+    channel_ids: List[str]
+
+
+class BulkChannelMetadataResponse(BaseModel):
+    metadata: Dict[str, Dict]
+    missing: List[str]
+
+
+class DeadLetter(BaseModel):
+    video_id: str
+    channel_id: str
+    job_id: Optional[str] = None
+    error: str
+    error_class: str
+    attempts: int
+    failed_at: float
+
+
+class DeadLettersResponse(BaseModel):
+    dead_letters: List[DeadLetter]
+    total: int
@@ -1,16 +1,34 @@
 # app/services/channel_service.py
 import logging
-from urllib.request import urlopen
+from urllib.parse import quote
 import json
 import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import timedelta
 from app.core.config import settings
 from app.core.celery_config import celery_app
+from app.core.redis_pool import redis_client
+from app.core.http_client import youtube_session
 from app.services.pinecone_service import index, generate_embedding
-from typing import Optional
+from app.services.quota_service import (
+    admit, endpoint_for_url, quota_window, record_quota_exhausted, QuotaExceededError, PRIORITY_LOW, PRIORITY_NORMAL
+)
+from app.services.transcript_failure_cache import get_transcript_failure_counts
+from app.utils.lru_cache import LRUCache
+from app.utils.redis_lock import RedisLease
+from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+SINGLE_FLIGHT_POLL_INTERVAL = 0.1
+METADATA_PARTS = ['snippet', 'statistics', 'topicDetails', 'status', 'brandingSettings', 'localizations']
+# The channels endpoint accepts at most 50 comma-separated IDs per request
+CHANNELS_PER_REQUEST = 50
+
+metadata_l1 = LRUCache(max_size=settings.CHANNEL_METADATA_L1_SIZE, ttl=settings.CHANNEL_METADATA_L1_TTL)
+
 
 def extract_channel_name(url):
     pattern = r"(?:https?:\/\/)?(?:www\.)?youtube\.com\/(?:channel\/)?@([^\/\n?]+)"
@@ -20,30 +38,205 @@ def extract_channel_name(url):
     return channel_name
 
 
-def cached_api_call(cache_key, url, expiration_days=7):
-    redis_client = celery_app.backend.client
-    logger.info(f"Checking cache for key: {cache_key}")
-    cached_data = redis_client.get(cache_key)
-    if cached_data:
-        logger.info(f"Using cached data for {url}")
-        return json.loads(cached_data)
-    logger.info(f"Fetching fresh data from {url}")
+# In-process futures for fetches currently in flight, keyed by cache key
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def _decode(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def youtube_get(url, priority=PRIORITY_NORMAL, etag=None):
+    """GET on the pooled session. With an etag the request is conditional and may come back 304 Not Modified."""
+    admit(endpoint_for_url(url), priority)
+    headers = {'If-None-Match': etag} if etag else None
+    response = youtube_session.get(
+        url, headers=headers, timeout=(settings.YOUTUBE_API_CONNECT_TIMEOUT, settings.YOUTUBE_API_READ_TIMEOUT)
+    )
+    if response.status_code == 403 and b'quotaExceeded' in response.content:
+        record_quota_exhausted()
+        raise QuotaExceededError("YouTube API reported quotaExceeded", retry_after=quota_window()[1])
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
+
+
+def fetch_json(url, priority=PRIORITY_NORMAL):
+    return youtube_get(url, priority).json()
+
+
+def fetch_and_cache(redis_client, cache_key, url, expiration_days=7, priority=PRIORITY_NORMAL):
+    """
+    Fetches and caches the raw response body. The body is also kept with its ETag for YOUTUBE_API_ETAG_TTL, so once
+    the cache entry expires the refetch is conditional: an unchanged resource costs a 304 and we reuse the stored body.
+    """
     try:
-        with urlopen(url) as response:
-            data = json.load(response)
-        redis_client.setex(cache_key, int(timedelta(days=expiration_days).total_seconds()), json.dumps(data))
-        return data
+        validator = {_decode(k): _decode(v) for k, v in redis_client.hgetall(f"etag:{cache_key}").items()}
+        response = youtube_get(url, priority, validator.get('etag'))
+        if response.status_code == 304:
+            logger.info(f"{cache_key} not modified since last fetch")
+            body = validator['body']
+        else:
+            body = response.text
+            if response.headers.get('ETag'):
+                pipeline = redis_client.pipeline(transaction=False)
+                pipeline.hset(f"etag:{cache_key}", mapping={'etag': response.headers['ETag'], 'body': body})
+                pipeline.expire(f"etag:{cache_key}", settings.YOUTUBE_API_ETAG_TTL)
+                pipeline.execute()
+        redis_client.setex(cache_key, int(timedelta(days=expiration_days).total_seconds()), body)
+        return json.loads(body)
+    except QuotaExceededError:
+        # Not a failure of this key: don't negative-cache it, let the caller deny or defer
+        raise
     except Exception as e:
         logger.error(f"Error fetching data: {e}")
+        redis_client.setex(f"negative:{cache_key}", settings.YOUTUBE_API_NEGATIVE_CACHE_TTL, json.dumps({"error": str(e)}))
+        return None
+
+
+def single_flight_fetch(redis_client, cache_key, url, expiration_days=7, force_refresh=False, priority=PRIORITY_NORMAL):
+    """
+    Fetch under a cluster-wide lease so only one process calls the API per key. Everyone else polls
+    the cache until the holder publishes a result (or a negative entry), or its lease expires.
+    A forced refresh can't trust what an earlier holder publishes, so it waits for the lease and fetches itself.
+    """
+    lease = RedisLease(redis_client, f"lock:{cache_key}", settings.YOUTUBE_API_LOCK_TIMEOUT)
+    deadline = time.monotonic() + 2 * settings.YOUTUBE_API_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        if lease.acquire():
+            try:
+                # The previous holder may have filled the cache between our miss and the acquire
+                cached_data = None if force_refresh else redis_client.get(cache_key)
+                if cached_data:
+                    return json.loads(cached_data)
+                logger.info(f"Fetching fresh data from {url}")
+                return fetch_and_cache(redis_client, cache_key, url, expiration_days, priority)
+            finally:
+                lease.release()
+
+        time.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+        if force_refresh:
+            continue
+        cached_data = redis_client.get(cache_key)
+        if cached_data:
+            logger.info(f"Using data fetched by another worker for {url}")
+            return json.loads(cached_data)
+        if redis_client.get(f"negative:{cache_key}"):
+            return None
+
+    logger.warning(f"Timed out waiting for in-flight fetch of {cache_key}, fetching directly")
+    return fetch_and_cache(redis_client, cache_key, url, expiration_days, priority)
+
+
+def cached_api_call(cache_key, url, expiration_days=7, force_refresh=False, priority=PRIORITY_NORMAL):
+    if not force_refresh:
+        logger.info(f"Checking cache for key: {cache_key}")
+        cached_data = redis_client.get(cache_key)
+        if cached_data:
+            logger.info(f"Using cached data for {url}")
+            return json.loads(cached_data)
+        if redis_client.get(f"negative:{cache_key}"):
+            logger.info(f"Recent fetch of {cache_key} failed, not retrying yet")
+            return None
+
+    # A forced refresh must not join a fetch that started before it; it leads its own, and later callers join that one
+    with _inflight_lock:
+        future = None if force_refresh else _inflight.get(cache_key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _inflight[cache_key] = future
+
+    if not is_leader:
+        logger.info(f"Waiting for in-flight fetch of {cache_key}")
+        try:
+            return future.result(timeout=2 * settings.YOUTUBE_API_LOCK_TIMEOUT)
+        except QuotaExceededError:
+            raise
+        except Exception as e:
+            logger.error(f"In-flight fetch of {cache_key} failed: {e}")
+            return None
+
+    try:
+        data = single_flight_fetch(redis_client, cache_key, url, expiration_days, force_refresh, priority)
+        future.set_result(data)
+        return data
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            if _inflight.get(cache_key) is future:
+                del _inflight[cache_key]
+
+
+def extract_channel_id(url):
+    match = re.search(r"youtube\.com\/channel\/(UC[\w-]{22})", url)
+    return match.group(1) if match else None
+
+
+def normalize_handle(handle):
+    return handle.strip().lstrip('@').lower()
+
+
+def remember_channel_handle(handle, channel_id):
+    """Handle-to-ID mappings never change for a given channel, so they are stored without expiry in both directions."""
+    handle = normalize_handle(handle)
+    pipeline = redis_client.pipeline(transaction=False)
+    pipeline.set(f"channel_handle:{handle}", channel_id)
+    pipeline.set(f"channel_handle_reverse:{channel_id}", handle)
+    pipeline.execute()
+
+
+def get_channel_handle(channel_id):
+    handle = redis_client.get(f"channel_handle_reverse:{channel_id}")
+    return handle.decode('utf-8') if isinstance(handle, bytes) else handle
+
+
+def lookup_channel_id(param, value, priority=PRIORITY_NORMAL):
+    """Exact channel lookup by handle or legacy username: costs 1 quota unit instead of 100 for a search."""
+    url = f'https://www.googleapis.com/youtube/v3/channels?part=id&{param}={quote(value)}&key={settings.YOUTUBE_API_KEY}'
+    data = cached_api_call(f"youtube_api:channels:{param}:{value.lower()}", url, expiration_days=1, priority=priority)
+    for item in (data or {}).get("items", []):
+        if isinstance(item.get("id"), str):
+            return item["id"]
+    return None
+
+
+def resolve_channel_handle(handle, priority=PRIORITY_NORMAL):
+    """
+    Resolve a channel handle to its ID: permanent cache, then exact lookups, with search only as a last resort.
+    Only exact matches are remembered; a search hit is a guess, so it stays in the day-long search cache instead.
+    """
+    handle = normalize_handle(handle)
+    if not handle:
         return None
 
+    cached_id = redis_client.get(f"channel_handle:{handle}")
+    if cached_id:
+        return cached_id.decode('utf-8') if isinstance(cached_id, bytes) else cached_id
+
+    if not re.search(r"\s", handle):
+        channel_id = lookup_channel_id("forHandle", f"@{handle}", priority) or lookup_channel_id("forUsername", handle, priority)
+        if channel_id:
+            remember_channel_handle(handle, channel_id)
+            return channel_id
+
+    logger.info(f"No exact match for handle {handle}, falling back to search")
+    return search_channel_id(handle, priority)
 
-def get_channel_id(channel_name):
+
+def get_channel_id(channel_name, priority=PRIORITY_NORMAL):
+    return resolve_channel_handle(channel_name, priority)
+
+
+def search_channel_id(channel_name, priority=PRIORITY_NORMAL):
     query = '%20'.join(channel_name.split())
-    search_url = f'https://www.googleapis.com/youtube/v3/search?part=snippet&q={query}&key={settings.YOUTUBE_API_KEY}'
+    search_url = f'https://www.googleapis.com/youtube/v3/search?part=snippet&type=channel&q={query}&key={settings.YOUTUBE_API_KEY}'
     logger.info(f"Fetching channel ID for {channel_name} at URL: {search_url}")
     cache_key = f"channel_id::{channel_name}"
-    data = cached_api_call(cache_key, search_url)
+    data = cached_api_call(cache_key, search_url, expiration_days=1, priority=priority)
     if not data:
         return None
 
@@ -56,16 +249,19 @@ def get_channel_id(channel_name):
 
     # Try to find a channel result first
     for item in channel_info:
-        if item["id"].get("kind") == "youtube#channel":
-            channel_id = item["id"]["channelId"]
+        item_id = item.get("id") if isinstance(item.get("id"), dict) else {}
+        if item_id.get("kind") == "youtube#channel" and item_id.get("channelId"):
+            channel_id = item_id["channelId"]
             logger.info(f"Found channel ID: {channel_id}")
             return channel_id
 
-    # If no channel found, use the first result's channelId
-    if channel_info:
-        channel_id = channel_info[0]["snippet"]["channelId"]
-        logger.info(f"Using channelId from first result: {channel_id}")
-        return channel_id
+    # If no channel found, use the first result that names a channel
+    for item in channel_info:
+        item_id = item.get("id") if isinstance(item.get("id"), dict) else {}
+        channel_id = item_id.get("channelId") or (item.get("snippet") or {}).get("channelId")
+        if channel_id:
+            logger.info(f"Using channelId from first result: {channel_id}")
+            return channel_id
 
     logger.warning(f"No channel ID found for {channel_name}")
     return None
@@ -76,9 +272,13 @@ def build_url(channel_id, parts):
     return f'https://www.googleapis.com/youtube/v3/channels?id={channel_id}&key={settings.YOUTUBE_API_KEY}&part={parts_str}'
 
 
-def get_channel_metadata(channel_id: Optional[str] = None, channel_name: Optional[str] = None, channel_url: Optional[str] = None):
+def build_bulk_url(channel_ids, parts):
+    return f"{build_url(','.join(channel_ids), parts)}&maxResults={len(channel_ids)}"
+
+
+def get_channel_metadata(channel_id: Optional[str] = None, channel_name: Optional[str] = None, channel_url: Optional[str] = None, force_refresh: bool = False, priority: str = PRIORITY_NORMAL):
     if not channel_id:
-        (channel_id, channel_name, channel_url) = get_channel_id_from_name_or_url(channel_name, channel_url)
+        (channel_id, channel_name, channel_url) = get_channel_id_from_name_or_url(channel_name, channel_url, priority)
 
     if not channel_id:
         logger.error(f"Channel not found: {channel_name or channel_url}")
@@ -86,10 +286,12 @@ def get_channel_metadata(channel_id: Optional[str] = None, channel_name: Optiona
 
     logger.info(f"Getting metadata for channel: {channel_id}")
 
-    parts = ['snippet', 'statistics', 'topicDetails', 'status', 'brandingSettings', 'localizations']
-    url = build_url(channel_id, parts)
-    cache_key = f"channel_metadata:{channel_id}"
-    data = cached_api_call(cache_key, url)
+    url = build_url(channel_id, METADATA_PARTS)
+    # The raw response is kept only as long as the soft TTL; the long-lived copy is the channel_metadata entry
+    cache_key = f"youtube_api:channels:{channel_id}"
+    data = cached_api_call(cache_key, url, expiration_days=settings.CHANNEL_METADATA_SOFT_TTL / 86400, force_refresh=force_refresh, priority=priority)
+    if not data:
+        return None
 
     items = data.get("items", [])
     if not items:
@@ -101,40 +303,218 @@ def get_channel_metadata(channel_id: Optional[str] = None, channel_name: Optiona
 
 def store_channel_metadata(channel_metadata):
     logger.info(f"Storing metadata for channel: {channel_metadata['snippet']['title']}")
-    redis_client = celery_app.backend.client
     channel_id = channel_metadata['id']
-    expiration = timedelta(days=7)
-    redis_client.setex(f"channel_metadata:{channel_id}", int(expiration.total_seconds()), json.dumps(channel_metadata))
+    cache_key = f"channel_metadata:{channel_id}"
+    entry = {'metadata': channel_metadata, 'fetched_at': time.time()}
+    redis_client.setex(cache_key, settings.CHANNEL_METADATA_HARD_TTL, json.dumps(entry))
+    metadata_l1.set(cache_key, entry)
+    custom_url = channel_metadata.get('snippet', {}).get('customUrl', '')
+    if custom_url.startswith('@'):
+        remember_channel_handle(custom_url, channel_id)
+
+
+def store_channels_metadata(items):
+    """Store several channels' metadata in one Redis round trip."""
+    fetched_at = time.time()
+    pipeline = redis_client.pipeline(transaction=False)
+    for channel_metadata in items:
+        cache_key = f"channel_metadata:{channel_metadata['id']}"
+        entry = {'metadata': channel_metadata, 'fetched_at': fetched_at}
+        pipeline.setex(cache_key, settings.CHANNEL_METADATA_HARD_TTL, json.dumps(entry))
+        metadata_l1.set(cache_key, entry)
+        custom_url = channel_metadata.get('snippet', {}).get('customUrl', '')
+        if custom_url.startswith('@'):
+            handle = normalize_handle(custom_url)
+            pipeline.set(f"channel_handle:{handle}", channel_metadata['id'])
+            pipeline.set(f"channel_handle_reverse:{channel_metadata['id']}", handle)
+    pipeline.execute()
+
+
+def fetch_channels_metadata(channel_ids: List[str], priority: str = PRIORITY_NORMAL) -> Dict[str, Dict]:
+    """Fetch metadata for many channels using the multi-ID form of the channels endpoint, 50 IDs per request."""
+    groups = [channel_ids[i:i + CHANNELS_PER_REQUEST] for i in range(0, len(channel_ids), CHANNELS_PER_REQUEST)]
+
+    def fetch_group(group):
+        try:
+            return fetch_json(build_bulk_url(group, METADATA_PARTS), priority).get("items", [])
+        except QuotaExceededError:
+            raise
+        except Exception as e:
+            logger.error(f"Error fetching metadata for {len(group)} channels: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(groups), settings.YOUTUBE_API_MAX_CONCURRENCY))) as executor:
+        items = [item for group_items in executor.map(fetch_group, groups) for item in group_items]
+
+    if items:
+        store_channels_metadata(items)
+    logger.info(f"Fetched metadata for {len(items)} of {len(channel_ids)} channels in {len(groups)} requests")
+    return {item['id']: item for item in items}
+
+
+def get_channels_metadata(channel_ids: List[str], priority: str = PRIORITY_NORMAL) -> Dict[str, Dict]:
+    """
+    Bulk metadata read: in-process L1 first, then a single Redis MGET, then the YouTube API for
+    whatever is still missing. Stale entries are served and refreshed in one background task.
+    """
+    channel_ids = list(dict.fromkeys(channel_ids))
+    results = {}
+    stale = []
+
+    def collect(channel_id, entry):
+        results[channel_id] = entry['metadata']
+        if time.time() - entry['fetched_at'] > settings.CHANNEL_METADATA_SOFT_TTL:
+            stale.append(channel_id)
+
+    remaining = []
+    for channel_id in channel_ids:
+        entry = metadata_l1.get(f"channel_metadata:{channel_id}")
+        if entry is not None:
+            collect(channel_id, entry)
+        else:
+            remaining.append(channel_id)
+
+    if remaining:
+        stored_entries = redis_client.mget([f"channel_metadata:{channel_id}" for channel_id in remaining])
+        misses = []
+        for channel_id, stored in zip(remaining, stored_entries):
+            if not stored:
+                misses.append(channel_id)
+                continue
+            entry = json.loads(stored)
+            if 'metadata' not in entry:
+                entry = {'metadata': entry, 'fetched_at': 0}
+            metadata_l1.set(f"channel_metadata:{channel_id}", entry)
+            collect(channel_id, entry)
+
+        if misses:
+            results.update(fetch_channels_metadata(misses, priority))
+
+    if stale:
+        try:
+            schedule_metadata_refreshes(stale)
+        except Exception as e:
+            logger.error(f"Failed to schedule metadata refresh for {len(stale)} channels: {str(e)}")
+
+    return results
+
+
+def get_channel_metadata_entry(channel_id):
+    """Return the stored {'metadata', 'fetched_at'} entry for a channel from the in-process L1, then Redis."""
+    cache_key = f"channel_metadata:{channel_id}"
+    entry = metadata_l1.get(cache_key)
+    if entry is not None:
+        return entry
+    stored = redis_client.get(cache_key)
+    if not stored:
+        return None
+    entry = json.loads(stored)
+    if 'metadata' not in entry:
+        # Written before entries carried a fetch time; serve it but treat it as stale
+        entry = {'metadata': entry, 'fetched_at': 0}
+    metadata_l1.set(cache_key, entry)
+    return entry
 
 
 def get_stored_channel_metadata(channel_id):
     logger.info(f"Getting stored metadata for channel: {channel_id}")
-    redis_client = celery_app.backend.client
-    metadata = redis_client.get(f"channel_metadata:{channel_id}")
-    return json.loads(metadata) if metadata else None
+    entry = get_channel_metadata_entry(channel_id)
+    return entry['metadata'] if entry else None
+
+
+def schedule_metadata_refresh(channel_id):
+    # One queued refresh per channel, however many readers see the stale entry
+    if redis_client.set(f"metadata_refresh:{channel_id}", "1", nx=True, ex=settings.CHANNEL_METADATA_REFRESH_LOCK_TTL):
+        logger.info(f"Scheduling background metadata refresh for channel: {channel_id}")
+        refresh_channel_metadata_task.delay(channel_id)
+
+
+def schedule_metadata_refreshes(channel_ids):
+    """Bulk counterpart of schedule_metadata_refresh: one task for the stale channels nobody else is refreshing."""
+    pipeline = redis_client.pipeline(transaction=False)
+    for channel_id in channel_ids:
+        pipeline.set(f"metadata_refresh:{channel_id}", "1", nx=True, ex=settings.CHANNEL_METADATA_REFRESH_LOCK_TTL)
+    claimed = [channel_id for channel_id, acquired in zip(channel_ids, pipeline.execute()) if acquired]
+    if claimed:
+        logger.info(f"Scheduling background refresh for {len(claimed)} of {len(channel_ids)} stale channels")
+        refresh_channels_metadata_task.delay(claimed)
+
+
+def get_cached_channel_metadata(channel_id):
+    """
+    Stale-while-revalidate read: entries older than the soft TTL are still served immediately,
+    while a background task refreshes them. Only a missing entry (past the hard TTL) returns None.
+    """
+    entry = get_channel_metadata_entry(channel_id)
+    if entry is None:
+        return None
+    if time.time() - entry['fetched_at'] > settings.CHANNEL_METADATA_SOFT_TTL:
+        try:
+            schedule_metadata_refresh(channel_id)
+        except Exception as e:
+            logger.error(f"Failed to schedule metadata refresh for {channel_id}: {str(e)}")
+    return entry['metadata']
 
 
-def get_channel_id_from_name_or_url(channel_name: Optional[str] = None, channel_url: Optional[str] = None):
+def quota_retry_countdown(retry_after: int) -> int:
+    # The quota resets at Pacific midnight, up to a day away, but an ETA that far out outlives the broker's visibility
+    # timeout and gets redelivered; wake up sooner instead and let admit() check the quota again
+    return min(retry_after, settings.QUOTA_RETRY_MAX_COUNTDOWN)
+
+
+@celery_app.task(bind=True, max_retries=None, ignore_result=True)
+def refresh_channels_metadata_task(self, channel_ids: List[str]):
+    try:
+        metadata = fetch_channels_metadata(channel_ids, PRIORITY_LOW)
+    except QuotaExceededError as e:
+        # Background refreshes only spend the low-priority share; wait for the daily reset
+        logger.warning(f"Deferring refresh of {len(channel_ids)} channels for {e.retry_after}s: {str(e)}")
+        raise self.retry(countdown=quota_retry_countdown(e.retry_after))
+    return {'status': 'refreshed', 'refreshed': len(metadata), 'requested': len(channel_ids)}
+
+
+@celery_app.task(bind=True, max_retries=None, ignore_result=True)
+def refresh_channel_metadata_task(self, channel_id: str):
+    try:
+        metadata = get_channel_metadata(channel_id, force_refresh=True, priority=PRIORITY_LOW)
+        if metadata:
+            store_channel_metadata(metadata)
+            return {'status': 'refreshed', 'channel_id': channel_id}
+        return {'status': 'unavailable', 'channel_id': channel_id}
+    except QuotaExceededError as e:
+        logger.warning(f"Deferring metadata refresh for {channel_id} for {e.retry_after}s: {str(e)}")
+        raise self.retry(countdown=quota_retry_countdown(e.retry_after))
+    except Exception:
+        # Let the next stale read schedule another attempt. After a refresh the lock is left to expire, so readers
+        # still holding the stale entry in their L1 don't each queue a refresh of their own.
+        redis_client.delete(f"metadata_refresh:{channel_id}")
+        raise
+
+
+def get_channel_id_from_name_or_url(channel_name: Optional[str] = None, channel_url: Optional[str] = None, priority: str = PRIORITY_NORMAL):
     if not channel_name and not channel_url:
         logger.error("No channel name or URL provided")
         return None, None, None
 
     if channel_name:
-        channel_id = get_channel_id(channel_name)
+        channel_id = get_channel_id(channel_name, priority)
     else:
+        channel_id = extract_channel_id(channel_url)
+        if channel_id:
+            return channel_id, channel_name, channel_url
         channel_name = extract_channel_name(channel_url)
-        channel_id = get_channel_id(channel_name)
+        channel_id = get_channel_id(channel_name, priority) if channel_name else None
 
     return channel_id, channel_name, channel_url
 
 
-def get_channel_info(channel_id: Optional[str] = None, channel_name: Optional[str] = None, channel_url: Optional[str] = None):
+def get_channel_info(channel_id: Optional[str] = None, channel_name: Optional[str] = None, channel_url: Optional[str] = None, priority: str = PRIORITY_NORMAL):
     if not channel_id and not channel_name and not channel_url:
         logger.error("No channel ID, channel name, or channel URL provided")
         return None
 
     if not channel_id:
-        (channel_id, channel_name, channel_url) = get_channel_id_from_name_or_url(channel_name, channel_url)
+        (channel_id, channel_name, channel_url) = get_channel_id_from_name_or_url(channel_name, channel_url, priority)
 
     if not channel_id:
         logger.error(f"Channel not found: {channel_name or channel_url}")
@@ -144,11 +524,11 @@ def get_channel_info(channel_id: Optional[str] = None, channel_name: Optional[st
 
     try:
         # Check for cached metadata
-        metadata = get_stored_channel_metadata(channel_id)
+        metadata = get_cached_channel_metadata(channel_id)
         if not metadata:
             # If not cached, fetch and store
             logger.info(f"Fetching fresh metadata for channel: {channel_id}")
-            metadata = get_channel_metadata(channel_id)
+            metadata = get_channel_metadata(channel_id, priority=priority)
             if metadata:
                 store_channel_metadata(metadata)
             else:
@@ -158,11 +538,13 @@ def get_channel_info(channel_id: Optional[str] = None, channel_name: Optional[st
         query_embedding = generate_embedding(channel_id)
         results = index.query(vector=query_embedding, filter={"channel_id": channel_id}, top_k=1, include_metadata=True)
 
+        transcript_failures = get_transcript_failure_counts(channel_id)
         if not results['matches']:
             return {
                 'channel_id': channel_id,
                 'unique_video_count': 0,
                 'total_embeddings': 0,
+                'transcript_failures': transcript_failures,
                 'metadata': metadata
             }
 
@@ -182,8 +564,11 @@ def get_channel_info(channel_id: Optional[str] = None, channel_name: Optional[st
             'channel_id': channel_id,
             'unique_video_count': len(unique_video_ids),
             'total_embeddings': total_embeddings,
+            'transcript_failures': transcript_failures,
             'metadata': metadata
         }
+    except QuotaExceededError:
+        raise
     except Exception as e:
         logger.error(f"Error getting channel info: {str(e)}")
         return None
@@ -0,0 +1,50 @@
+# app/services/dead_letter_service.py
+import json
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from app.core.redis_pool import redis_client
+
+logger = logging.getLogger(__name__)
+
+DEAD_LETTERS_KEY = "dead_letters"
+DEAD_LETTERS_INDEX_KEY = "dead_letters:by_time"
+
+
+def add_dead_letter(video_id: str, channel_id: str, error: str, error_class: str, attempts: int, job_id: Optional[str] = None):
+    entry = {
+        'video_id': video_id,
+        'channel_id': channel_id,
+        'job_id': job_id,
+        'error': error,
+        'error_class': error_class,
+        'attempts': attempts,
+        'failed_at': time.time(),
+    }
+    pipeline = redis_client.pipeline()
+    pipeline.hset(DEAD_LETTERS_KEY, video_id, json.dumps(entry))
+    pipeline.zadd(DEAD_LETTERS_INDEX_KEY, {video_id: entry['failed_at']})
+    pipeline.execute()
+    logger.warning(f"Dead-lettered video {video_id} of channel {channel_id} after {attempts} attempts ({error_class}): {error}")
+
+
+def list_dead_letters(limit: int = 50, offset: int = 0) -> Tuple[List[Dict], int]:
+    """Most recent failures first, plus the total number of dead letters."""
+    video_ids = redis_client.zrevrange(DEAD_LETTERS_INDEX_KEY, offset, offset + limit - 1)
+    total = redis_client.zcard(DEAD_LETTERS_INDEX_KEY)
+    if not video_ids:
+        return [], total
+    entries = redis_client.hmget(DEAD_LETTERS_KEY, video_ids)
+    return [json.loads(entry) for entry in entries if entry], total
+
+
+def get_dead_letter(video_id: str) -> Optional[Dict]:
+    entry = redis_client.hget(DEAD_LETTERS_KEY, video_id)
+    return json.loads(entry) if entry else None
+
+
+def remove_dead_letter(video_id: str):
+    pipeline = redis_client.pipeline()
+    pipeline.hdel(DEAD_LETTERS_KEY, video_id)
+    pipeline.zrem(DEAD_LETTERS_INDEX_KEY, video_id)
+    pipeline.execute()
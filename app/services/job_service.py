@@ -0,0 +1,288 @@
+# app/services/job_service.py
+import logging
+import time
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.core.redis_pool import redis_client
+from app.utils.redis_lock import RELEASE_SCRIPT
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = "high"
+PRIORITY_NORMAL = "normal"
+PRIORITY_BACKFILL = "backfill"
+
+# Workers consume these in order (see broker_transport_options['queue_order_strategy'])
+CHANNEL_QUEUES = {
+    PRIORITY_HIGH: "channel-high",
+    PRIORITY_NORMAL: "celery",
+    PRIORITY_BACKFILL: "channel-backfill",
+}
+
+ACTIVE_STATUSES = ("PENDING", "PROGRESS")
+
+# Per-video checkpoint states within a job
+VIDEO_IN_PROGRESS = "in_progress"
+VIDEO_DONE = "done"
+VIDEO_NO_TRANSCRIPT = "no_transcript"
+VIDEO_RETRYING = "retrying"
+VIDEO_FAILED = "failed"
+VIDEO_EMBEDDING = "embedding"
+VIDEO_FINISHED_STATUSES = (VIDEO_DONE, VIDEO_NO_TRANSCRIPT)
+# Videos a slice leaves alone because a retry task, chunk-range subtasks or the dead-letter queue own them
+VIDEO_HANDED_OFF_STATUSES = (VIDEO_RETRYING, VIDEO_EMBEDDING, VIDEO_FAILED)
+
+
+def queue_for_priority(priority: str) -> str:
+    return CHANNEL_QUEUES.get(priority, CHANNEL_QUEUES[PRIORITY_NORMAL])
+
+
+def default_priority(video_limit: int) -> str:
+    """Large requests are backfills unless the caller says otherwise."""
+    return PRIORITY_BACKFILL if (video_limit or 0) > settings.BACKFILL_VIDEO_THRESHOLD else PRIORITY_NORMAL
+
+
+def highest_priority(*priorities: str) -> str:
+    return min(priorities, key=list(CHANNEL_QUEUES).index)
+
+
+def _decode(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def job_is_stale(job: Dict) -> bool:
+    return time.time() - float(job.get('updated_at') or 0) > settings.JOB_STALE_AFTER
+
+
+def claim_channel_job(job_id: str, channel_id: str, video_limit: int, priority: str, force: bool = False) -> Optional[Dict]:
+    """
+    Registers job_id as the channel's active job. If the channel already has a queued or running job,
+    nothing is registered and that job is returned instead, unless it has gone stale or force is set:
+    then it is failed and replaced.
+    """
+    now = time.time()
+    # Write the record before claiming the channel, so a claimed pointer without a record means the job expired
+    pipeline = redis_client.pipeline()
+    pipeline.hset(f"job:{job_id}", mapping={
+        'job_id': job_id,
+        'channel_id': channel_id,
+        'video_limit': video_limit,
+        'priority': priority,
+        'status': 'PENDING',
+        'total': 0,
+        'processed': 0,
+        'created_at': now,
+        'updated_at': now,
+    })
+    pipeline.expire(f"job:{job_id}", settings.JOB_RECORD_TTL)
+    pipeline.execute()
+
+    for _ in range(3):
+        if redis_client.set(f"active_job:{channel_id}", job_id, nx=True, ex=settings.JOB_RECORD_TTL):
+            return None
+        existing_id = _decode(redis_client.get(f"active_job:{channel_id}"))
+        if existing_id is None:
+            continue
+        existing_job = get_job(existing_id)
+        if existing_job and existing_job['status'] in ACTIVE_STATUSES:
+            if not force and not job_is_stale(existing_job):
+                redis_client.delete(f"job:{job_id}")
+                return existing_job
+            # Its queued slices see a finished status and stop; finish_job also clears the pointer if still ours
+            logger.warning(f"Replacing job {existing_id} for channel {channel_id} with {job_id} ({'forced' if force else 'stale'})")
+            finish_job(existing_id, channel_id, status='FAILED', error=f"Replaced by job {job_id}")
+            continue
+        # The pointer outlived its job (e.g. the worker died); clear it only if nobody replaced it meanwhile
+        redis_client.eval(RELEASE_SCRIPT, 1, f"active_job:{channel_id}", existing_id)
+
+    redis_client.delete(f"job:{job_id}")
+    raise RuntimeError(f"Could not register a job for channel {channel_id}")
+
+
+def get_job(job_id: str) -> Optional[Dict]:
+    try:
+        record = redis_client.hgetall(f"job:{job_id}")
+    except Exception as e:
+        logger.error(f"Error reading job {job_id}: {str(e)}")
+        return None
+    if not record:
+        return None
+    job = {_decode(key): _decode(value) for key, value in record.items()}
+    for field in ('video_limit', 'total', 'processed'):
+        job[field] = int(float(job.get(field, 0)))
+    return job
+
+
+def set_job_videos(job_id: str, video_ids: List[str]):
+    pipeline = redis_client.pipeline()
+    pipeline.delete(f"job:{job_id}:videos")
+    if video_ids:
+        pipeline.rpush(f"job:{job_id}:videos", *video_ids)
+    pipeline.expire(f"job:{job_id}:videos", settings.JOB_RECORD_TTL)
+    pipeline.hset(f"job:{job_id}", mapping={'total': len(video_ids), 'status': 'PROGRESS', 'updated_at': time.time()})
+    pipeline.execute()
+
+
+def get_job_videos(job_id: str, offset: int = 0, limit: int = -1) -> List[str]:
+    end = -1 if limit < 0 else offset + limit - 1
+    return [_decode(video_id) for video_id in redis_client.lrange(f"job:{job_id}:videos", offset, end)]
+
+
+def has_job_videos(job_id: str) -> bool:
+    return bool(redis_client.exists(f"job:{job_id}:videos"))
+
+
+def get_video_statuses(job_id: str, video_ids: List[str]) -> Dict[str, Optional[str]]:
+    if not video_ids:
+        return {}
+    statuses = redis_client.hmget(f"job:{job_id}:video_status", video_ids)
+    return {video_id: _decode(status) for video_id, status in zip(video_ids, statuses)}
+
+
+def set_video_status(job_id: str, video_id: str, status: str):
+    pipeline = redis_client.pipeline()
+    pipeline.hset(f"job:{job_id}:video_status", video_id, status)
+    pipeline.expire(f"job:{job_id}:video_status", settings.JOB_RECORD_TTL)
+    pipeline.execute()
+
+
+def get_chunk_checkpoint(job_id: str, video_id: str) -> int:
+    """Number of leading chunks of the video already upserted by this job."""
+    value = redis_client.hget(f"job:{job_id}:chunk_offsets", video_id)
+    return int(value) if value else 0
+
+
+def set_chunk_checkpoint(job_id: str, video_id: str, chunk_offset: int):
+    pipeline = redis_client.pipeline()
+    pipeline.hset(f"job:{job_id}:chunk_offsets", video_id, chunk_offset)
+    pipeline.expire(f"job:{job_id}:chunk_offsets", settings.JOB_RECORD_TTL)
+    pipeline.execute()
+
+
+def embedding_marker_key(video_id: str) -> str:
+    return f"embedding:{video_id}"
+
+
+def mark_video_embedding(video_id: str, job_id: Optional[str] = None):
+    """Flags a video whose chunk ranges are still embedding, so no other job or task picks it up meanwhile."""
+    redis_client.set(embedding_marker_key(video_id), job_id or '', ex=settings.CHUNKED_VIDEO_TTL)
+
+
+def clear_video_embedding(video_id: str):
+    redis_client.delete(embedding_marker_key(video_id))
+
+
+def is_video_embedding(video_id: str) -> bool:
+    return bool(redis_client.exists(embedding_marker_key(video_id)))
+
+
+def chunk_ranges_key(video_id: str) -> str:
+    # Start indexes of a long video's chunk ranges that are not stored yet
+    return f"chunk_ranges:{video_id}"
+
+
+def start_chunk_ranges(video_id: str, starts: List[int]):
+    """Records the ranges a long video was split into; finish_chunk_range reports when the last one is stored."""
+    key = chunk_ranges_key(video_id)
+    pipeline = redis_client.pipeline()
+    pipeline.delete(key)
+    pipeline.sadd(key, *starts)
+    pipeline.expire(key, settings.CHUNKED_VIDEO_TTL)
+    pipeline.execute()
+
+
+def finish_chunk_range(video_id: str, start: int) -> bool:
+    """True for exactly one caller: the one that stores the video's last outstanding range."""
+    key = chunk_ranges_key(video_id)
+    # One MULTI, so concurrent ranges never both see the set empty and a redelivered range never counts twice
+    pipeline = redis_client.pipeline()
+    pipeline.srem(key, start)
+    pipeline.scard(key)
+    removed, remaining = pipeline.execute()
+    return bool(removed) and remaining == 0
+
+
+def clear_chunk_ranges(video_id: str):
+    redis_client.delete(chunk_ranges_key(video_id))
+
+
+def lost_embedding_videos(job_id: str) -> List[str]:
+    """Videos of the job still shown as embedding whose marker has expired, i.e. whose ranges will never finish."""
+    statuses = redis_client.hgetall(f"job:{job_id}:video_status")
+    embedding = [_decode(video_id) for video_id, status in statuses.items() if _decode(status) == VIDEO_EMBEDDING]
+    if not embedding:
+        return []
+    pipeline = redis_client.pipeline(transaction=False)
+    for video_id in embedding:
+        pipeline.exists(embedding_marker_key(video_id))
+    return [video_id for video_id, exists in zip(embedding, pipeline.execute()) if not exists]
+
+
+def job_has_embedding_videos(job_id: str) -> bool:
+    statuses = redis_client.hgetall(f"job:{job_id}:video_status")
+    embedding = [_decode(video_id) for video_id, status in statuses.items() if _decode(status) == VIDEO_EMBEDDING]
+    if not embedding:
+        return False
+    # Ranges that were lost altogether never clear their video; once the marker expires it stops holding up the job
+    return bool(redis_client.exists(*[embedding_marker_key(video_id) for video_id in embedding]))
+
+
+def finish_job_if_complete(job_id: str, channel_id: str) -> bool:
+    """
+    Finishes a job once every slice has run and no video is still embedding. Called by the last slice and by each
+    chunked video as it completes, whichever comes last; finishing twice is harmless.
+    """
+    job = get_job(job_id)
+    if not job or job['status'] not in ACTIVE_STATUSES or job['processed'] < job['total']:
+        return False
+    if job_has_embedding_videos(job_id):
+        logger.info(f"Job {job_id} is waiting for chunked videos to finish embedding")
+        return False
+    finish_job(job_id, channel_id)
+    return True
+
+
+def update_job_progress(job_id: str, processed: int):
+    redis_client.hset(f"job:{job_id}", mapping={'processed': processed, 'status': 'PROGRESS', 'updated_at': time.time()})
+
+
+def finish_job(job_id: str, channel_id: str, status: str = 'SUCCESS', error: Optional[str] = None):
+    mapping = {'status': status, 'updated_at': time.time()}
+    if error:
+        mapping['error'] = error
+    redis_client.hset(f"job:{job_id}", mapping=mapping)
+    # Only clear the channel's active job if it is still this one
+    redis_client.eval(RELEASE_SCRIPT, 1, f"active_job:{channel_id}", job_id)
+    if status == 'SUCCESS':
+        job = get_job(job_id)
+        mark_channel_processed(channel_id, job['video_limit'] if job else 0, job_id)
+
+
+def mark_channel_processed(channel_id: str, video_limit: int, job_id: Optional[str] = None):
+    redis_client.hset(f"channel_processed:{channel_id}", mapping={
+        'processed_at': time.time(),
+        'video_limit': video_limit,
+        'job_id': job_id or '',
+    })
+    redis_client.expire(f"channel_processed:{channel_id}", settings.CHANNEL_FRESHNESS_WINDOW)
+
+
+def get_recent_channel_run(channel_id: str, video_limit: int) -> Optional[Dict]:
+    """Return the channel's last completed run if it is inside the freshness window and covered at least video_limit videos."""
+    if settings.CHANNEL_FRESHNESS_WINDOW <= 0:
+        return None
+    record = redis_client.hgetall(f"channel_processed:{channel_id}")
+    if not record:
+        return None
+    run = {_decode(key): _decode(value) for key, value in record.items()}
+    if time.time() - float(run['processed_at']) > settings.CHANNEL_FRESHNESS_WINDOW:
+        return None
+    if int(run['video_limit']) < (video_limit or 0):
+        return None
+    return run
+
+
+def job_progress(job: Dict) -> float:
+    if job['status'] == 'SUCCESS':
+        return 100.0
+    return (job['processed'] / job['total']) * 100 if job['total'] else 0.0
@@ -0,0 +1,59 @@
+# app/services/payload_store.py
+import hashlib
+import logging
+import zlib
+from typing import Optional
+from app.core.config import settings
+from app.core.redis_pool import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Drops a reference and deletes the payload once nothing refers to it
+RELEASE_SCRIPT = """
+local refs = redis.call('decr', KEYS[2])
+if refs <= 0 then
+    redis.call('del', KEYS[1], KEYS[2])
+end
+return refs
+"""
+
+
+def payload_key(data: bytes) -> str:
+    return f"payload:{hashlib.sha256(data).hexdigest()}"
+
+
+def refs_key(key: str) -> str:
+    return f"{key}:refs"
+
+
+def put_payload(text: str) -> str:
+    """
+    Stores a large task argument once, compressed and keyed by its content, and returns the key to pass to the task
+    instead. Identical payloads share one copy and are reference counted; PAYLOAD_TTL is only a backstop for tasks
+    that never finish.
+    """
+    data = text.encode('utf-8')
+    key = payload_key(data)
+    pipeline = redis_client.pipeline()
+    pipeline.set(key, zlib.compress(data), nx=True, ex=settings.PAYLOAD_TTL)
+    pipeline.expire(key, settings.PAYLOAD_TTL)
+    pipeline.incr(refs_key(key))
+    pipeline.expire(refs_key(key), settings.PAYLOAD_TTL)
+    pipeline.execute()
+    logger.debug(f"Stored payload {key} ({len(data)} bytes)")
+    return key
+
+
+def get_payload(key: str) -> Optional[str]:
+    data = redis_client.get(key)
+    if data is None:
+        return None
+    return zlib.decompress(data).decode('utf-8')
+
+
+def release_payload(key: str):
+    try:
+        redis_client.eval(RELEASE_SCRIPT, 2, key, refs_key(key))
+    except Exception as e:
+        # The TTL cleans up anything we fail to release
+        logger.error(f"Error releasing payload {key}: {str(e)}")
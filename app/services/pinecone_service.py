@@ -1,17 +1,31 @@
 # app/services/pinecone_service.py
 import logging
-from pinecone import Pinecone
+from pinecone import Pinecone, ServerlessSpec
 from app.core.config import settings
-from app.utils.embedding_utils import generate_embedding
-from typing import List, Dict
+from app.core.clients import register_client, LazyClient
+from app.utils.embedding_utils import generate_embedding, generate_embeddings_batch
+from app.services.query_cache import get_cached_embedding, cache_embedding, bump_channel_version
+from app.services.semantic_cache import semantic_cache_scope, lookup_semantic_cache, add_to_semantic_cache
+from app.services.recent_chunks import record_recent_chunks, get_recent_chunk_ids
+from typing import Callable, List, Dict, Optional, Tuple
 from tenacity import retry, stop_after_attempt, wait_exponential
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-pc = Pinecone(
-    api_key=settings.PINECONE_API_KEY,
-    environment=settings.PINECONE_ENVIRONMENT
-)
-index = pc.Index(settings.PINECONE_INDEX_NAME)
+
+def create_pinecone() -> Pinecone:
+    return Pinecone(
+        api_key=settings.PINECONE_API_KEY,
+        environment=settings.PINECONE_ENVIRONMENT
+    )
+
+
+def create_index():
+    return create_pinecone().Index(settings.PINECONE_INDEX_NAME)
+
+
+register_client("pinecone_index", create_index, ping=lambda index: index.describe_index_stats())
+index = LazyClient("pinecone_index")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,29 +33,105 @@ logger = logging.getLogger(__name__)
 # Set Pinecone logger to WARNING level
 logging.getLogger("pinecone").setLevel(logging.WARNING)
 
+# Pinecone rejects upsert requests over 2MB or 1000 vectors
+MAX_UPSERT_BYTES = 1 * 1024 * 1024
+MAX_UPSERT_VECTORS = 1000
+
+
+def ensure_index() -> bool:
+    """
+    Creates the index with EMBEDDING_DIMENSIONS if it doesn't exist yet. An existing index of another size can't
+    store or be queried with our embeddings; changing the size means a new PINECONE_INDEX_NAME and re-ingesting.
+    """
+    try:
+        pc = create_pinecone()
+        if settings.PINECONE_INDEX_NAME not in pc.list_indexes().names():
+            logger.info(f"Creating index {settings.PINECONE_INDEX_NAME} with {settings.EMBEDDING_DIMENSIONS} dimensions")
+            pc.create_index(
+                name=settings.PINECONE_INDEX_NAME,
+                dimension=settings.EMBEDDING_DIMENSIONS,
+                metric=settings.PINECONE_METRIC,
+                spec=ServerlessSpec(cloud=settings.PINECONE_CLOUD, region=settings.PINECONE_REGION)
+            )
+            return True
+        dimension = pc.describe_index(settings.PINECONE_INDEX_NAME).dimension
+        if dimension != settings.EMBEDDING_DIMENSIONS:
+            logger.error(f"Index {settings.PINECONE_INDEX_NAME} has {dimension} dimensions but EMBEDDING_DIMENSIONS is "
+                         f"{settings.EMBEDDING_DIMENSIONS}")
+            return False
+        return True
+    except Exception as e:
+        logger.error(f"Error ensuring index {settings.PINECONE_INDEX_NAME}: {str(e)}")
+        return False
+
+
+def zero_vector() -> List[float]:
+    # Placeholder query vector for filter-only lookups
+    return [0.0] * settings.EMBEDDING_DIMENSIONS
+
 
 def estimate_vector_size(vector_tuple):
     # Estimate the size of the vector tuple when serialized to JSON
     return len(json.dumps(vector_tuple).encode('utf-8'))
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-def store_embeddings(channel_id: str, video_id: str, chunks: List[str], embeddings: List[List[float]]):
+class UpsertBatchError(Exception):
+    """Some upsert batches of a video failed after retrying; failed_batches holds (first, last) chunk index and error."""
+
+    def __init__(self, video_id: str, failed_batches: List[Tuple[int, int, str]], stored: int):
+        super().__init__(video_id, failed_batches, stored)
+        self.video_id = video_id
+        self.failed_batches = failed_batches
+        self.stored = stored
+
+    def __str__(self):
+        ranges = ", ".join(f"chunks {first}-{last} ({error})" for first, last, error in self.failed_batches)
+        return f"Failed to upsert {len(self.failed_batches)} batches for video {self.video_id}: {ranges}"
+
+
+def batch_vectors(vectors: List[Tuple], max_bytes: int = MAX_UPSERT_BYTES, max_vectors: int = MAX_UPSERT_VECTORS) -> List[List[Tuple]]:
+    """Groups vectors into upsert requests under Pinecone's request size and vector count limits."""
+    batches = []
+    current_batch = []
+    current_size = 0
+    for vector in vectors:
+        vector_size = estimate_vector_size(vector)
+        if current_batch and (current_size + vector_size > max_bytes or len(current_batch) >= max_vectors):
+            batches.append(current_batch)
+            current_batch = []
+            current_size = 0
+        current_batch.append(vector)
+        current_size += vector_size
+    if current_batch:
+        batches.append(current_batch)
+    return batches
+
+
+# The only retry around an upsert; Celery retries the task with its own backoff if a batch still fails
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10), reraise=True)
+def upsert_batch(vectors: List[Tuple]):
+    index.upsert(vectors=vectors)
+
+
+def store_embeddings(
+    channel_id: str,
+    video_id: str,
+    chunks: List[str],
+    embeddings: List[List[float]],
+    start_index: int = 0,
+    on_batch_stored: Optional[Callable[[int], None]] = None
+):
+    """
+    Upserts chunks in ~1MB batches, up to PINECONE_UPSERT_CONCURRENCY at a time. chunks[0] is stored as chunk
+    start_index, so a partially stored video can be resumed; on_batch_stored receives the absolute chunk offset up to
+    which every batch has been stored. Raises UpsertBatchError naming the failed batches if any still fail after retrying.
+    """
     try:
         logger.info(f"Storing embeddings for video {video_id}: {len(chunks)} chunks, {len(embeddings)} embeddings")
 
         if len(chunks) != len(embeddings):
             raise ValueError(f"Mismatch in number of chunks ({len(chunks)}) and embeddings ({len(embeddings)})")
 
-        @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-        def safe_upsert(vectors):
-            try:
-                index.upsert(vectors=vectors)
-            except Exception as e:
-                raise Exception(f"Failed to upsert vectors: {str(e)}")  # Raise a simpler, pickleable exception
-
-        logger.info(f"Storing {len(chunks)} chunks and embeddings for video {video_id}")
-
         vectors = [
             (f"{video_id}_{i}", embedding, {
                 "channel_id": channel_id,
@@ -49,32 +139,59 @@ def store_embeddings(channel_id: str, video_id: str, chunks: List[str], embeddin
                 "chunk_index": i,
                 "text": chunk
             })
-            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings), start_index)
         ]
+        batches = batch_vectors(vectors)
+        logger.info(f"Upserting {len(vectors)} vectors in {len(batches)} batches for video {video_id}")
+
+        # Batches finish out of order, so the checkpoint only advances over a contiguous run of stored batches
+        done = [False] * len(batches)
+        failed_batches = []
+        stored = start_index
+        next_batch = 0
+
+        def record(batch_number: int, error: Optional[Exception]):
+            nonlocal stored, next_batch
+            batch = batches[batch_number]
+            if error is not None:
+                first, last = batch[0][2]["chunk_index"], batch[-1][2]["chunk_index"]
+                logger.error(f"Upsert of chunks {first}-{last} for video {video_id} failed: {str(error)}")
+                failed_batches.append((first, last, str(error)))
+                return
+            done[batch_number] = True
+            advanced = False
+            while next_batch < len(batches) and done[next_batch]:
+                stored += len(batches[next_batch])
+                next_batch += 1
+                advanced = True
+            if advanced and on_batch_stored:
+                on_batch_stored(stored)
+
+        if len(batches) == 1:
+            try:
+                upsert_batch(batches[0])
+                record(0, None)
+            except Exception as e:
+                record(0, e)
+        elif batches:
+            with ThreadPoolExecutor(max_workers=min(len(batches), settings.PINECONE_UPSERT_CONCURRENCY)) as executor:
+                futures = {executor.submit(upsert_batch, batch): batch_number for batch_number, batch in enumerate(batches)}
+                for future in as_completed(futures):
+                    record(futures[future], future.exception())
 
-        # Split into batches
-        max_size = 1 * 1024 * 1024  # 1MB in bytes
-        current_batch = []
-        current_size = 0
-
-        for vector in vectors:
-            vector_size = estimate_vector_size(vector)
-
-            if current_size + vector_size > max_size:
-                logger.info(f"Upserting batch of size {len(current_batch)} (estimated {current_size/1024:.2f}KB) for video {video_id}")
-                safe_upsert(current_batch)  # Call the safe retryable function
-                current_batch = []
-                current_size = 0
-
-            current_batch.append(vector)
-            current_size += vector_size
+        record_recent_chunks(channel_id, video_id, start_index, stored)
 
-        if current_batch:
-            logger.info(f"Upserting final batch of size {len(current_batch)} (estimated {current_size/1024:.2f}KB) for video {video_id}")
-            safe_upsert(current_batch)
+        if failed_batches:
+            failed_batches.sort()
+            raise UpsertBatchError(video_id, failed_batches, stored)
 
         logger.info(f"Successfully stored embeddings for video {video_id}")
+        bump_channel_version(channel_id)
 
+    except UpsertBatchError as e:
+        # Batches that did succeed are kept; re-running from the checkpoint rewrites them idempotently
+        logger.error(f"Error storing embeddings for video {video_id}: {str(e)}")
+        raise
     except Exception as e:
         logger.error(f"Error storing embeddings for video {video_id}: {str(e)}")
         logger.error(f"channel_id type: {type(channel_id)}, video_id type: {type(video_id)}, "
@@ -143,18 +260,99 @@ def is_index_empty():
     return stats['total_vector_count'] == 0 if stats else True
 
 
+def chunk_text(metadata: Dict) -> str:
+    return metadata.get('text', metadata.get('transcript_chunk', ''))
+
+
+def parse_chunk_id(vector_id: str):
+    video_id, _, chunk_index = vector_id.rpartition('_')
+    return video_id, int(chunk_index)
+
+
+def fetch_chunk_texts(ids: List[str]) -> Dict[str, str]:
+    """Fetch chunk texts by vector ID, batching the IDs into as few fetch calls as possible."""
+    unique_ids = list(dict.fromkeys(ids))
+    batch_size = settings.CONTEXT_FETCH_BATCH_SIZE
+    texts = {}
+    for start in range(0, len(unique_ids), batch_size):
+        result = index.fetch(ids=unique_ids[start:start + batch_size])
+        for vector_id, vector in result['vectors'].items():
+            texts[vector_id] = chunk_text(vector['metadata'])
+    return texts
+
+
+def hydrate_matches(matches: List, context_window: int = 1) -> List[Dict]:
+    """Attach surrounding context to query matches using one batched fetch across all of them."""
+    neighbours = []
+    context_ids = []
+    for match in matches:
+        video_id, chunk_index = parse_chunk_id(match['id'])
+        before_ids = [f"{video_id}_{chunk_index - i}" for i in range(context_window, 0, -1) if chunk_index - i >= 0]
+        after_ids = [f"{video_id}_{chunk_index + i}" for i in range(1, context_window + 1)]
+        neighbours.append((before_ids, after_ids))
+        context_ids.extend(before_ids + after_ids)
+
+    texts = fetch_chunk_texts(context_ids) if context_ids else {}
+
+    relevant_chunks = []
+    for match, (before_ids, after_ids) in zip(matches, neighbours):
+        relevant_chunks.append({
+            "main_chunk": chunk_text(match['metadata']),
+            "context_before": [texts[vector_id] for vector_id in before_ids if vector_id in texts],
+            "context_after": [texts[vector_id] for vector_id in after_ids if vector_id in texts],
+            "score": match['score']
+        })
+    return relevant_chunks
+
+
+def get_query_embedding(query: str) -> List[float]:
+    query_embedding = get_cached_embedding(query)
+    if query_embedding is not None:
+        logger.info("Using cached query embedding")
+        return query_embedding
+    query_embedding = generate_embedding(query)
+    cache_embedding(query, query_embedding)
+    return query_embedding
+
+
+def get_query_embeddings(queries: List[str]) -> List[List[float]]:
+    """Resolve query embeddings from the cache and embed all misses in a single request."""
+    embeddings = [get_cached_embedding(query) for query in queries]
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        generated = generate_embeddings_batch([queries[i] for i in missing])
+        for i, embedding in zip(missing, generated):
+            embeddings[i] = embedding
+            cache_embedding(queries[i], embedding)
+    logger.info(f"Resolved {len(queries)} query embeddings ({len(queries) - len(missing)} cached)")
+    return embeddings
+
+
+def get_existing_channels(channel_ids: List[str]) -> List[str]:
+    if len(channel_ids) == 1:
+        return channel_ids if channel_exists_in_index(channel_ids[0]) else []
+    with ThreadPoolExecutor(max_workers=min(len(channel_ids), settings.SEARCH_MAX_CONCURRENCY)) as executor:
+        exists = list(executor.map(channel_exists_in_index, channel_ids))
+    return [channel_id for channel_id, found in zip(channel_ids, exists) if found]
+
+
 def retrieve_relevant_transcripts(query: str, channel_ids: List[str], limit: int = 5, context_window: int = 1) -> List[Dict]:
     try:
         logger.info(f"Generating embedding for query: {query}")
-        query_embedding = generate_embedding(query)
+        query_embedding = get_query_embedding(query)
         logger.info(f"Generated query embedding with length: {len(query_embedding)}")
 
         if not query_embedding:
             logger.error("Failed to generate query embedding")
             return []
 
+        scope = semantic_cache_scope(channel_ids, limit, context_window)
+        cached_chunks = lookup_semantic_cache(scope, query_embedding)
+        if cached_chunks is not None:
+            return cached_chunks
+
         if channel_ids:
-            existing_channels = [channel_id for channel_id in channel_ids if channel_exists_in_index(channel_id)]
+            existing_channels = get_existing_channels(channel_ids)
             if not existing_channels:
                 logger.warning(f"None of the provided channel IDs exist in the index: {channel_ids}")
                 return []
@@ -173,61 +371,87 @@ def retrieve_relevant_transcripts(query: str, channel_ids: List[str], limit: int
 
         logger.info(f"Query returned {len(results['matches'])} results")
 
-        relevant_chunks = []
-        for match in results['matches']:
-            chunk_index = int(match['id'].split('_')[-1])
-            video_id = '_'.join(match['id'].split('_')[:-1])
+        relevant_chunks = hydrate_matches(results['matches'], context_window)
+        add_to_semantic_cache(scope, query_embedding, relevant_chunks)
 
-            main_chunk = match['metadata'].get('text', match['metadata'].get('transcript_chunk', ''))
+        logger.info(f"Retrieved {len(relevant_chunks)} relevant chunks")
+        return relevant_chunks
+    except Exception as e:
+        logger.error(f"Error retrieving relevant transcripts: {str(e)}")
+        return []
 
-            context_before = []
-            context_after = []
 
-            for i in range(1, context_window + 1):
-                before_id = f"{video_id}_{chunk_index - i}"
-                after_id = f"{video_id}_{chunk_index + i}"
+def retrieve_relevant_transcripts_batch(queries: List[str], channel_ids: List[str], limit: int = 5, context_window: int = 1) -> List[List[Dict]]:
+    """
+    Answer several queries across several channels at once: one embedding request for all queries,
+    concurrent vector queries, and a single batched context hydration across every hit.
+    """
+    try:
+        if not queries:
+            return []
 
-                before_result = index.fetch(ids=[before_id])
-                after_result = index.fetch(ids=[after_id])
+        logger.info(f"Generating embeddings for {len(queries)} queries")
+        query_embeddings = get_query_embeddings(queries)
 
-                if before_result['vectors']:
-                    context_before.insert(0, before_result['vectors'][before_id]['metadata'].get('text', before_result['vectors'][before_id]['metadata'].get('transcript_chunk', '')))
-                if after_result['vectors']:
-                    context_after.append(after_result['vectors'][after_id]['metadata'].get('text', after_result['vectors'][after_id]['metadata'].get('transcript_chunk', '')))
+        scope = semantic_cache_scope(channel_ids, limit, context_window)
+        results = [lookup_semantic_cache(scope, query_embedding) for query_embedding in query_embeddings]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
 
-            relevant_chunks.append({
-                "main_chunk": main_chunk,
-                "context_before": context_before,
-                "context_after": context_after,
-                "score": match['score']
-            })
+        if channel_ids:
+            existing_channels = get_existing_channels(channel_ids)
+            if not existing_channels:
+                logger.warning(f"None of the provided channel IDs exist in the index: {channel_ids}")
+                return [result or [] for result in results]
+            filter_dict = {"channel_id": {"$in": existing_channels}}
+        else:
+            filter_dict = None
 
-        logger.info(f"Retrieved {len(relevant_chunks)} relevant chunks")
-        return relevant_chunks
+        logger.info(f"Using filter: {filter_dict}")
+
+        def run_query(query_embedding):
+            return index.query(
+                vector=query_embedding,
+                filter=filter_dict,
+                top_k=limit,
+                include_metadata=True
+            )['matches']
+
+        with ThreadPoolExecutor(max_workers=min(len(pending), settings.SEARCH_MAX_CONCURRENCY)) as executor:
+            matches_per_query = list(executor.map(run_query, [query_embeddings[i] for i in pending]))
+
+        hydrated = hydrate_matches([match for matches in matches_per_query for match in matches], context_window)
+
+        offset = 0
+        for i, matches in zip(pending, matches_per_query):
+            results[i] = hydrated[offset:offset + len(matches)]
+            add_to_semantic_cache(scope, query_embeddings[i], results[i])
+            offset += len(matches)
+
+        logger.info(f"Retrieved {offset} relevant chunks for {len(pending)} queries ({len(queries) - len(pending)} served from cache)")
+        return results
     except Exception as e:
-        logger.error(f"Error retrieving relevant transcripts: {str(e)}")
-        return []
+        logger.error(f"Error retrieving relevant transcripts in batch: {str(e)}")
+        return [[] for _ in queries]
 
 
 def retrieve_recent_chunks(channel_id: str, limit: int = 5) -> List[Dict]:
+    """Newest chunks from the channel's recency index, hydrated with one batched fetch and no vector query."""
     try:
-        results = index.query(
-            vector=[0] * 1536,  # Dummy vector
-            filter={"channel_id": {"$eq": channel_id}},
-            top_k=limit,
-            include_metadata=True
-        )
+        chunk_ids = get_recent_chunk_ids(channel_id, limit)
+        texts = fetch_chunk_texts(chunk_ids) if chunk_ids else {}
 
         recent_chunks = []
-        for match in results['matches']:
-            video_id = match['metadata']['video_id']
-            chunk_index = match['metadata']['chunk_index']
-            text = match['metadata'].get('text', match['metadata'].get('transcript_chunk', ''))
+        for vector_id in chunk_ids:
+            if vector_id not in texts:
+                continue
+            video_id, chunk_index = parse_chunk_id(vector_id)
             recent_chunks.append({
                 "video_id": video_id,
                 "channel_id": channel_id,
                 "chunk_index": chunk_index,
-                "text": text
+                "text": texts[vector_id]
             })
 
         logger.info(f"Retrieved {len(recent_chunks)} recent chunks for channel {channel_id}")
@@ -241,7 +465,7 @@ def inspect_index_contents(limit: int = 10):
     try:
         # Fetch a sample of vectors from the index
         sample_query = index.query(
-            vector=[0] * 1536,  # Assuming 1536-dimensional embeddings
+            vector=zero_vector(),
             top_k=limit,
             include_metadata=True
         )
@@ -279,7 +503,7 @@ def inspect_stored_vectors(limit: int = 10):
     try:
         # Fetch a sample of vectors from the index
         sample_query = index.query(
-            vector=[0] * 1536,  # Assuming 1536-dimensional embeddings
+            vector=zero_vector(),
             top_k=limit,
             include_metadata=True
         )
@@ -300,7 +524,7 @@ def inspect_stored_vectors(limit: int = 10):
 def channel_exists_in_index(channel_id: str) -> bool:
     try:
         results = index.query(
-            vector=[0] * 1536,  # Dummy vector
+            vector=zero_vector(),
             filter={"channel_id": {"$eq": channel_id}},
             top_k=1,
             include_metadata=True
@@ -0,0 +1,110 @@
+# app/services/query_cache.py
+import hashlib
+import json
+import logging
+import re
+from array import array
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.core.redis_pool import redis_client
+from app.utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+embedding_lru = LRUCache(max_size=settings.QUERY_EMBEDDING_LRU_SIZE)
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+def _hash(value: str) -> str:
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def embedding_cache_key(query: str) -> str:
+    # Embeddings of another model or size can't be compared with the index, so they never share a key
+    return f"query_embedding:{settings.EMBEDDING_MODEL}:{settings.EMBEDDING_DIMENSIONS}:{_hash(normalize_query(query))}"
+
+
+def get_cached_embedding(query: str) -> Optional[List[float]]:
+    if not settings.QUERY_CACHE_ENABLED:
+        return None
+    cache_key = embedding_cache_key(query)
+    embedding = embedding_lru.get(cache_key)
+    if embedding is not None:
+        return embedding
+    try:
+        cached = redis_client.get(cache_key)
+    except Exception as e:
+        logger.warning(f"Query embedding cache unavailable: {str(e)}")
+        return None
+    if not cached:
+        return None
+    embedding = array('f', cached).tolist()
+    embedding_lru.set(cache_key, embedding)
+    return embedding
+
+
+def cache_embedding(query: str, embedding: List[float]):
+    if not settings.QUERY_CACHE_ENABLED or not embedding:
+        return
+    cache_key = embedding_cache_key(query)
+    embedding_lru.set(cache_key, embedding)
+    try:
+        redis_client.setex(cache_key, settings.QUERY_EMBEDDING_CACHE_TTL, array('f', embedding).tobytes())
+    except Exception as e:
+        logger.warning(f"Failed to cache query embedding: {str(e)}")
+
+
+def bump_channel_version(channel_id: str) -> Optional[int]:
+    """Invalidate every cached result that covers this channel by advancing its data version."""
+    try:
+        version = redis_client.incr(f"channel_version:{channel_id}")
+        logger.info(f"Channel {channel_id} data version is now {version}")
+        return version
+    except Exception as e:
+        logger.warning(f"Failed to bump data version for channel {channel_id}: {str(e)}")
+        return None
+
+
+def get_channel_versions(channel_ids: List[str]) -> List[int]:
+    versions = redis_client.mget([f"channel_version:{channel_id}" for channel_id in channel_ids])
+    return [int(version) if version else 0 for version in versions]
+
+
+def relevant_chunks_cache_key(query: str, channel_ids: List[str], limit: int, context_window: int) -> Optional[str]:
+    if not settings.QUERY_CACHE_ENABLED:
+        return None
+    channels = sorted(set(channel_ids))
+    try:
+        versions = get_channel_versions(channels)
+    except Exception as e:
+        logger.warning(f"Channel versions unavailable, skipping result cache: {str(e)}")
+        return None
+    fingerprint = json.dumps([normalize_query(query), channels, versions, limit, context_window])
+    return f"relevant_chunks:{_hash(fingerprint)}"
+
+
+def get_cached_result(cache_key: Optional[str]) -> Optional[List[Dict]]:
+    if not cache_key:
+        return None
+    try:
+        cached = redis_client.get(cache_key)
+    except Exception as e:
+        logger.warning(f"Result cache unavailable: {str(e)}")
+        return None
+    if cached:
+        logger.info(f"Result cache hit for {cache_key}")
+        return json.loads(cached)
+    return None
+
+
+def cache_result(cache_key: Optional[str], result: List[Dict]):
+    # Empty results are not cached: the retrieval layer also returns [] on errors
+    if not cache_key or not result:
+        return
+    try:
+        redis_client.setex(cache_key, settings.QUERY_RESULT_CACHE_TTL, json.dumps(result))
+    except Exception as e:
+        logger.warning(f"Failed to cache result for {cache_key}: {str(e)}")
@@ -0,0 +1,105 @@
+# app/services/quota_service.py
+import logging
+from datetime import datetime, timedelta
+from typing import Dict
+from urllib.parse import urlparse
+from zoneinfo import ZoneInfo
+from app.core.config import settings
+from app.core.redis_pool import redis_client
+
+logger = logging.getLogger(__name__)
+
+# YouTube Data API v3 unit costs per request
+UNIT_COSTS = {
+    "search": 100,
+    "channels": 1,
+    "videos": 1,
+    "playlistItems": 1,
+}
+
+PRIORITY_HIGH = "high"
+PRIORITY_NORMAL = "normal"
+PRIORITY_LOW = "low"
+
+# Quota resets at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+# Atomically admit a request if the priority's share of the budget allows it
+ADMIT_SCRIPT = """
+local used = tonumber(redis.call('get', KEYS[1]) or '0')
+local cost = tonumber(ARGV[1])
+if used + cost > tonumber(ARGV[2]) then
+    return -1
+end
+used = redis.call('incrby', KEYS[1], cost)
+redis.call('expire', KEYS[1], ARGV[3])
+redis.call('hincrby', KEYS[2], ARGV[4], cost)
+redis.call('expire', KEYS[2], ARGV[3])
+return used
+"""
+
+
+class QuotaExceededError(Exception):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def priority_limits() -> Dict[str, int]:
+    """How much of the daily budget each priority may draw on; the rest is held back for more important work."""
+    quota = settings.YOUTUBE_DAILY_QUOTA
+    return {
+        PRIORITY_HIGH: quota,
+        PRIORITY_NORMAL: int(quota * (1 - settings.YOUTUBE_QUOTA_HIGH_RESERVE)),
+        PRIORITY_LOW: int(quota * (1 - settings.YOUTUBE_QUOTA_HIGH_RESERVE - settings.YOUTUBE_QUOTA_NORMAL_RESERVE)),
+    }
+
+
+def quota_window(now: datetime = None):
+    """Return the current quota day (Pacific) and the number of seconds until it resets."""
+    now = (now or datetime.now(tz=QUOTA_TIMEZONE)).astimezone(QUOTA_TIMEZONE)
+    next_midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=QUOTA_TIMEZONE)
+    return now.date().isoformat(), max(1, int((next_midnight - now).total_seconds()))
+
+
+def endpoint_for_url(url: str) -> str:
+    return urlparse(url).path.rstrip('/').rsplit('/', 1)[-1]
+
+
+def admit(endpoint: str, priority: str = PRIORITY_NORMAL) -> int:
+    """Charge an API call against today's budget, or raise QuotaExceededError if its priority may not spend more."""
+    cost = UNIT_COSTS.get(endpoint, 1)
+    day, resets_in = quota_window()
+    limit = priority_limits().get(priority, priority_limits()[PRIORITY_NORMAL])
+    used = redis_client.eval(
+        ADMIT_SCRIPT, 2, f"youtube_quota:{day}", f"youtube_quota:{day}:endpoints",
+        cost, limit, resets_in + 3600, endpoint
+    )
+    if used == -1:
+        logger.warning(f"YouTube quota denied for {endpoint} ({cost} units) at {priority} priority")
+        raise QuotaExceededError(f"YouTube API quota exhausted for {priority} priority requests", retry_after=resets_in)
+    return used
+
+
+def record_quota_exhausted():
+    """YouTube reported quotaExceeded: mark today's budget as spent so every worker defers until the reset."""
+    day, resets_in = quota_window()
+    redis_client.set(f"youtube_quota:{day}", settings.YOUTUBE_DAILY_QUOTA, ex=resets_in + 3600)
+    logger.error("YouTube API reported quotaExceeded; marking today's quota as exhausted")
+
+
+def get_quota_status() -> Dict:
+    day, resets_in = quota_window()
+    used = int(redis_client.get(f"youtube_quota:{day}") or 0)
+    by_endpoint = redis_client.hgetall(f"youtube_quota:{day}:endpoints") or {}
+    return {
+        'day': day,
+        'used': used,
+        'limit': settings.YOUTUBE_DAILY_QUOTA,
+        'remaining': max(0, settings.YOUTUBE_DAILY_QUOTA - used),
+        'remaining_by_priority': {priority: max(0, limit - used) for priority, limit in priority_limits().items()},
+        'used_by_endpoint': {
+            (key.decode('utf-8') if isinstance(key, bytes) else key): int(value) for key, value in by_endpoint.items()
+        },
+        'resets_in_seconds': resets_in,
+    }
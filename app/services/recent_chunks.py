@@ -0,0 +1,63 @@
+# app/services/recent_chunks.py
+import logging
+from typing import List, Optional, Tuple
+from app.core.config import settings
+from app.core.redis_pool import redis_client
+from app.services.video_listing import get_video_metadata
+
+logger = logging.getLogger(__name__)
+
+# Scores pack publish minute, rank among videos published that minute, then chunk index; each field gets this many slots
+PUBLISHED_RANK_SLOTS = 10000
+CHUNK_INDEX_SLOTS = 10000
+
+
+def recent_chunks_key(channel_id: str) -> str:
+    # Sorted set of vector IDs scored by publish time, then listing order, then chunk index
+    return f"recent_chunks:{channel_id}"
+
+
+def chunk_score(published_at: float, chunk_index: int, published_rank: int = 0) -> int:
+    # Minutes * 1e8 stays below 2**53 until 2140, so scores are exact as Redis doubles
+    minute = int(published_at // 60)
+    return (minute * PUBLISHED_RANK_SLOTS + min(published_rank, PUBLISHED_RANK_SLOTS - 1)) * CHUNK_INDEX_SLOTS + chunk_index
+
+
+def video_publish_order(channel_id: str, video_id: str) -> Tuple[float, int]:
+    """
+    Publish time and rank from the channel's video listing. Videos we never listed sort below every listed one,
+    rather than above videos that really are newer.
+    """
+    try:
+        entry = get_video_metadata(channel_id, [video_id]).get(video_id)
+    except Exception as e:
+        logger.error(f"Error reading listing metadata for video {video_id}: {str(e)}")
+        entry = None
+    if not entry or entry.get('published_at') is None:
+        return 0, 0
+    return entry['published_at'], entry.get('published_rank', 0)
+
+
+def record_recent_chunks(channel_id: str, video_id: str, start: int, end: int, published_at: Optional[float] = None, published_rank: int = 0):
+    """Adds chunks [start, end) of a stored video to the channel's recency index, keeping the newest entries."""
+    if end <= start:
+        return
+    try:
+        if published_at is None:
+            published_at, published_rank = video_publish_order(channel_id, video_id)
+        key = recent_chunks_key(channel_id)
+        pipeline = redis_client.pipeline(transaction=False)
+        pipeline.zadd(key, {f"{video_id}_{i}": chunk_score(published_at, i, published_rank) for i in range(start, end)})
+        pipeline.zremrangebyrank(key, 0, -settings.RECENT_CHUNKS_PER_CHANNEL - 1)
+        pipeline.execute()
+    except Exception as e:
+        # The vectors are stored either way; only /recent_chunks misses them
+        logger.error(f"Error indexing recent chunks for video {video_id}: {str(e)}")
+
+
+def get_recent_chunk_ids(channel_id: str, limit: int) -> List[str]:
+    """Vector IDs of the channel's newest chunks: latest video first, later chunks of a video first."""
+    if limit <= 0:
+        return []
+    ids = redis_client.zrevrange(recent_chunks_key(channel_id), 0, limit - 1)
+    return [vector_id.decode('utf-8') if isinstance(vector_id, bytes) else vector_id for vector_id in ids]
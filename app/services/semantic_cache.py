@@ -0,0 +1,126 @@
+# app/services/semantic_cache.py
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.services.query_cache import get_channel_versions
+from app.utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingRingBuffer:
+    """Fixed-size ring of unit-normalised query embeddings and the results they produced."""
+
+    def __init__(self, capacity: int, dimensions: int):
+        self.vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+        self.results: List[Optional[List[Dict]]] = [None] * capacity
+        self.size = 0
+        self.position = 0
+
+    def add(self, vector: np.ndarray, result: List[Dict]):
+        self.vectors[self.position] = vector
+        self.results[self.position] = result
+        self.position = (self.position + 1) % len(self.results)
+        self.size = min(self.size + 1, len(self.results))
+
+    def nearest(self, vector: np.ndarray) -> Tuple[float, Optional[List[Dict]]]:
+        if self.size == 0:
+            return -1.0, None
+        similarities = self.vectors[:self.size] @ vector
+        best = int(np.argmax(similarities))
+        return float(similarities[best]), self.results[best]
+
+
+class SemanticCache:
+    """
+    Serves results for paraphrased queries: a new query embedding within the cosine threshold of a
+    recently answered one, for the same channels and parameters, reuses that answer.
+    """
+
+    def __init__(self, capacity: int, threshold: float, max_scopes: int):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.buffers = LRUCache(max_size=max_scopes)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def lookup(self, scope: Tuple, embedding: List[float]) -> Optional[List[Dict]]:
+        vector = self._normalize(embedding)
+        with self._lock:
+            buffer = self.buffers.get(scope)
+            similarity, result = buffer.nearest(vector) if buffer is not None and vector is not None else (-1.0, None)
+            if result is not None and similarity >= self.threshold:
+                self.hits += 1
+                logger.info(f"Semantic cache hit (similarity {similarity:.4f})")
+                return result
+            self.misses += 1
+            return None
+
+    def add(self, scope: Tuple, embedding: List[float], result: List[Dict]):
+        vector = self._normalize(embedding)
+        if vector is None or not result:
+            return
+        with self._lock:
+            buffer = self.buffers.get(scope)
+            if buffer is None or buffer.vectors.shape[1] != vector.shape[0]:
+                buffer = EmbeddingRingBuffer(self.capacity, vector.shape[0])
+            buffer.add(vector, result)
+            self.buffers.set(scope, buffer)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'scopes': len(self.buffers),
+                'threshold': self.threshold
+            }
+
+    def clear(self):
+        with self._lock:
+            self.buffers.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+semantic_cache = SemanticCache(
+    capacity=settings.SEMANTIC_CACHE_SIZE,
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    max_scopes=settings.SEMANTIC_CACHE_MAX_SCOPES
+)
+
+
+def semantic_cache_scope(channel_ids: List[str], limit: int, context_window: int) -> Optional[Tuple]:
+    """Scope cached answers by channel set, parameters and channel data versions, so ingestion invalidates them."""
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return None
+    channels = tuple(sorted(set(channel_ids)))
+    try:
+        versions = tuple(get_channel_versions(list(channels))) if channels else ()
+    except Exception as e:
+        logger.warning(f"Channel versions unavailable, skipping semantic cache: {str(e)}")
+        return None
+    return channels, versions, limit, context_window
+
+
+def lookup_semantic_cache(scope: Optional[Tuple], embedding: List[float]) -> Optional[List[Dict]]:
+    if scope is None:
+        return None
+    return semantic_cache.lookup(scope, embedding)
+
+
+def add_to_semantic_cache(scope: Optional[Tuple], embedding: List[float], result: List[Dict]):
+    if scope is None:
+        return
+    semantic_cache.add(scope, embedding, result)
@@ -0,0 +1,69 @@
+# app/services/transcript_failure_cache.py
+import json
+import logging
+import time
+from typing import Dict, Optional
+from app.core.config import settings
+from app.core.redis_pool import redis_client
+from app.utils.retry_policy import is_missing_transcript, unwrap_error
+
+logger = logging.getLogger(__name__)
+
+FAILURE_PERMANENT = "permanent"
+FAILURE_TRANSIENT = "transient"
+
+
+def failure_key(video_id: str) -> str:
+    return f"transcript_unavailable:{video_id}"
+
+
+def channel_failures_key(channel_id: str, failure_class: str) -> str:
+    # Sorted set of video IDs scored by expiry, so counts drop as entries expire
+    return f"transcript_unavailable:channel:{channel_id}:{failure_class}"
+
+
+def record_transcript_failure(video_id: str, channel_id: str, error: Optional[Exception] = None):
+    """
+    Remembers that fetching the video's transcript failed. Disabled or missing captions are cached for
+    TRANSCRIPT_FAILURE_PERMANENT_TTL; anything else (blocked requests, timeouts) for TRANSCRIPT_FAILURE_TRANSIENT_TTL.
+    error=None means the fetch succeeded but the transcript was empty.
+    """
+    if error is None or is_missing_transcript(error):
+        failure_class, ttl = FAILURE_PERMANENT, settings.TRANSCRIPT_FAILURE_PERMANENT_TTL
+    else:
+        failure_class, ttl = FAILURE_TRANSIENT, settings.TRANSCRIPT_FAILURE_TRANSIENT_TTL
+    reason = type(unwrap_error(error)).__name__ if error is not None else "EmptyTranscript"
+    now = time.time()
+    entry = {
+        'video_id': video_id,
+        'channel_id': channel_id,
+        'reason': reason,
+        'failure_class': failure_class,
+        'error': str(error) if error is not None else None,
+        'failed_at': now,
+    }
+
+    pipeline = redis_client.pipeline()
+    pipeline.set(failure_key(video_id), json.dumps(entry), ex=ttl)
+    for cls in (FAILURE_PERMANENT, FAILURE_TRANSIENT):
+        key = channel_failures_key(channel_id, cls)
+        pipeline.zremrangebyscore(key, '-inf', now)
+        if cls != failure_class:
+            pipeline.zrem(key, video_id)
+    pipeline.zadd(channel_failures_key(channel_id, failure_class), {video_id: now + ttl})
+    pipeline.expire(channel_failures_key(channel_id, failure_class), settings.TRANSCRIPT_FAILURE_PERMANENT_TTL)
+    pipeline.execute()
+    logger.info(f"Cached {failure_class} transcript failure for video {video_id} ({reason}) for {ttl}s")
+
+
+def get_transcript_failure(video_id: str) -> Optional[Dict]:
+    entry = redis_client.get(failure_key(video_id))
+    return json.loads(entry) if entry else None
+
+
+def get_transcript_failure_counts(channel_id: str) -> Dict[str, int]:
+    now = time.time()
+    return {
+        cls: int(redis_client.zcount(channel_failures_key(channel_id, cls), now, '+inf'))
+        for cls in (FAILURE_PERMANENT, FAILURE_TRANSIENT)
+    }
@@ -1,10 +1,19 @@
 # app/services/transcript_processor.py
+import json
 import logging
 from celery import shared_task, Task
 from app.services.pinecone_service import store_embeddings
 from app.utils.embedding_utils import generate_embeddings
+from app.utils.retry_policy import classify_error, backoff_delay, PERMANENT
+from app.services.dead_letter_service import add_dead_letter
+from app.services.payload_store import put_payload, get_payload, release_payload
+from app.services.job_service import (
+    set_video_status, mark_video_embedding, clear_video_embedding, finish_job_if_complete, start_chunk_ranges, finish_chunk_range,
+    clear_chunk_ranges, VIDEO_DONE, VIDEO_FAILED
+)
 from app.core.config import settings
-from typing import List, Union
+from app.core.redis_pool import redis_client
+from typing import List, Optional, Union
 import tiktoken
 import openai
 
@@ -13,23 +22,146 @@ logger = logging.getLogger(__name__)
 openai.api_key = settings.OPENAI_API_KEY
 
 
-@shared_task(bind=True)
-def process_transcript(self_or_task: Union[Task, str], channel_id: str, video_id: str, transcript: str):
+@shared_task(bind=True, ignore_result=True)
+def process_transcript(self_or_task: Union[Task, str], channel_id: str, video_id: str, transcript: Optional[str] = None, payload_key: Optional[str] = None,
+                       chunked: bool = False):
+    """
+    Takes the transcript inline or, preferably, as a payload_key from put_payload so the broker message stays small.
+    With chunked=True the payload is the JSON chunk list chunk_transcript already split, so it isn't tokenized again.
+    """
     try:
-        chunks = split_into_chunks(transcript)
+        if payload_key:
+            transcript = get_payload(payload_key)
+            if transcript is None:
+                raise ValueError(f"Transcript payload {payload_key} for video {video_id} has expired")
+        chunks = json.loads(transcript) if chunked else split_into_chunks(transcript)
         task = self_or_task if isinstance(self_or_task, Task) else None
+        if task is not None and not task.request.called_directly and len(chunks) > settings.PARALLEL_EMBEDDING_CHUNK_THRESHOLD:
+            ranges = dispatch_chunk_ranges(channel_id, video_id, chunks)
+            if payload_key:
+                release_payload(payload_key)
+            return {'status': 'dispatched', 'video_id': video_id, 'ranges': ranges}
         embeddings = generate_embeddings(chunks, task=task)
         store_embeddings(channel_id, video_id, chunks, embeddings)
-        if isinstance(self_or_task, Task):
-            self_or_task.update_state(state='SUCCESS', meta={'video_id': video_id})
+        if payload_key:
+            release_payload(payload_key)
         return {'status': 'success', 'video_id': video_id}
     except Exception as e:
         logger.error(f"Error processing transcript for video {video_id}: {str(e)}")
-        if isinstance(self_or_task, Task):
-            self_or_task.update_state(state='FAILURE', meta={'video_id': video_id, 'error': str(e)})
+        if isinstance(self_or_task, Task) and not self_or_task.request.called_directly:
+            # Inside a worker: retry recoverable errors with backoff, dead-letter the rest
+            error_class = classify_error(e)
+            attempt = self_or_task.request.retries + 1
+            if error_class != PERMANENT and attempt < settings.VIDEO_MAX_ATTEMPTS:
+                countdown = backoff_delay(attempt, error_class, settings.VIDEO_RETRY_BASE_DELAY, settings.VIDEO_RETRY_MAX_DELAY)
+                raise self_or_task.retry(exc=e, countdown=countdown, max_retries=None)
+            add_dead_letter(video_id, channel_id, str(e), error_class, attempt)
+        # Retries keep the payload; any other outcome is final
+        if payload_key:
+            release_payload(payload_key)
         return {'status': 'failure', 'video_id': video_id, 'error': str(e)}
 
 
+@shared_task(bind=True, ignore_result=True)
+def chunk_transcript(self, channel_id: str, video_id: str, payload_key: str):
+    """
+    Splits a fetched transcript into chunks. This is the only CPU-bound step between fetching (video-queue) and
+    embedding (transcript-queue), so it runs on chunk-queue's prefork pool while the I/O queues run on threads.
+    Videos above PARALLEL_EMBEDDING_CHUNK_THRESHOLD chunks are handed to embed_chunk_range subtasks; shorter ones go
+    to a single process_transcript task, since splitting costs more than it saves for them.
+    """
+    try:
+        transcript = get_payload(payload_key)
+        if transcript is None:
+            raise ValueError(f"Transcript payload {payload_key} for video {video_id} has expired")
+        chunks = split_into_chunks(transcript)
+        if len(chunks) > settings.PARALLEL_EMBEDDING_CHUNK_THRESHOLD:
+            dispatch_chunk_ranges(channel_id, video_id, chunks)
+        else:
+            chunks_key = put_payload(json.dumps(chunks))
+            try:
+                process_transcript.delay(channel_id, video_id, payload_key=chunks_key, chunked=True)
+            except Exception:
+                release_payload(chunks_key)
+                raise
+    except Exception as e:
+        logger.error(f"Error chunking transcript for video {video_id}: {str(e)}")
+        error_class = classify_error(e)
+        attempt = self.request.retries + 1
+        if not self.request.called_directly and error_class != PERMANENT and attempt < settings.VIDEO_MAX_ATTEMPTS:
+            countdown = backoff_delay(attempt, error_class, settings.VIDEO_RETRY_BASE_DELAY, settings.VIDEO_RETRY_MAX_DELAY)
+            raise self.retry(exc=e, countdown=countdown, max_retries=None)
+        add_dead_letter(video_id, channel_id, str(e), error_class, attempt)
+    release_payload(payload_key)
+
+
+def dispatch_chunk_ranges(channel_id: str, video_id: str, chunks: List[str], job_id: Optional[str] = None, start_index: int = 0) -> int:
+    """
+    Embeds a video's chunks from start_index onwards as CHUNK_RANGE_SIZE subtasks, so long videos are spread over
+    every free worker. Vector IDs depend only on the chunk index, so a retried range overwrites its own vectors.
+    The outstanding ranges are counted in Redis rather than by a chord, so nothing has to outlive result_expires; the
+    last one to be stored calls finalize_chunked_video. Until then the video carries an embedding marker, so other
+    jobs skip it even though its first chunks are already in the index. Returns the number of ranges.
+    """
+    key = put_payload(json.dumps(chunks))
+    starts = list(range(start_index, len(chunks), settings.CHUNK_RANGE_SIZE))
+    # Set before dispatching so a fast last range clears them rather than the other way round
+    mark_video_embedding(video_id, job_id)
+    start_chunk_ranges(video_id, starts)
+    try:
+        for start in starts:
+            embed_chunk_range.delay(channel_id, video_id, key, start, min(start + settings.CHUNK_RANGE_SIZE, len(chunks)), job_id)
+    except Exception:
+        clear_video_embedding(video_id)
+        clear_chunk_ranges(video_id)
+        release_payload(key)
+        raise
+    logger.info(f"Split video {video_id} into {len(starts)} chunk ranges ({len(chunks) - start_index} chunks)")
+    return len(starts)
+
+
+@shared_task(bind=True, ignore_result=True)
+def embed_chunk_range(self, channel_id: str, video_id: str, payload_key: str, start: int, end: int, job_id: Optional[str] = None) -> int:
+    try:
+        chunks = get_payload(payload_key)
+        if chunks is None:
+            raise ValueError(f"Chunk payload {payload_key} for video {video_id} has expired")
+        chunks = json.loads(chunks)[start:end]
+        embeddings = generate_embeddings(chunks, task=self)
+        store_embeddings(channel_id, video_id, chunks, embeddings, start_index=start)
+    except Exception as e:
+        logger.error(f"Error embedding chunks {start}-{end} of video {video_id}: {str(e)}")
+        error_class = classify_error(e)
+        attempt = self.request.retries + 1
+        if not self.request.called_directly and error_class != PERMANENT and attempt < settings.VIDEO_MAX_ATTEMPTS:
+            countdown = backoff_delay(attempt, error_class, settings.VIDEO_RETRY_BASE_DELAY, settings.VIDEO_RETRY_MAX_DELAY)
+            raise self.retry(exc=e, countdown=countdown, max_retries=None)
+        # The video can never be finalized once a range gives up, so it is dead-lettered and released here
+        add_dead_letter(video_id, channel_id, str(e), error_class, attempt, job_id)
+        clear_video_embedding(video_id)
+        clear_chunk_ranges(video_id)
+        if job_id:
+            set_video_status(job_id, video_id, VIDEO_FAILED)
+            finish_job_if_complete(job_id, channel_id)
+        raise
+    if finish_chunk_range(video_id, start):
+        finalize_chunked_video(channel_id, video_id, payload_key, job_id)
+    return len(chunks)
+
+
+def finalize_chunked_video(channel_id: str, video_id: str, payload_key: str, job_id: Optional[str] = None):
+    """Run by the last chunk range of a long video to be stored: marks the video processed and lets its job finish."""
+    release_payload(payload_key)
+    redis_client.set(f"processed:{video_id}", "1")
+    # Done before the marker goes, so check_job_completion never mistakes a finished video for a lost one
+    if job_id:
+        set_video_status(job_id, video_id, VIDEO_DONE)
+    clear_video_embedding(video_id)
+    if job_id:
+        finish_job_if_complete(job_id, channel_id)
+    logger.info(f"Embeddings stored for video {video_id}")
+
+
 def split_into_chunks(text: str, max_tokens: int = settings.CHUNK_SIZE) -> List[str]:
     encoding = tiktoken.get_encoding("cl100k_base")
     tokens = encoding.encode(text)
@@ -0,0 +1,179 @@
+# app/services/video_listing.py
+import json
+import logging
+import re
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+from app.core.config import settings
+from app.core.redis_pool import redis_client
+from app.utils.redis_lock import RedisLease
+
+logger = logging.getLogger(__name__)
+
+RELATIVE_TIME_PATTERN = re.compile(r"(\d+)\s+(second|minute|hour|day|week|month|year)s?\s+ago")
+RELATIVE_TIME_UNITS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400,
+    'week': 7 * 86400,
+    'month': 30 * 86400,
+    'year': 365 * 86400,
+}
+
+
+def listing_key(channel_id: str) -> str:
+    # Video IDs, newest first
+    return f"video_list:{channel_id}"
+
+
+def listing_metadata_key(channel_id: str) -> str:
+    return f"video_list:{channel_id}:metadata"
+
+
+def listing_state_key(channel_id: str) -> str:
+    return f"video_list:{channel_id}:state"
+
+
+def _decode(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def _text(field) -> Optional[str]:
+    if not field:
+        return None
+    if 'simpleText' in field:
+        return field['simpleText']
+    return "".join(run.get('text', '') for run in field.get('runs', [])) or None
+
+
+def parse_relative_time(text: Optional[str], now: float) -> Optional[float]:
+    """scrapetube only gives "3 weeks ago"-style publish times; turn them into an approximate timestamp."""
+    if not text:
+        return None
+    match = RELATIVE_TIME_PATTERN.search(text)
+    if not match:
+        return None
+    return now - int(match.group(1)) * RELATIVE_TIME_UNITS[match.group(2)]
+
+
+def video_entry(video: Dict, now: float) -> Dict:
+    published_text = _text(video.get('publishedTimeText'))
+    return {
+        'video_id': video['videoId'],
+        'title': _text(video.get('title')),
+        'published_text': published_text,
+        'published_at': parse_relative_time(published_text, now),
+        'length_text': _text(video.get('lengthText')),
+        'listed_at': now,
+    }
+
+
+def store_listing(channel_id: str, head: List[Dict], tail: List[Dict], replace: bool, complete: bool):
+    now = time.time()
+    entries = [video_entry(video, now) for video in head + tail]
+    # Videos showing the same "3 weeks ago" get the same published_at; rank them oldest first to keep listing order
+    ranks = {}
+    for entry in reversed(entries):
+        entry['published_rank'] = ranks.get(entry['published_text'], 0)
+        ranks[entry['published_text']] = entry['published_rank'] + 1
+    pipeline = redis_client.pipeline()
+    if replace:
+        pipeline.delete(listing_key(channel_id), listing_metadata_key(channel_id))
+    if head:
+        # LPUSH reverses its arguments, so push oldest first to keep the list newest first
+        pipeline.lpush(listing_key(channel_id), *[video['videoId'] for video in reversed(head)])
+    if tail:
+        pipeline.rpush(listing_key(channel_id), *[video['videoId'] for video in tail])
+    if entries:
+        pipeline.hset(listing_metadata_key(channel_id), mapping={entry['video_id']: json.dumps(entry) for entry in entries})
+    pipeline.hset(listing_state_key(channel_id), mapping={'refreshed_at': now, 'complete': int(complete)})
+    for key in (listing_key(channel_id), listing_metadata_key(channel_id), listing_state_key(channel_id)):
+        pipeline.expire(key, settings.VIDEO_LISTING_TTL)
+    pipeline.execute()
+
+
+def refresh_listing(scraper, channel_id: str, needed: Optional[int] = None):
+    """
+    Brings the cached listing up to date and makes it at least `needed` videos long (None means the whole channel).
+    scrapetube pages from the newest video, so a refresh stops at the first video we already know, which is
+    normally on the first page. Growing the listing pages past the known videos and appends the older ones.
+    """
+    state = {_decode(key): _decode(value) for key, value in redis_client.hgetall(listing_state_key(channel_id)).items()}
+    count = redis_client.llen(listing_key(channel_id))
+    complete = state.get('complete') == '1'
+    fresh = time.time() - float(state.get('refreshed_at', 0)) < settings.VIDEO_LISTING_REFRESH_INTERVAL
+    long_enough = complete or (needed is not None and count >= needed)
+    if fresh and long_enough:
+        return
+
+    lease = RedisLease(redis_client, f"lock:{listing_key(channel_id)}", settings.VIDEO_LISTING_LOCK_TTL)
+    if not lease.acquire():
+        logger.info(f"Video listing for {channel_id} is being refreshed elsewhere, using cached listing")
+        return
+    try:
+        known_head = _decode(redis_client.lindex(listing_key(channel_id), 0)) if count else None
+        videos = scraper.iter_channel_videos()
+        head, tail = [], []
+        found_head = exhausted = False
+
+        for video in videos:
+            if video['videoId'] == known_head:
+                found_head = True
+                break
+            head.append(video)
+            if known_head is None and needed is not None and len(head) >= needed:
+                break
+        else:
+            exhausted = True
+
+        if known_head is not None and not found_head:
+            # The newest known video is gone (deleted or made private), so start the listing over
+            logger.info(f"Rebuilding video listing for {channel_id}")
+            store_listing(channel_id, head, [], replace=True, complete=exhausted)
+            return
+        if known_head is None:
+            store_listing(channel_id, head, [], replace=True, complete=exhausted)
+            return
+
+        total = count + len(head)
+        if not complete and (needed is None or total < needed):
+            skipped = 1  # the known head
+            for video in videos:
+                if skipped < count:
+                    skipped += 1
+                    continue
+                tail.append(video)
+                if needed is not None and total + len(tail) >= needed:
+                    break
+            else:
+                complete = True
+        logger.info(f"Video listing for {channel_id}: {len(head)} new, {len(tail)} older, {total + len(tail)} total")
+        store_listing(channel_id, head, tail, replace=False, complete=complete)
+    finally:
+        lease.release()
+
+
+def iter_video_ids(scraper, channel_id: str, offset: int = 0, limit: Optional[int] = None) -> Iterator[str]:
+    """Yields the channel's video IDs, newest first, reading the cached listing a page at a time."""
+    end = offset + limit if limit is not None else None
+    refresh_listing(scraper, channel_id, end)
+    position = offset
+    while end is None or position < end:
+        stop = position + settings.VIDEO_LISTING_PAGE_SIZE - 1
+        if end is not None:
+            stop = min(stop, end - 1)
+        page = redis_client.lrange(listing_key(channel_id), position, stop)
+        if not page:
+            return
+        for video_id in page:
+            yield _decode(video_id)
+        position += len(page)
+
+
+def get_video_metadata(channel_id: str, video_ids: Iterable[str]) -> Dict[str, Dict]:
+    video_ids = list(video_ids)
+    if not video_ids:
+        return {}
+    entries = redis_client.hmget(listing_metadata_key(channel_id), video_ids)
+    return {video_id: json.loads(entry) for video_id, entry in zip(video_ids, entries) if entry}
@@ -1,5 +1,28 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator, Optional, Tuple, Union
 import scrapetube
 from youtube_transcript_api import YouTubeTranscriptApi
+from app.services import video_listing
+from app.utils.retry_policy import classify_error, backoff_delay, PERMANENT
+
+logger = logging.getLogger(__name__)
+
+# Every transcript request goes to YouTube's watch and timedtext endpoints
+TRANSCRIPT_HOST = "www.youtube.com"
+
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+
+def host_semaphore(host: str, limit: int) -> threading.BoundedSemaphore:
+    """One semaphore per host and process, so concurrent scrapers share the same per-host limit."""
+    with _host_semaphores_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(limit)
+        return _host_semaphores[host]
 
 
 class YoutubeScraper:
@@ -7,30 +30,91 @@ class YoutubeScraper:
         self.channel_id = channel_id
         self.video_ids = []
 
-    def get_video_ids(self, limit: int = 20):
-        videos = scrapetube.get_channel(channel_id=self.channel_id)
-        cnt = 0
-        for video in videos:
-            self.video_ids.append(video["videoId"])
-            cnt += 1
-            if cnt >= limit:
-                break
+    def iter_channel_videos(self, limit: Optional[int] = None) -> Iterator[dict]:
+        """Raw scrapetube entries, newest first; scrapetube fetches further pages lazily as the generator advances."""
+        return scrapetube.get_channel(channel_id=self.channel_id, limit=limit)
+
+    def iter_video_ids(self, offset: int = 0, limit: Optional[int] = None) -> Iterator[str]:
+        """Pages through the channel's cached video listing without loading it all into memory."""
+        return video_listing.iter_video_ids(self, self.channel_id, offset=offset, limit=limit)
+
+    def get_video_ids(self, limit: int = 20, offset: int = 0):
+        self.video_ids = list(self.iter_video_ids(offset=offset, limit=limit))
         return self.video_ids
 
-    def __get_video_transcript_util(self, video_id: str):
+    def __get_video_transcript_util(self, video_id: str, raise_errors: bool = False):
         try:
             raw_transcript = YouTubeTranscriptApi.get_transcript(video_id)
             transcript = " ".join([t["text"] for t in raw_transcript])
             return transcript
         except Exception as e:
-            print(f"Could not get transcript for video {video_id}: {str(e)}")
+            if raise_errors:
+                raise
+            logger.warning(f"Could not get transcript for video {video_id}: {str(e)}")
             return None  # Handle the error as needed
 
-    def get_video_transcript(self, video_id: str = None):
+    def get_video_transcript(self, video_id: str = None, raise_errors: bool = False, per_host_limit: Optional[int] = None):
+        """
+        With raise_errors, failures propagate so callers can tell a missing transcript from a blocked request.
+        per_host_limit makes the fetch take a slot of the process-wide YouTube limit, which matters on thread-pool
+        workers where many tasks fetch at once.
+        """
         if video_id is not None:
-            return self.__get_video_transcript_util(video_id)
-        transcripts = {}
-        for v_id in self.video_ids:
-            transcript = self.__get_video_transcript_util(v_id)
-            transcripts[v_id] = transcript
-        return transcripts
+            if per_host_limit:
+                with host_semaphore(TRANSCRIPT_HOST, per_host_limit):
+                    return self.__get_video_transcript_util(video_id, raise_errors)
+            return self.__get_video_transcript_util(video_id, raise_errors)
+        return dict(self.iter_video_transcripts())
+
+    def __fetch_with_retries(self, video_id: str, per_host_limit: int, max_attempts: int, base_delay: float, max_delay: float):
+        semaphore = host_semaphore(TRANSCRIPT_HOST, per_host_limit)
+        for attempt in range(1, max_attempts + 1):
+            try:
+                with semaphore:
+                    return self.__get_video_transcript_util(video_id, raise_errors=True)
+            except Exception as e:
+                error_class = classify_error(e)
+                if error_class == PERMANENT or attempt == max_attempts:
+                    raise
+                delay = backoff_delay(attempt, error_class, base_delay, max_delay)
+                logger.info(f"Transcript fetch for {video_id} failed ({error_class}), retrying in {delay:.1f}s: {str(e)}")
+                # Sleep outside the semaphore so backing-off fetches don't hold a host slot
+                time.sleep(delay)
+
+    def iter_video_transcripts(
+        self,
+        video_ids: Optional[Iterable[str]] = None,
+        max_workers: int = 8,
+        per_host_limit: int = 4,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        return_exceptions: bool = False
+    ) -> Iterator[Tuple[str, Union[Optional[str], Exception]]]:
+        """
+        Fetches transcripts concurrently and yields (video_id, transcript) as each one finishes, in completion order.
+        Transient and rate-limit failures are retried with jittered backoff. A video that still fails yields None,
+        or the exception itself when return_exceptions is set.
+        """
+        video_ids = list(self.video_ids if video_ids is None else video_ids)
+        if not video_ids:
+            return
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(video_ids)))
+        try:
+            futures = {
+                executor.submit(self.__fetch_with_retries, video_id, per_host_limit, max_attempts, base_delay, max_delay): video_id
+                for video_id in video_ids
+            }
+            for future in as_completed(futures):
+                video_id = futures[future]
+                try:
+                    yield video_id, future.result()
+                except Exception as e:
+                    if return_exceptions:
+                        yield video_id, e
+                    else:
+                        logger.warning(f"Could not get transcript for video {video_id}: {str(e)}")
+                        yield video_id, None
+        finally:
+            # Stop pending fetches if the caller stops consuming early
+            executor.shutdown(wait=False, cancel_futures=True)
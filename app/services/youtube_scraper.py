@@ -1,60 +1,331 @@
 # app/services/youtube_scraper.py
 import logging
+from functools import partial
 from app.services.youtube_channel_scraper import YoutubeScraper
-from app.services.transcript_processor import process_transcript, split_into_chunks
+from app.services.transcript_processor import chunk_transcript, split_into_chunks, dispatch_chunk_ranges
 from app.utils.embedding_utils import generate_embeddings
 from app.core.config import settings
-import redis
 from app.services.pinecone_service import transcript_exists, store_embeddings, get_index_stats
 from app.core.celery_config import celery_app
+from app.core.redis_pool import redis_client
+from app.services.job_service import (
+    get_job, set_job_videos, get_job_videos, has_job_videos, update_job_progress, finish_job, finish_job_if_complete,
+    job_progress, is_video_embedding, lost_embedding_videos,
+    get_video_statuses, set_video_status, get_chunk_checkpoint, set_chunk_checkpoint, mark_channel_processed,
+    queue_for_priority, PRIORITY_NORMAL, ACTIVE_STATUSES, VIDEO_IN_PROGRESS, VIDEO_DONE, VIDEO_NO_TRANSCRIPT,
+    VIDEO_RETRYING, VIDEO_FAILED, VIDEO_EMBEDDING, VIDEO_FINISHED_STATUSES, VIDEO_HANDED_OFF_STATUSES
+)
+from app.services.dead_letter_service import add_dead_letter
+from app.services.payload_store import put_payload, release_payload
+from app.services.transcript_failure_cache import record_transcript_failure, get_transcript_failure, FAILURE_PERMANENT
+from app.utils.redis_lock import RedisLease
+from app.utils.retry_policy import classify_error, is_missing_transcript, backoff_delay, PERMANENT, TRANSIENT
+from typing import Dict, Iterator, List, Optional
 
-redis_client = redis.Redis.from_url(settings.get_redis_url)
 logger = logging.getLogger(__name__)
 
 
-@celery_app.task(bind=True)
-def start_channel_processing(self, channel_id: str, video_limit: int = 5):
+def video_lease(video_id: str) -> RedisLease:
+    return RedisLease(redis_client, f"lock:video:{video_id}", settings.VIDEO_LOCK_TTL)
+
+
+def fetch_transcript(fy: YoutubeScraper, channel_id: str, video_id: str) -> Optional[str]:
+    """Fetches a transcript, remembering failed and empty fetches so resyncs don't repeat them."""
+    try:
+        transcript = fy.get_video_transcript(video_id=video_id, raise_errors=True, per_host_limit=settings.TRANSCRIPT_FETCH_PER_HOST)
+    except Exception as e:
+        record_transcript_failure(video_id, channel_id, e)
+        raise
+    if not transcript:
+        record_transcript_failure(video_id, channel_id)
+    return transcript
+
+
+def video_needs_processing(channel_id: str, video_id: str, job_id: Optional[str] = None, video_status: Optional[str] = None, use_failure_cache: bool = True) -> bool:
+    if video_status in VIDEO_FINISHED_STATUSES + VIDEO_HANDED_OFF_STATUSES:
+        logger.info(f"Video {video_id} is {video_status} in job {job_id}, skipping")
+        return False
+    if is_video_embedding(video_id):
+        # Its chunk ranges are still running; finalize_chunked_video or the dead-letter path clears the marker
+        logger.info(f"Video {video_id} is still embedding, skipping")
+        return False
+    # A video this job left half-stored is visible in the index, so only trust transcript_exists for untouched videos
+    if video_status != VIDEO_IN_PROGRESS and transcript_exists(video_id):
+        logger.info(f"Video {video_id} already processed")
+        if job_id:
+            set_video_status(job_id, video_id, VIDEO_DONE)
+        return False
+    if use_failure_cache:
+        failure = get_transcript_failure(video_id)
+        if failure:
+            logger.info(f"Skipping video {video_id}: transcript unavailable ({failure['reason']}, {failure['failure_class']})")
+            if job_id and failure['failure_class'] == FAILURE_PERMANENT:
+                set_video_status(job_id, video_id, VIDEO_NO_TRANSCRIPT)
+            return False
+    return True
+
+
+def store_video_transcript(channel_id: str, video_id: str, transcript: Optional[str], job_id: Optional[str] = None):
+    if not transcript:
+        logger.warning(f"No transcript available for video {video_id}")
+        if job_id:
+            set_video_status(job_id, video_id, VIDEO_NO_TRANSCRIPT)
+        return
+    logger.info(f"Transcript found for video {video_id}")
+    chunks = split_into_chunks(transcript)
+    start_index = 0
+    checkpoint = None
+    if job_id:
+        start_index = get_chunk_checkpoint(job_id, video_id)
+        set_video_status(job_id, video_id, VIDEO_IN_PROGRESS)
+        checkpoint = partial(set_chunk_checkpoint, job_id, video_id)
+    if start_index:
+        logger.info(f"Resuming video {video_id} at chunk {start_index}/{len(chunks)}")
+    if len(chunks) - start_index > settings.PARALLEL_EMBEDDING_CHUNK_THRESHOLD:
+        # Set before dispatching so a fast last range's VIDEO_DONE is never overwritten
+        if job_id:
+            set_video_status(job_id, video_id, VIDEO_EMBEDDING)
+        dispatch_chunk_ranges(channel_id, video_id, chunks, job_id, start_index)
+        return
+    embeddings = generate_embeddings(chunks[start_index:])
+    logger.info(f"Generated {len(embeddings)} embeddings for {len(chunks) - start_index} chunks")
+    store_embeddings(channel_id, video_id, chunks[start_index:], embeddings, start_index=start_index, on_batch_stored=checkpoint)
+    redis_client.set(f"processed:{video_id}", "1")
+    if job_id:
+        set_video_status(job_id, video_id, VIDEO_DONE)
+    logger.info(f"Embeddings stored for video {video_id}")
+
+
+def process_channel_video(
+    fy: YoutubeScraper,
+    channel_id: str,
+    video_id: str,
+    job_id: Optional[str] = None,
+    video_status: Optional[str] = None,
+    use_failure_cache: bool = True
+):
+    logger.info(f"Checking video {video_id}")
+    if not video_needs_processing(channel_id, video_id, job_id, video_status, use_failure_cache):
+        return
+    with video_lease(video_id) as lease:
+        if not lease.acquired:
+            logger.info(f"Video {video_id} is being processed by another task, skipping")
+            return
+        logger.info(f"Processing video {video_id}")
+        store_video_transcript(channel_id, video_id, fetch_transcript(fy, channel_id, video_id), job_id)
+
+
+def process_channel_videos(
+    fy: YoutubeScraper,
+    channel_id: str,
+    video_ids: List[str],
+    job_id: Optional[str] = None,
+    video_statuses: Optional[Dict[str, str]] = None
+) -> Iterator[str]:
+    """
+    Processes a batch of videos, fetching their transcripts concurrently and chunking and embedding each one as soon
+    as its transcript arrives. Yields every video ID once it has been handled (skipped, stored or failed).
+    """
+    video_statuses = video_statuses or {}
+    leases = {}
+    try:
+        for video_id in video_ids:
+            logger.info(f"Checking video {video_id}")
+            if not video_needs_processing(channel_id, video_id, job_id, video_statuses.get(video_id)):
+                yield video_id
+                continue
+            lease = video_lease(video_id)
+            if not lease.acquire():
+                logger.info(f"Video {video_id} is being processed by another task, skipping")
+                yield video_id
+                continue
+            leases[video_id] = lease
+
+        transcripts = fy.iter_video_transcripts(
+            list(leases),
+            max_workers=settings.TRANSCRIPT_FETCH_CONCURRENCY,
+            per_host_limit=settings.TRANSCRIPT_FETCH_PER_HOST,
+            max_attempts=settings.TRANSCRIPT_FETCH_ATTEMPTS,
+            return_exceptions=True
+        )
+        for video_id, transcript in transcripts:
+            try:
+                if isinstance(transcript, Exception):
+                    record_transcript_failure(video_id, channel_id, transcript)
+                    raise transcript
+                if not transcript:
+                    record_transcript_failure(video_id, channel_id)
+                logger.info(f"Processing video {video_id}")
+                store_video_transcript(channel_id, video_id, transcript, job_id)
+            except Exception as e:
+                logger.error(f"Error processing video {video_id}: {str(e)}")
+                handle_video_failure(channel_id, video_id, job_id, e, attempt=1)
+            finally:
+                leases.pop(video_id).release()
+            for lease in leases.values():
+                lease.extend()
+            yield video_id
+    finally:
+        for lease in leases.values():
+            lease.release()
+
+
+def handle_video_failure(channel_id: str, video_id: str, job_id: Optional[str], error: Exception, attempt: int):
+    """
+    Decides what happens to a video that raised: a missing transcript is recorded as such, transient and
+    rate-limit errors are retried with backoff on the video queue, and anything else goes to the dead-letter queue.
+    """
+    if is_missing_transcript(error):
+        logger.warning(f"No transcript available for video {video_id}: {str(error)}")
+        if job_id:
+            set_video_status(job_id, video_id, VIDEO_NO_TRANSCRIPT)
+        return
+
+    error_class = classify_error(error)
+    if error_class != PERMANENT and attempt < settings.VIDEO_MAX_ATTEMPTS:
+        countdown = getattr(error, 'retry_after', None) or backoff_delay(
+            attempt, error_class, settings.VIDEO_RETRY_BASE_DELAY, settings.VIDEO_RETRY_MAX_DELAY
+        )
+        retry_channel_video.apply_async(
+            kwargs={'channel_id': channel_id, 'video_id': video_id, 'job_id': job_id, 'attempt': attempt + 1},
+            countdown=countdown,
+            ignore_result=True
+        )
+        if job_id:
+            set_video_status(job_id, video_id, VIDEO_RETRYING)
+        logger.warning(f"Video {video_id} failed ({error_class}) on attempt {attempt}, retrying in {countdown:.0f}s: {str(error)}")
+        return
+
+    add_dead_letter(video_id, channel_id, str(error), error_class, attempt, job_id)
+    if job_id:
+        set_video_status(job_id, video_id, VIDEO_FAILED)
+
+
+def process_channel_slice(self, channel_id: str, video_limit: int, job_id: str, offset: int, lease: RedisLease):
+    """
+    Processes one slice of a registered job's videos, then re-enqueues the remainder at the back of the
+    job's priority queue so channels sharing that queue take turns instead of running to completion.
+
+    Everything needed to resume lives in Redis (video list, per-video status, chunk offsets), so a slice that is
+    redelivered after a worker crash skips finished videos and continues half-stored ones from their last batch.
+    """
+    job = get_job(job_id)
+    if job and job['status'] not in ACTIVE_STATUSES:
+        logger.info(f"Job {job_id} is already {job['status']}, ignoring slice at offset {offset}")
+        return {'status': job['status'], 'progress': job_progress(job), 'channel_id': channel_id, 'job_id': job_id}
+    fy = YoutubeScraper(channel_id=channel_id)
+
+    if not has_job_videos(job_id):
+        video_ids = fy.get_video_ids(limit=min(video_limit, settings.MAX_VIDEOS_PER_CHANNEL))
+        logger.info(f"Found {len(video_ids)} videos for job {job_id}")
+        set_job_videos(job_id, video_ids)
+
+    slice_size = settings.CHANNEL_PROCESSING_SLICE_SIZE
+    video_ids = get_job_videos(job_id, offset, slice_size)
+    total_videos = get_job(job_id)['total']
+    video_statuses = get_video_statuses(job_id, video_ids)
+
+    for processed_videos, video_id in enumerate(process_channel_videos(fy, channel_id, video_ids, job_id, video_statuses), offset + 1):
+        lease.extend()
+        update_job_progress(job_id, processed_videos)
+        progress = (processed_videos / total_videos) * 100
+        logger.info(f"Job {job_id} progress: {progress:.2f}%")
+
+    next_offset = offset + len(video_ids)
+    if next_offset < total_videos:
+        queue = queue_for_priority(job['priority'] if job else PRIORITY_NORMAL)
+        # Release first so the next slice is not turned away by our own lock
+        lease.release()
+        start_channel_processing.apply_async(
+            kwargs={'channel_id': channel_id, 'video_limit': video_limit, 'job_id': job_id, 'offset': next_offset},
+            queue=queue,
+            # Progress lives in the job registry; nobody reads follow-up slices' results
+            ignore_result=True
+        )
+        logger.info(f"Re-queued job {job_id} at offset {next_offset}/{total_videos} on {queue}")
+        return {'status': 'Requeued', 'progress': (next_offset / total_videos) * 100, 'channel_id': channel_id, 'job_id': job_id}
+
+    # Long videos may still be embedding; the last of them to finish completes the job instead
+    if not finish_job_if_complete(job_id, channel_id):
+        logger.info(f"Job {job_id} has processed every slice; waiting for chunked videos to finish embedding")
+        schedule_job_completion_check(channel_id, job_id)
+        return {'status': 'Embedding', 'progress': 100, 'channel_id': channel_id, 'job_id': job_id}
+    logger.info(f"Channel processing completed for {channel_id}")
+    index_stats = get_index_stats()
+    logger.info(f"Pinecone index stats after processing: {index_stats}")
+    return {'status': 'All videos processed', 'progress': 100, 'channel_id': channel_id, 'job_id': job_id}
+
+
+def schedule_job_completion_check(channel_id: str, job_id: str):
+    check_job_completion.apply_async(
+        kwargs={'channel_id': channel_id, 'job_id': job_id},
+        countdown=settings.JOB_COMPLETION_CHECK_INTERVAL,
+        ignore_result=True
+    )
+
+
+@celery_app.task(ignore_result=True)
+def check_job_completion(channel_id: str, job_id: str):
+    """
+    Fallback for a job waiting on chunked videos whose last range never reported back (e.g. its worker was killed).
+    Videos whose embedding marker has expired are dead-lettered, so the job can finish; until then it re-checks
+    every JOB_COMPLETION_CHECK_INTERVAL seconds.
+    """
+    job = get_job(job_id)
+    if not job or job['status'] not in ACTIVE_STATUSES:
+        return
+    for video_id in lost_embedding_videos(job_id):
+        logger.warning(f"Chunk ranges of video {video_id} were lost before it was finalized")
+        add_dead_letter(video_id, channel_id, "Chunk ranges were lost before the video was finalized", TRANSIENT, 1, job_id)
+        set_video_status(job_id, video_id, VIDEO_FAILED)
+    if not finish_job_if_complete(job_id, channel_id):
+        schedule_job_completion_check(channel_id, job_id)
+
+
+# Acknowledge only after the slice finishes, so a worker killed mid-slice (e.g. a dyno restart) gets it redelivered
+@celery_app.task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def start_channel_processing(self, channel_id: str, video_limit: int = 5, job_id: Optional[str] = None, offset: int = 0):
     """
     Processes the videos from a specified YouTube channel by either using a channel ID or extracting it from a channel URL.
+    Jobs registered through the job service are processed in slices; without a job_id the whole channel is processed in one run.
     """
     # Print out the arguments received for debugging
-    logger.info(f"start_channel_processing received arguments: channel_id={channel_id}, video_limit={video_limit}")
+    logger.info(f"start_channel_processing received arguments: channel_id={channel_id}, video_limit={video_limit}, job_id={job_id}, offset={offset}")
+
+    # Only one task per channel at a time, whichever job or caller started it
+    lease = RedisLease(redis_client, f"lock:channel:{channel_id}", settings.CHANNEL_LOCK_TTL, token=job_id)
+    if not lease.acquire():
+        holder = lease.holder()
+        logger.info(f"Channel {channel_id} is locked by {holder}")
+        if job_id:
+            job = get_job(job_id)
+            start_channel_processing.apply_async(
+                kwargs={'channel_id': channel_id, 'video_limit': video_limit, 'job_id': job_id, 'offset': offset},
+                queue=queue_for_priority(job['priority'] if job else PRIORITY_NORMAL),
+                countdown=settings.CHANNEL_LOCK_RETRY_DELAY,
+                ignore_result=True
+            )
+            return {'status': 'Requeued', 'progress': 0, 'channel_id': channel_id, 'job_id': job_id}
+        return {'status': 'Already processing', 'progress': 0, 'channel_id': channel_id, 'job_id': holder}
 
     try:
+        if job_id:
+            return process_channel_slice(self, channel_id, video_limit, job_id, offset, lease)
+
         fy = YoutubeScraper(channel_id=channel_id)
 
         video_ids = fy.get_video_ids(limit=min(video_limit, settings.MAX_VIDEOS_PER_CHANNEL))
         logger.info(f"Found {len(video_ids)} videos")
 
         total_videos = len(video_ids)
-        processed_videos = 0
 
-        # Step 7: Process each video
-        for video_id in video_ids:
-            logger.info(f"Checking video {video_id}")
-            if not transcript_exists(video_id):
-                logger.info(f"Processing video {video_id}")
-                transcript = fy.get_video_transcript(video_id=video_id)
-                if transcript:
-                    logger.info(f"Transcript found for video {video_id}")
-                    chunks = split_into_chunks(transcript)
-                    embeddings = generate_embeddings(chunks)
-                    logger.info(f"Generated {len(embeddings)} embeddings for {len(chunks)} chunks")
-                    store_embeddings(channel_id, video_id, chunks, embeddings)
-                    redis_client.set(f"processed:{video_id}", "1")
-                    logger.info(f"Embeddings stored for video {video_id}")
-                else:
-                    logger.warning(f"No transcript available for video {video_id}")
-            else:
-                logger.info(f"Video {video_id} already processed")
-
-            # Step 8: Update progress
-            processed_videos += 1
+        for processed_videos, video_id in enumerate(process_channel_videos(fy, channel_id, video_ids), 1):
+            lease.extend()
+
             progress = (processed_videos / total_videos) * 100
-            self.update_state(state='PROGRESS', meta={'progress': progress})
             logger.info(f"Progress: {progress:.2f}%")
 
-        # Step 9: Complete processing
+        mark_channel_processed(channel_id, video_limit, self.request.id)
         logger.info(f"Channel processing completed for {channel_id}")
         index_stats = get_index_stats()
         logger.info(f"Pinecone index stats after processing: {index_stats}")
@@ -63,21 +334,60 @@ def start_channel_processing(self, channel_id: str, video_limit: int = 5):
     except Exception as e:
         logger.error(f"Error processing channel {channel_id}: {str(e)}", exc_info=True)
         logger.error(f"Channel ID type: {type(channel_id)}, Video limit type: {type(video_limit)}")
+        if job_id:
+            finish_job(job_id, channel_id, status='FAILED', error=str(e))
         raise
+    finally:
+        lease.release()
+
+
+@celery_app.task(bind=True, acks_late=True)
+def retry_channel_video(self, channel_id: str, video_id: str, job_id: Optional[str] = None, attempt: int = 1):
+    """Processes a single video outside its channel job, either as a scheduled retry or a dead-letter replay."""
+    if job_id and get_video_statuses(job_id, [video_id]).get(video_id) in VIDEO_FINISHED_STATUSES:
+        return {'status': 'success', 'video_id': video_id, 'attempt': attempt}
+    try:
+        # Treat it as in progress: an earlier attempt may have left it partially stored. The failure cache
+        # holds the error that scheduled this retry, so bypass it
+        process_channel_video(
+            YoutubeScraper(channel_id=channel_id), channel_id, video_id, job_id, VIDEO_IN_PROGRESS, use_failure_cache=False
+        )
+        return {'status': 'success', 'video_id': video_id, 'attempt': attempt}
+    except Exception as e:
+        logger.error(f"Error retrying video {video_id} (attempt {attempt}): {str(e)}")
+        handle_video_failure(channel_id, video_id, job_id, e, attempt)
+        return {'status': 'failure', 'video_id': video_id, 'error': str(e), 'attempt': attempt}
 
 
 @celery_app.task(bind=True)
 def process_video(self, channel_id: str, video_id: str):
     if redis_client.get(f"processed:{video_id}"):
         return f"Video {video_id} already processed"
+    failure = get_transcript_failure(video_id)
+    if failure:
+        return f"Video {video_id} has no transcript available ({failure['reason']})"
+
+    lease = video_lease(video_id)
+    if not lease.acquire():
+        return f"Video {video_id} is already being processed"
 
     try:
         logger.info(f"Processing video {video_id}")
         fy = YoutubeScraper(channel_id=channel_id)
-        transcript = fy.get_video_transcript(video_id=video_id)
-        process_transcript.delay(channel_id, video_id, transcript)
+        transcript = fetch_transcript(fy, channel_id, video_id)
+        if not transcript:
+            return f"Video {video_id} has no transcript available"
+        key = put_payload(transcript)
+        try:
+            # Tokenizing is CPU work, so it runs on the prefork chunk-queue rather than this I/O worker
+            chunk_transcript.delay(channel_id, video_id, key)
+        except Exception:
+            release_payload(key)
+            raise
         redis_client.set(f"processed:{video_id}", "1")
         return f"Video {video_id} processed successfully"
     except Exception as e:
         logger.error(f"Error processing video {video_id}: {str(e)}")
         raise
+    finally:
+        lease.release()
@@ -6,19 +6,33 @@ from celery import Task
 from openai import OpenAI
 import time
 from app.core.config import settings
+from app.core.clients import register_client, LazyClient
 
 logger = logging.getLogger(__name__)
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+register_client(
+    "openai",
+    lambda: OpenAI(api_key=settings.OPENAI_API_KEY),
+    ping=lambda client: client.models.retrieve(settings.EMBEDDING_MODEL)
+)
+client = LazyClient("openai")
+
+
+def embedding_options(model: Optional[str] = None, dimensions: Optional[int] = None) -> dict:
+    """Model and size for an embeddings request. Only the text-embedding-3 models accept a reduced `dimensions`."""
+    model = model or settings.EMBEDDING_MODEL
+    if model.startswith("text-embedding-3"):
+        return {"model": model, "dimensions": dimensions or settings.EMBEDDING_DIMENSIONS}
+    return {"model": model}
 
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-def generate_embedding(text: str, model: str = "text-embedding-3-small") -> List[float]:
+def generate_embedding(text: str, model: Optional[str] = None, dimensions: Optional[int] = None) -> List[float]:
     # logger.info(f"Generating embedding for text: {text[:50]}...")
     try:
         response = client.embeddings.create(
             input=text,
-            model=model
+            **embedding_options(model, dimensions)
         )
         embedding = response.data[0].embedding
         logger.info(f"Generated embedding: {len(embedding)}")
@@ -35,17 +49,37 @@ def generate_embedding(text: str, model: str = "text-embedding-3-small") -> List
 
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-def generate_embeddings(chunks: List[str], task: Optional[Task] = None, model: str = "text-embedding-3-small") -> List[List[float]]:
+def generate_embeddings_batch(texts: List[str], model: Optional[str] = None, dimensions: Optional[int] = None) -> List[List[float]]:
+    """Embed several texts with a single OpenAI request, preserving input order."""
+    if not texts:
+        return []
+    try:
+        response = client.embeddings.create(
+            input=texts,
+            **embedding_options(model, dimensions)
+        )
+        embeddings = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        logger.info(f"Generated {len(embeddings)} embeddings in one request")
+        return embeddings
+    except Exception as e:
+        logger.error(f"Error generating batch embeddings: {str(e)}")
+        raise
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+def generate_embeddings(
+    chunks: List[str], task: Optional[Task] = None, model: Optional[str] = None, dimensions: Optional[int] = None
+) -> List[List[float]]:
     try:
         embeddings = []
         total_chunks = len(chunks)
         for i, chunk in enumerate(chunks, 1):
-            embedding = generate_embedding(chunk, model)
+            embedding = generate_embedding(chunk, model, dimensions)
             embeddings.append(embedding)
 
+            # Progress is only logged: the embedding tasks ignore their results, so there is no backend state to update
             if task:
                 progress = (i / total_chunks) * 100
-                task.update_state(state='PROGRESS', meta={'progress': progress})
                 logger.info(f"Embedding progress: {progress:.2f}% ({i}/{total_chunks})")
 
             time.sleep(0.1)  # Rate limiting
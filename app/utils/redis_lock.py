@@ -0,0 +1,52 @@
+# app/utils/redis_lock.py
+import uuid
+from typing import Optional
+
+# Only the holder of the lease (matching token) may release or extend it
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+EXTEND_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class RedisLease:
+    """A Redis lease lock: SET NX with an expiry, so a crashed holder can never block others for longer than the TTL."""
+
+    def __init__(self, redis_client, key: str, ttl_seconds: float, token: Optional[str] = None):
+        self.redis_client = redis_client
+        self.key = key
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.token = token or uuid.uuid4().hex
+        self.acquired = False
+
+    def acquire(self) -> bool:
+        self.acquired = bool(self.redis_client.set(self.key, self.token, nx=True, px=self.ttl_ms))
+        return self.acquired
+
+    def extend(self) -> bool:
+        return bool(self.redis_client.eval(EXTEND_SCRIPT, 1, self.key, self.token, self.ttl_ms))
+
+    def release(self):
+        if self.acquired:
+            self.redis_client.eval(RELEASE_SCRIPT, 1, self.key, self.token)
+            self.acquired = False
+
+    def holder(self) -> Optional[str]:
+        value = self.redis_client.get(self.key)
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
@@ -0,0 +1,59 @@
+# app/utils/retry_policy.py
+import random
+from urllib.error import HTTPError
+import openai
+import requests
+from tenacity import RetryError
+
+TRANSIENT = "transient"
+RATE_LIMIT = "rate_limit"
+PERMANENT = "permanent"
+
+# youtube_transcript_api is not pinned and renames its errors between releases, so match on class names
+MISSING_TRANSCRIPT_ERRORS = {
+    "TranscriptsDisabled", "NoTranscriptFound", "NoTranscriptAvailable", "VideoUnavailable", "VideoUnplayable",
+    "InvalidVideoId", "AgeRestricted", "NotTranslatable", "TranslationLanguageNotAvailable"
+}
+RATE_LIMIT_ERRORS = {"TooManyRequests", "IpBlocked", "RequestBlocked", "QuotaExceededError"}
+
+
+def unwrap_error(error: BaseException) -> BaseException:
+    """tenacity wraps the last failure in a RetryError; classify what actually went wrong."""
+    if isinstance(error, RetryError) and error.last_attempt.exception() is not None:
+        return unwrap_error(error.last_attempt.exception())
+    return error
+
+
+def is_missing_transcript(error: BaseException) -> bool:
+    return type(unwrap_error(error)).__name__ in MISSING_TRANSCRIPT_ERRORS
+
+
+def classify_error(error: BaseException) -> str:
+    error = unwrap_error(error)
+    name = type(error).__name__
+    if name in RATE_LIMIT_ERRORS or isinstance(error, openai.RateLimitError):
+        return RATE_LIMIT
+    if name in MISSING_TRANSCRIPT_ERRORS:
+        return PERMANENT
+    if isinstance(error, HTTPError):
+        if error.code == 429:
+            return RATE_LIMIT
+        return TRANSIENT if error.code >= 500 else PERMANENT
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        if error.response.status_code == 429:
+            return RATE_LIMIT
+        return TRANSIENT if error.response.status_code >= 500 else PERMANENT
+    if isinstance(error, (openai.AuthenticationError, openai.PermissionDeniedError, openai.BadRequestError, openai.NotFoundError)):
+        return PERMANENT
+    if isinstance(error, (ValueError, TypeError, KeyError)):
+        return PERMANENT
+    # Connection resets, timeouts, 5xx from OpenAI/Pinecone and anything unrecognised are worth another try
+    return TRANSIENT
+
+
+def backoff_delay(attempt: int, error_class: str, base: float, cap: float) -> float:
+    """Exponential backoff with equal jitter; rate limits start from a longer base so we back off the API harder."""
+    if error_class == RATE_LIMIT:
+        base *= 4
+    delay = min(cap, base * (2 ** (attempt - 1)))
+    return delay / 2 + random.uniform(0, delay / 2)
@@ -0,0 +1,118 @@
+# benchmarks/celery_payloads.py
+"""
+Compares Celery serializer/compression settings for ingesting one channel: the bytes each setting puts on the
+broker and in the result backend, encode+decode time per task, and (with --redis-url) the Redis memory the results
+actually occupy.
+
+    python benchmarks/celery_payloads.py --videos 200
+    python benchmarks/celery_payloads.py --videos 200 --redis-url redis://localhost:6379/15
+"""
+import argparse
+import time
+import uuid
+from kombu import compression
+from kombu.exceptions import SerializerNotInstalled
+from kombu.serialization import dumps, loads
+
+SLICE_SIZE = 10
+CHUNKS_PER_VIDEO = 60
+SETTINGS = [("json", None), ("json", "zlib"), ("msgpack", None), ("msgpack", "zlib")]
+ACCEPT = {"application/json", "application/x-msgpack"}
+
+
+def channel_messages(videos: int):
+    """The task messages and results a channel job produces, shaped like the real ones."""
+    channel_id = "UC" + "x" * 22
+    job_id = str(uuid.uuid4())
+    messages, results = [], []
+    for offset in range(0, videos, SLICE_SIZE):
+        messages.append(((), {'channel_id': channel_id, 'video_limit': videos, 'job_id': job_id, 'offset': offset}))
+        results.append({'status': 'Requeued', 'progress': offset / videos * 100, 'channel_id': channel_id, 'job_id': job_id})
+    for i in range(videos):
+        video_id = f"vid{i:08d}"
+        key = f"payload:{uuid.uuid4().hex}{uuid.uuid4().hex}"
+        messages.append(((channel_id, video_id), {'payload_key': key}))
+        results.append({'status': 'success', 'video_id': video_id})
+        # Chunk-range subtasks of long videos return their chunk counts
+        results.append({'status': 'success', 'video_id': video_id, 'chunks': CHUNKS_PER_VIDEO})
+    return messages, [backend_meta(result) for result in results]
+
+
+def backend_meta(result):
+    """What the Redis result backend stores for a finished task."""
+    return {
+        'status': 'SUCCESS', 'result': result, 'traceback': None, 'children': [],
+        'date_done': '2024-01-01T00:00:00.000000', 'task_id': str(uuid.uuid4())
+    }
+
+
+def encode(payload, serializer, method):
+    content_type, encoding, body = dumps(payload, serializer=serializer)
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    if method:
+        body, _ = compression.compress(body, method)
+    return content_type, encoding, body
+
+
+def decode(body, content_type, encoding, method):
+    if method:
+        body = compression.decompress(body, compression.get_encoder(method)[1])
+    return loads(body, content_type, encoding, accept=ACCEPT)
+
+
+def measure(payloads, serializer, method):
+    total = 0
+    start = time.perf_counter()
+    encoded = []
+    for payload in payloads:
+        content_type, encoding, body = encode(payload, serializer, method)
+        decode(body, content_type, encoding, method)
+        total += len(body)
+        encoded.append(body)
+    return total, (time.perf_counter() - start) / len(payloads) * 1e6, encoded
+
+
+def redis_memory(redis_url, bodies):
+    import redis
+    client = redis.Redis.from_url(redis_url)
+    prefix = f"benchmark:{uuid.uuid4().hex}:"
+    pipeline = client.pipeline()
+    for i, body in enumerate(bodies):
+        pipeline.set(f"{prefix}{i}", body)
+    pipeline.execute()
+    try:
+        pipeline = client.pipeline()
+        for i in range(len(bodies)):
+            pipeline.memory_usage(f"{prefix}{i}")
+        return sum(pipeline.execute())
+    finally:
+        client.delete(*[f"{prefix}{i}" for i in range(len(bodies))])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--videos", type=int, default=200)
+    parser.add_argument("--redis-url")
+    args = parser.parse_args()
+
+    messages, results = channel_messages(args.videos)
+    # With ignore_result only the first slice's result is still stored; chunk ranges are counted in Redis instead
+    kept_results = results[:1]
+    print(f"{args.videos} videos: {len(messages)} task messages, {len(results)} results ({len(kept_results)} with ignore_result)")
+    print(f"{'setting':<16}{'broker bytes':>14}{'result bytes':>14}{'kept bytes':>12}{'us/task':>10}{'redis bytes':>14}")
+    for serializer, method in SETTINGS:
+        name = f"{serializer}+{method}" if method else serializer
+        try:
+            broker_bytes, per_task, _ = measure(messages, serializer, method)
+            result_bytes, _, _ = measure(results, serializer, method)
+            kept_bytes, _, kept_bodies = measure(kept_results, serializer, method)
+        except SerializerNotInstalled:
+            print(f"{name:<16}  (msgpack is not installed)")
+            continue
+        memory = redis_memory(args.redis_url, kept_bodies) if args.redis_url else None
+        print(f"{name:<16}{broker_bytes:>14}{result_bytes:>14}{kept_bytes:>12}{per_task:>10.1f}{memory if memory is not None else '-':>14}")
+
+
+if __name__ == "__main__":
+    main()
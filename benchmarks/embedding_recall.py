@@ -0,0 +1,95 @@
+# benchmarks/embedding_recall.py
+"""
+Recall@k of reduced-dimension embeddings against full-size ones, measured on our own transcripts, to choose
+EMBEDDING_DIMENSIONS. Transcripts are chunked like ingestion does and embedded once at full size; the embeddings are
+saved to --cache so later runs are offline. text-embedding-3 embeddings requested with `dimensions=d` equal the full
+embedding truncated to d and re-normalised, so every candidate size is derived from the one full-size run.
+
+Queries come from --queries (one per line); without it each of --sample chunks is used as its own query, with the
+chunk itself excluded from the results. Recall@k is the share of the full-size top k that the reduced top k keeps.
+Run it as a module from the repository root so `app` is importable:
+
+    python -m benchmarks.embedding_recall --transcripts transcripts/ --queries queries.txt --dimensions 256 512 1024
+"""
+import argparse
+import pathlib
+import numpy as np
+from app.core.config import settings
+from app.services.transcript_processor import split_into_chunks
+from app.utils.embedding_utils import generate_embeddings_batch
+
+FULL_DIMENSIONS = {"text-embedding-3-small": 1536, "text-embedding-3-large": 3072}
+BATCH_SIZE = 256
+
+
+def embed(texts, model: str) -> np.ndarray:
+    dimensions = FULL_DIMENSIONS[model]
+    vectors = []
+    for start in range(0, len(texts), BATCH_SIZE):
+        vectors.extend(generate_embeddings_batch(texts[start:start + BATCH_SIZE], model=model, dimensions=dimensions))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def load_or_embed(path: pathlib.Path, texts, model: str) -> np.ndarray:
+    if path.exists():
+        vectors = np.load(path)
+        if len(vectors) == len(texts):
+            return vectors
+    vectors = embed(texts, model)
+    np.save(path, vectors)
+    return vectors
+
+
+def reduce(vectors: np.ndarray, dimensions: int) -> np.ndarray:
+    truncated = vectors[:, :dimensions]
+    return truncated / np.linalg.norm(truncated, axis=1, keepdims=True)
+
+
+def top_k(queries: np.ndarray, corpus: np.ndarray, k: int, exclude=None) -> np.ndarray:
+    scores = queries @ corpus.T
+    if exclude is not None:
+        scores[np.arange(len(queries)), exclude] = -np.inf
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def recall_at_k(expected: np.ndarray, actual: np.ndarray) -> float:
+    return float(np.mean([len(set(e) & set(a)) / len(e) for e, a in zip(expected, actual)]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transcripts", type=pathlib.Path, required=True, help="Directory of .txt transcripts")
+    parser.add_argument("--queries", type=pathlib.Path, help="File with one query per line")
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL, choices=sorted(FULL_DIMENSIONS))
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[256, 512, 768, 1024])
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--sample", type=int, default=500)
+    parser.add_argument("--cache", type=pathlib.Path, default=pathlib.Path("embedding_recall_cache"))
+    args = parser.parse_args()
+
+    chunks = [chunk for path in sorted(args.transcripts.glob("*.txt")) for chunk in split_into_chunks(path.read_text())]
+    args.cache.mkdir(exist_ok=True)
+    corpus = load_or_embed(args.cache / "chunks.npy", chunks, args.model)
+
+    if args.queries:
+        queries = [line.strip() for line in args.queries.read_text().splitlines() if line.strip()]
+        query_vectors = load_or_embed(args.cache / "queries.npy", queries, args.model)
+        exclude = None
+    else:
+        exclude = np.random.default_rng(0).choice(len(chunks), size=min(args.sample, len(chunks)), replace=False)
+        query_vectors = corpus[exclude]
+
+    full = FULL_DIMENSIONS[args.model]
+    expected = {k: top_k(query_vectors, corpus, k, exclude) for k in args.k}
+    print(f"{len(chunks)} chunks, {len(query_vectors)} queries, {args.model}")
+    print("| dimensions | bytes/vector | " + " | ".join(f"recall@{k}" for k in args.k) + " |")
+    print("|---" * (len(args.k) + 2) + "|")
+    for dimensions in sorted(set(args.dimensions + [full])):
+        reduced_corpus = reduce(corpus, dimensions)
+        reduced_queries = reduce(query_vectors, dimensions)
+        recalls = [recall_at_k(expected[k], top_k(reduced_queries, reduced_corpus, k, exclude)) for k in args.k]
+        print(f"| {dimensions} | {dimensions * 4} | " + " | ".join(f"{recall:.3f}" for recall in recalls) + " |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/import_time.py
+"""
+Time to import the API (`app.main`) and the Celery worker (`celery_worker`) in a fresh interpreter, and what it then
+costs to create and ping the Pinecone, OpenAI and Redis clients. Clients are created lazily, so the import no
+longer includes any client setup or network round trips; the warm-up cost moves to the FastAPI lifespan and
+worker_process_init. Needs the usual .env settings.
+
+    python benchmarks/import_time.py --runs 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+WARM_UP_SNIPPET = (
+    "import app.main, time; from app.core.clients import warm_up_clients; "
+    "start = time.perf_counter(); warm_up_clients(); print(time.perf_counter() - start)"
+)
+
+
+def run(snippet: str) -> float:
+    output = subprocess.run([sys.executable, "-c", snippet], capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def slowest_imports(module: str, count: int):
+    """Heaviest modules imported directly by app.main's chain, from python -X importtime."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.rstrip()
+        # -X importtime indents nested imports; keep the shallow ones so totals aren't counted twice
+        if len(name) - len(name.lstrip()) <= 3:
+            rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for module in ("app.main", "celery_worker"):
+        times = [run(IMPORT_SNIPPET.format(module=module)) for _ in range(args.runs)]
+        print(f"import {module}: median {statistics.median(times) * 1000:.0f} ms over {args.runs} runs")
+    print(f"client warm-up: {run(WARM_UP_SNIPPET) * 1000:.0f} ms")
+    print("slowest top-level imports of app.main (cumulative):")
+    for cumulative_us, name in slowest_imports("app.main", 8):
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/pinecone_upserts.py
+"""
+Upsert throughput of store_embeddings against a local stand-in index, at several PINECONE_UPSERT_CONCURRENCY
+values (1 is the old sequential behaviour). The stand-in sleeps for a fixed round trip plus transfer time at
+--mbps, so this measures how well batches overlap rather than Pinecone itself. Needs the usual .env settings but
+makes no network calls. Run it as a module from the repository root so `app` is importable:
+
+    python -m benchmarks.pinecone_upserts --chunks 600 --concurrency 1 2 4 8
+"""
+import argparse
+import json
+import threading
+import time
+from unittest.mock import patch
+from app.core.config import settings
+from app.services import pinecone_service
+
+DIMENSIONS = 1536
+
+
+class StandInIndex:
+    def __init__(self, round_trip_ms: float, mbps: float):
+        self.round_trip = round_trip_ms / 1000
+        self.bytes_per_second = mbps * 1024 * 1024 / 8
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def upsert(self, vectors):
+        size = len(json.dumps(vectors).encode('utf-8'))
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.round_trip + size / self.bytes_per_second)
+        with self.lock:
+            self.in_flight -= 1
+
+
+def run(chunks: int, concurrency: int, round_trip_ms: float, mbps: float):
+    stand_in = StandInIndex(round_trip_ms, mbps)
+    texts = [f"chunk {i} " + "lorem ipsum " * 70 for i in range(chunks)]
+    embeddings = [[0.0123456789] * DIMENSIONS for _ in range(chunks)]
+    with patch.object(pinecone_service, "index", stand_in), \
+         patch.object(pinecone_service, "bump_channel_version"), \
+         patch.object(pinecone_service, "record_recent_chunks"), \
+         patch.object(settings, "PINECONE_UPSERT_CONCURRENCY", concurrency):
+        start = time.perf_counter()
+        pinecone_service.store_embeddings("UC" + "x" * 22, "video", texts, embeddings)
+        elapsed = time.perf_counter() - start
+    return elapsed, stand_in
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--round-trip-ms", type=float, default=80)
+    parser.add_argument("--mbps", type=float, default=100)
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{args.chunks} chunks of {DIMENSIONS} dimensions, {args.round_trip_ms:.0f}ms round trip, {args.mbps:.0f} Mbit/s")
+    print("| concurrency | batches | max in flight | seconds | chunks/s | speed-up |")
+    print("|---|---|---|---|---|---|")
+    for concurrency in args.concurrency:
+        elapsed, stand_in = run(args.chunks, concurrency, args.round_trip_ms, args.mbps)
+        baseline = baseline or elapsed
+        print(f"| {concurrency} | {stand_in.requests} | {stand_in.max_in_flight} | {elapsed:.2f} | "
+              f"{args.chunks / elapsed:.0f} | {baseline / elapsed:.1f}x |")
+
+
+if __name__ == "__main__":
+    main()
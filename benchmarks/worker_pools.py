@@ -0,0 +1,80 @@
+# benchmarks/worker_pools.py
+"""
+Throughput of the two worker profiles for the per-video pipeline: fetch the transcript (YouTube), chunk it (CPU),
+embed the chunks (OpenAI) and upsert them (Pinecone). Network calls are simulated with sleeps of typical latency, so
+this measures how many videos a dyno keeps in flight rather than any one API.
+
+    prefork: every stage runs in one of --processes worker processes (the old single-worker setup)
+    threads: the I/O stages run on --threads threads, chunking on a --processes process pool (io_worker + worker:
+             process_video and process_transcript/embed_chunk_range on threads, chunk_transcript on prefork)
+
+    python benchmarks/worker_pools.py --videos 200 --processes 4 --threads 32
+"""
+import argparse
+import hashlib
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def chunk(cpu_ms: float) -> int:
+    """Burns roughly cpu_ms of CPU, standing in for tokenizing a transcript."""
+    deadline = time.process_time() + cpu_ms / 1000
+    digest = b"transcript"
+    while time.process_time() < deadline:
+        digest = hashlib.sha256(digest).digest()
+    return len(digest)
+
+
+def io_call(latency_ms: float):
+    time.sleep(latency_ms / 1000)
+
+
+def prefork_video(args) -> None:
+    fetch_ms, cpu_ms, embed_ms, upsert_ms = args
+    io_call(fetch_ms)
+    chunk(cpu_ms)
+    io_call(embed_ms)
+    io_call(upsert_ms)
+
+
+def run_prefork(videos: int, processes: int, latencies) -> float:
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        list(pool.map(prefork_video, [latencies] * videos))
+    return time.perf_counter() - start
+
+
+def run_threads(videos: int, processes: int, threads: int, latencies) -> float:
+    fetch_ms, cpu_ms, embed_ms, upsert_ms = latencies
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as cpu_pool, ThreadPoolExecutor(max_workers=threads) as io_pool:
+        def video(_):
+            io_call(fetch_ms)
+            cpu_pool.submit(chunk, cpu_ms).result()
+            io_call(embed_ms)
+            io_call(upsert_ms)
+        list(io_pool.map(video, range(videos)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--videos", type=int, default=200)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--fetch-ms", type=float, default=400)
+    parser.add_argument("--chunk-ms", type=float, default=20)
+    parser.add_argument("--embed-ms", type=float, default=300)
+    parser.add_argument("--upsert-ms", type=float, default=150)
+    args = parser.parse_args()
+    latencies = (args.fetch_ms, args.chunk_ms, args.embed_ms, args.upsert_ms)
+
+    prefork = run_prefork(args.videos, args.processes, latencies)
+    threads = run_threads(args.videos, args.processes, args.threads, latencies)
+    print(f"{args.videos} videos, {args.processes} processes, {args.threads} threads")
+    print(f"prefork: {prefork:6.2f}s  {args.videos / prefork:6.1f} videos/s")
+    print(f"threads: {threads:6.2f}s  {args.videos / threads:6.1f} videos/s  ({prefork / threads:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,17 @@ def test_client():
     return TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def isolate_caches():
+    # Keep tests independent of cached embeddings, results and metadata from earlier tests and runs
+    from app.services.channel_service import metadata_l1
+    metadata_l1.clear()
+    with patch.object(settings, "QUERY_CACHE_ENABLED", False), \
+         patch.object(settings, "SEMANTIC_CACHE_ENABLED", False):
+        yield
+    metadata_l1.clear()
+
+
 @pytest.fixture(scope="session")
 def redis_client():
     return redis.Redis.from_url(settings.get_redis_url)
@@ -81,7 +92,7 @@ def mock_generate_embedding():
 
 @pytest.fixture
 def mock_pinecone_query(mocker):
-    mock = mocker.patch('app.services.pinecone_service.index.query')
+    mock = mocker.patch('app.services.pinecone_service.index').query
     mock.side_effect = [
         # First call (channel existence check)
         {
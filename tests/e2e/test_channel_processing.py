@@ -28,6 +28,13 @@ def mock_start_channel_processing():
         yield mock
 
 
+@pytest.fixture
+def mock_job_registry():
+    with patch('app.api.routes.get_recent_channel_run', return_value=None), \
+         patch('app.api.routes.claim_channel_job', return_value=None) as mock:
+        yield mock
+
+
 @pytest.fixture
 def mock_transcript_exists():
     with patch('app.services.youtube_scraper.transcript_exists', return_value=False) as mock:
@@ -67,7 +74,7 @@ def test_fetch_channel_info(mock_get_channel_info, test_client, api_key_header):
     assert channel_info["channel_id"] == "UCZf5IX90oe5gdPppMXGImwg", "Channel ID mismatch"
 
 
-def test_start_channel_processing(mock_start_channel_processing, mock_celery_async_result, test_client, api_key_header):
+def test_start_channel_processing(mock_start_channel_processing, mock_job_registry, mock_celery_async_result, test_client, api_key_header):
     channel_id = "UCZf5IX90oe5gdPppMXGImwg"
 
     # Mock Celery task
@@ -48,8 +48,8 @@ def test_process_transcript_task(mock_pinecone, mock_openai_client, mock_celery_
         assert store_embeddings_args[2] == ["chunk1", "chunk2"]
         assert len(store_embeddings_args[3]) == 2  # Two embeddings
 
-        # Check if update_state was called (this replaces the need to set backend)
-        mock_update_state.assert_called_with(state='SUCCESS', meta={'video_id': 'test_video'})
+        # The task ignores its result, so nothing is written to the result backend
+        mock_update_state.assert_not_called()
 
     # Optional: Print out more information if the assertion fails
     if not result.successful():
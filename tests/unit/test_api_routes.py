@@ -9,10 +9,17 @@ YES_API_KEY = settings.YES_API_KEY
 # Ensure all routes require API key
 @pytest.mark.parametrize("endpoint,method,params", [
     ("/process_channel", "post", {"json": {"channel_url": "https://www.youtube.com/@drwaku"}}),
+    ("/process_channels", "post", {"json": {"channels": [{"channel_id": "UCZf5IX90oe5gdPppMXGImwg"}]}}),
     ("/job_status/test_job_id", "get", {}),
     ("/relevant_chunks", "get", {"params": {"query": "test", "channel_id": "test_channel"}}),
+    ("/relevant_chunks/batch", "post", {"json": {"queries": ["test"], "channel_ids": ["test_channel"]}}),
     ("/recent_chunks", "get", {"params": {"channel_id": "test_channel"}}),
+    ("/cache_stats", "get", {}),
+    ("/youtube_quota", "get", {}),
+    ("/dead_letters", "get", {}),
+    ("/dead_letters/video1/replay", "post", {}),
     ("/channel_info", "get", {"params": {"channel_url": "https://www.youtube.com/@drwaku"}}),
+    ("/channels_metadata", "post", {"json": {"channel_ids": ["UC6vLzWN-3aFG8dgTgEOlx5g"]}}),
     ("/refresh_channel_metadata", "post", {"params": {"channel_url": "https://www.youtube.com/@drwaku"}})
 ])
 def test_endpoints_require_api_key(test_client, endpoint, method, params):
@@ -48,6 +55,17 @@ def test_channel_info(test_client, mock_api_key_validation, api_key_header, chan
     assert response.status_code == expected_status
 
 
+# Tests for channels_metadata endpoint
+def test_channels_metadata(test_client, mocker, api_key_header):
+    mock_bulk = mocker.patch('app.api.routes.get_channels_metadata')
+    mock_bulk.return_value = {"UC6vLzWN-3aFG8dgTgEOlx5g": {"id": "UC6vLzWN-3aFG8dgTgEOlx5g", "snippet": {"title": "Test"}}}
+
+    response = test_client.post("/channels_metadata", json={"channel_ids": ["UC6vLzWN-3aFG8dgTgEOlx5g", "UCmissing"]}, headers=api_key_header)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["metadata"]["UC6vLzWN-3aFG8dgTgEOlx5g"]["snippet"]["title"] == "Test"
+    assert response.json()["missing"] == ["UCmissing"]
+
+
 # Tests for process_channel endpoint
 def test_process_channel(test_client, mock_celery, mock_api_key_validation, api_key_header):
     # Mock the `apply_async` method to return a mock with the required `id` attribute
@@ -60,6 +78,109 @@ def test_process_channel(test_client, mock_celery, mock_api_key_validation, api_
     assert response.json()["job_id"] == "test_job_id"
 
 
+@pytest.fixture
+def mock_job_submission():
+    with patch("app.api.routes.start_channel_processing") as mock_task, \
+         patch("app.api.routes.get_recent_channel_run", return_value=None) as mock_recent_run, \
+         patch("app.api.routes.claim_channel_job", return_value=None) as mock_claim:
+        mock_task.apply_async.side_effect = lambda **kwargs: MagicMock(id=kwargs["task_id"])
+        yield {"task": mock_task, "recent_run": mock_recent_run, "claim": mock_claim}
+
+
+def test_process_channels_dedupes_and_prioritises(test_client, mock_job_submission, api_key_header):
+    active_job = {"job_id": "running_job", "status": "PROGRESS", "total": 10, "processed": 5}
+    mock_job_submission["claim"].side_effect = lambda job_id, channel_id, video_limit, priority, force=False: active_job if channel_id == "UCbusy" else None
+
+    response = test_client.post("/process_channels", json={"channels": [
+        {"channel_id": "UCbusy"},
+        {"channel_id": "UCsmall", "video_limit": 5},
+        {"channel_id": "UCsmall", "video_limit": 5},
+        {"channel_id": "UCbig", "video_limit": 1000},
+        {"channel_id": "UCurgent", "video_limit": 1000, "priority": "high"}
+    ]}, headers=api_key_header)
+    assert response.status_code == status.HTTP_200_OK
+
+    jobs = response.json()["jobs"]
+    assert [job["channel_id"] for job in jobs] == ["UCbusy", "UCsmall", "UCsmall", "UCbig", "UCurgent"]
+    assert jobs[0]["job_id"] == "running_job"
+    assert jobs[0]["deduplicated"] is True
+    assert jobs[0]["progress"] == 50.0
+    # The first UCsmall entry started the job; only the repeat is marked as deduplicated
+    assert jobs[1]["deduplicated"] is False
+    assert jobs[2]["deduplicated"] is True
+    assert jobs[2]["job_id"] == jobs[1]["job_id"]
+
+    queues = {
+        call.kwargs["kwargs"]["channel_id"]: call.kwargs["queue"]
+        for call in mock_job_submission["task"].apply_async.call_args_list
+    }
+    assert queues == {"UCsmall": "celery", "UCbig": "channel-backfill", "UCurgent": "channel-high"}
+
+
+def test_process_channels_merges_repeats(test_client, mock_job_submission, api_key_header):
+    response = test_client.post("/process_channels", json={"channels": [
+        {"channel_id": "UCrepeat", "video_limit": 5, "priority": "backfill"},
+        {"channel_id": "UCrepeat", "video_limit": 50, "priority": "high"},
+        {"channel_id": "UCrepeat", "video_limit": 20}
+    ]}, headers=api_key_header)
+    assert response.status_code == status.HTTP_200_OK
+    assert [job["deduplicated"] for job in response.json()["jobs"]] == [False, True, True]
+
+    # A single job with the largest limit and the highest priority asked for
+    mock_job_submission["task"].apply_async.assert_called_once()
+    call = mock_job_submission["task"].apply_async.call_args
+    assert call.kwargs["kwargs"]["video_limit"] == 50
+    assert call.kwargs["queue"] == "channel-high"
+
+
+def test_process_channel_skips_recently_processed_channel(test_client, mock_job_submission, api_key_header):
+    mock_job_submission["recent_run"].return_value = {"job_id": "finished_job", "video_limit": "5"}
+
+    response = test_client.post("/process_channel", json={"channel_id": "UCfresh", "video_limit": 5}, headers=api_key_header)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["job_id"] == "finished_job"
+    assert response.json()["deduplicated"] is True
+    mock_job_submission["task"].apply_async.assert_not_called()
+
+    response = test_client.post("/process_channel", json={"channel_id": "UCfresh", "video_limit": 5, "force": True}, headers=api_key_header)
+    assert response.json()["deduplicated"] is False
+    mock_job_submission["task"].apply_async.assert_called_once()
+
+
+def test_process_channels_requires_channels(test_client, api_key_header):
+    response = test_client.post("/process_channels", json={"channels": []}, headers=api_key_header)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+# Tests for dead letter endpoints
+def test_dead_letters(test_client, api_key_header):
+    entry = {"video_id": "video1", "channel_id": "UC1", "job_id": None, "error": "boom", "error_class": "transient", "attempts": 5, "failed_at": 1.0}
+    with patch("app.api.routes.list_dead_letters", return_value=([entry], 1)):
+        response = test_client.get("/dead_letters", headers=api_key_header)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"dead_letters": [entry], "total": 1}
+
+
+def test_replay_dead_letter(test_client, api_key_header):
+    entry = {"video_id": "video1", "channel_id": "UC1", "job_id": "job-1"}
+    with patch("app.api.routes.get_dead_letter", return_value=entry), \
+         patch("app.api.routes.remove_dead_letter") as mock_remove, \
+         patch("app.api.routes.retry_channel_video") as mock_retry:
+        mock_retry.apply_async.return_value = MagicMock(id="replay_task")
+        response = test_client.post("/dead_letters/video1/replay", headers=api_key_header)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["job_id"] == "replay_task"
+    mock_retry.apply_async.assert_called_once_with(kwargs={"channel_id": "UC1", "video_id": "video1", "job_id": "job-1", "attempt": 1})
+    mock_remove.assert_called_once_with("video1")
+
+
+def test_replay_unknown_dead_letter(test_client, api_key_header):
+    with patch("app.api.routes.get_dead_letter", return_value=None):
+        response = test_client.post("/dead_letters/video1/replay", headers=api_key_header)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
 # Tests for refresh_channel_metadata endpoint
 @pytest.mark.parametrize("channel_id,expected_status", [
     ("UC6vLzWN-3aFG8dgTgEOlx5g", status.HTTP_200_OK),
@@ -110,20 +231,54 @@ def test_get_relevant_chunks(test_client, mock_generate_embedding, mock_pinecone
     assert mock_pinecone_query.call_count == 2
 
 
+# Tests for get_relevant_chunks_batch endpoint
+def test_get_relevant_chunks_batch(test_client, mocker, api_key_header):
+    mock_batch = mocker.patch('app.api.routes.retrieve_relevant_transcripts_batch')
+    mock_batch.return_value = [
+        [{"main_chunk": "first", "context_before": [], "context_after": ["next"], "score": 0.9}],
+        []
+    ]
+
+    response = test_client.post("/relevant_chunks/batch", json={
+        "queries": ["query one", "query two"],
+        "channel_ids": ["channel_a", "channel_b"],
+        "chunk_limit": 3,
+        "context_window": 1
+    }, headers=api_key_header)
+
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()["results"]
+    assert [result["query"] for result in results] == ["query one", "query two"]
+    assert results[0]["chunks"][0]["main_chunk"] == "first"
+    assert results[1]["chunks"] == []
+    mock_batch.assert_called_once_with(["query one", "query two"], ["channel_a", "channel_b"], 3, 1)
+
+
+def test_get_relevant_chunks_batch_requires_queries(test_client, api_key_header):
+    response = test_client.post("/relevant_chunks/batch", json={"queries": [], "channel_ids": ["channel_a"]}, headers=api_key_header)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 # Tests for get_recent_chunks endpoint
-def test_get_recent_chunks(test_client, mock_pinecone_query, api_key_header):
+def test_get_recent_chunks(test_client, mock_pinecone_query, api_key_header, mocker):
+    mocker.patch('app.services.pinecone_service.get_recent_chunk_ids', return_value=["video2_1", "video2_0", "video1_7"])
+    mock_fetch = mocker.patch('app.services.pinecone_service.index.fetch')
+    mock_fetch.return_value = {"vectors": {
+        vector_id: {"metadata": {"text": f"text {vector_id}"}} for vector_id in ["video2_1", "video2_0", "video1_7"]
+    }}
+
     response = test_client.get("/recent_chunks", params={
         "channel_id": "test_channel",
-        "chunk_limit": 5
+        "chunk_limit": 3
     }, headers=api_key_header)
 
     assert response.status_code == status.HTTP_200_OK
     assert "chunks" in response.json()
 
     chunks = response.json()["chunks"]
-    assert len(chunks) > 0
+    assert [(chunk["video_id"], chunk["chunk_index"]) for chunk in chunks] == [("video2", 1), ("video2", 0), ("video1", 7)]
+    assert chunks[0]["text"] == "text video2_1"
 
-    # Verify that the mocks were called
-    assert mock_pinecone_query.call_count == 1
-    first_call_args = mock_pinecone_query.call_args_list[0][1]
-    assert first_call_args['filter'] == {'channel_id': {'$eq': 'test_channel'}}
+    # A range read plus one batched fetch, no vector search
+    mock_fetch.assert_called_once()
+    mock_pinecone_query.assert_not_called()
@@ -1,25 +1,52 @@
 # tests/unit/test_channel_service.py
+import json
+import threading
+import time
 import pytest
-from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+from urllib.parse import parse_qs, urlparse
 from app.services.channel_service import (
     extract_channel_name,
     get_channel_id,
     get_channel_metadata,
     get_channel_info,
-    cached_api_call
+    get_cached_channel_metadata,
+    get_channels_metadata,
+    resolve_channel_handle,
+    search_channel_id,
+    get_channel_id_from_name_or_url,
+    store_channel_metadata,
+    cached_api_call,
+    refresh_channel_metadata_task,
+    refresh_channels_metadata_task
 )
+from app.services.quota_service import QuotaExceededError
+from app.core.config import settings
 
 
 @pytest.fixture
 def mock_redis_client():
-    with patch('app.services.channel_service.celery_app.backend.client') as mock:
+    # Quota accounting and the transcript failure counts share the Redis pool with the metadata cache
+    with patch('app.services.channel_service.redis_client') as mock, \
+         patch('app.services.quota_service.redis_client', mock), \
+         patch('app.services.transcript_failure_cache.redis_client', mock):
+        mock.hgetall.return_value = {}
         yield mock
 
 
+def http_response(body, status_code=200, etag=None):
+    response = MagicMock(status_code=status_code, headers={'ETag': etag} if etag else {})
+    response.content = body if isinstance(body, bytes) else json.dumps(body).encode()
+    response.text = response.content.decode()
+    response.json.side_effect = lambda: json.loads(response.content)
+    return response
+
+
 @pytest.fixture
-def mock_urlopen():
-    with patch('app.services.channel_service.urlopen') as mock:
-        yield mock
+def mock_http():
+    with patch('app.services.channel_service.youtube_session') as mock:
+        yield mock.get
 
 
 @pytest.fixture
@@ -40,9 +67,9 @@ def test_extract_channel_name():
     assert extract_channel_name("invalid_url") is None
 
 
-def test_get_channel_id(mock_redis_client, mock_urlopen):
+def test_get_channel_id(mock_redis_client, mock_http):
     mock_redis_client.get.return_value = None
-    mock_urlopen.return_value.__enter__.return_value.read.return_value = b'''
+    mock_http.return_value = http_response(b'''
     {
         "items": [
             {
@@ -52,15 +79,15 @@ def test_get_channel_id(mock_redis_client, mock_urlopen):
             }
         ]
     }
-    '''
+    ''')
 
     channel_id = get_channel_id("drwaku")
     assert channel_id == "UCZf5IX90oe5gdPppMXGImwg"
 
 
-def test_get_channel_metadata(mock_redis_client, mock_urlopen):
+def test_get_channel_metadata(mock_redis_client, mock_http):
     mock_redis_client.get.return_value = None
-    mock_urlopen.return_value.__enter__.return_value.read.return_value = b'''
+    mock_http.return_value = http_response(b'''
     {
         "items": [
             {
@@ -71,16 +98,16 @@ def test_get_channel_metadata(mock_redis_client, mock_urlopen):
             }
         ]
     }
-    '''
+    ''')
 
     metadata = get_channel_metadata("UCZf5IX90oe5gdPppMXGImwg")
     assert metadata["id"] == "UCZf5IX90oe5gdPppMXGImwg"
     assert metadata["snippet"]["title"] == "Dr. Waku"
 
 
-def test_get_channel_info(mock_redis_client, mock_urlopen, mock_pinecone_index, mock_generate_embedding):
+def test_get_channel_info(mock_redis_client, mock_http, mock_pinecone_index, mock_generate_embedding):
     mock_redis_client.get.return_value = None
-    mock_urlopen.return_value.__enter__.return_value.read.return_value = b'''
+    mock_http.return_value = http_response(b'''
     {
         "items": [
             {
@@ -94,7 +121,7 @@ def test_get_channel_info(mock_redis_client, mock_urlopen, mock_pinecone_index,
             }
         ]
     }
-    '''
+    ''')
     mock_generate_embedding.return_value = [0.1] * 1536
     mock_pinecone_index.query.return_value = {
         "matches": [
@@ -113,7 +140,7 @@ def test_get_channel_info(mock_redis_client, mock_urlopen, mock_pinecone_index,
 
 
 @pytest.mark.parametrize("cache_hit", [True, False])
-def test_cached_api_call(mock_redis_client, mock_urlopen, cache_hit):
+def test_cached_api_call(mock_redis_client, mock_http, cache_hit):
     cache_key = "test_key"
     url = "https://api.example.com/data"
 
@@ -121,11 +148,287 @@ def test_cached_api_call(mock_redis_client, mock_urlopen, cache_hit):
         mock_redis_client.get.return_value = b'{"cached": "data"}'
         result = cached_api_call(cache_key, url)
         assert result == {"cached": "data"}
-        mock_urlopen.assert_not_called()
+        mock_http.assert_not_called()
     else:
         mock_redis_client.get.return_value = None
-        mock_urlopen.return_value.__enter__.return_value.read.return_value = b'{"fresh": "data"}'
+        mock_http.return_value = http_response({"fresh": "data"})
         result = cached_api_call(cache_key, url)
         assert result == {"fresh": "data"}
-        mock_urlopen.assert_called_once_with(url)
+        assert mock_http.call_args[0][0] == url
         mock_redis_client.setex.assert_called_once()
+
+
+def test_cached_api_call_coalesces_concurrent_misses(mock_http):
+    with patch('app.services.channel_service.redis_client') as mock_redis_client, \
+         patch('app.services.channel_service.admit'):
+        mock_redis_client.get.return_value = None
+        mock_http.return_value = http_response({"fresh": "data"})
+        mock_http.side_effect = lambda url, **kwargs: (time.sleep(0.2), mock_http.return_value)[1]
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            results = list(executor.map(lambda _: cached_api_call("test_key", "https://api.example.com/data"), range(5)))
+
+    assert results == [{"fresh": "data"}] * 5
+    mock_http.assert_called_once()
+
+
+def test_cached_api_call_force_refresh_does_not_join_earlier_fetch(mock_http):
+    started = threading.Event()
+    release = threading.Event()
+    responses = iter([{"stale": "data"}, {"fresh": "data"}])
+
+    def slow_get(url, **kwargs):
+        body = next(responses)
+        if body == {"stale": "data"}:
+            started.set()
+            release.wait(5)
+        return http_response(body)
+
+    with patch('app.services.channel_service.redis_client') as mock_redis_client, \
+         patch('app.services.channel_service.admit'), \
+         patch('app.services.channel_service.RedisLease') as mock_lease:
+        mock_redis_client.get.return_value = None
+        mock_redis_client.hgetall.return_value = {}
+        mock_lease.return_value.acquire.return_value = True
+        mock_http.side_effect = slow_get
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            earlier = executor.submit(cached_api_call, "test_key", "https://api.example.com/data")
+            assert started.wait(5)
+            forced = executor.submit(cached_api_call, "test_key", "https://api.example.com/data", force_refresh=True)
+            assert forced.result(timeout=5) == {"fresh": "data"}
+            release.set()
+            assert earlier.result(timeout=5) == {"stale": "data"}
+
+    assert mock_http.call_count == 2
+
+
+def test_cached_api_call_force_refresh_ignores_other_holders_result(mock_redis_client, mock_http):
+    # The lease is held elsewhere for one poll; the old cache entry must not be returned to a forced caller
+    mock_redis_client.get.return_value = b'{"old": "data"}'
+    mock_redis_client.set.side_effect = [None, True]
+    mock_http.return_value = http_response({"fresh": "data"})
+
+    assert cached_api_call("test_key", "https://api.example.com/data", force_refresh=True) == {"fresh": "data"}
+    mock_http.assert_called_once()
+
+
+def test_cached_api_call_waits_for_other_lock_holder(mock_redis_client, mock_http):
+    # Cache miss, no negative entry, lock held elsewhere, then the holder publishes the result
+    mock_redis_client.get.side_effect = [None, None, b'{"shared": "data"}']
+    mock_redis_client.set.return_value = None
+
+    result = cached_api_call("test_key", "https://api.example.com/data")
+    assert result == {"shared": "data"}
+    mock_http.assert_not_called()
+
+
+def test_cached_api_call_negative_caching(mock_redis_client, mock_http):
+    mock_redis_client.get.return_value = None
+    mock_http.side_effect = Exception("quotaExceeded")
+
+    assert cached_api_call("test_key", "https://api.example.com/data") is None
+    negative_key, _, payload = mock_redis_client.setex.call_args[0]
+    assert negative_key == "negative:test_key"
+    assert json.loads(payload) == {"error": "quotaExceeded"}
+
+    mock_redis_client.get.side_effect = lambda key: payload if key == "negative:test_key" else None
+    assert cached_api_call("test_key", "https://api.example.com/data") is None
+    mock_http.assert_called_once()
+
+
+def test_cached_api_call_stores_etag(mock_redis_client, mock_http):
+    mock_redis_client.get.return_value = None
+    mock_http.return_value = http_response({"fresh": "data"}, etag='"abc"')
+
+    assert cached_api_call("test_key", "https://api.example.com/data") == {"fresh": "data"}
+    assert mock_http.call_args[1]["headers"] is None
+    pipeline = mock_redis_client.pipeline.return_value
+    pipeline.hset.assert_called_once_with("etag:test_key", mapping={"etag": '"abc"', "body": '{"fresh": "data"}'})
+
+
+def test_cached_api_call_revalidates_with_etag(mock_redis_client, mock_http):
+    mock_redis_client.get.return_value = None
+    mock_redis_client.hgetall.return_value = {b"etag": b'"abc"', b"body": b'{"stored": "data"}'}
+    mock_http.return_value = http_response(b"", status_code=304)
+
+    assert cached_api_call("test_key", "https://api.example.com/data") == {"stored": "data"}
+    assert mock_http.call_args[1]["headers"] == {"If-None-Match": '"abc"'}
+    mock_http.return_value.json.assert_not_called()
+    mock_redis_client.setex.assert_called_once_with("test_key", 7 * 24 * 3600, '{"stored": "data"}')
+
+
+@patch('app.services.channel_service.record_quota_exhausted')
+def test_cached_api_call_quota_exceeded(mock_record, mock_redis_client, mock_http):
+    mock_redis_client.get.return_value = None
+    mock_http.return_value = http_response({"error": {"errors": [{"reason": "quotaExceeded"}]}}, status_code=403)
+
+    with pytest.raises(QuotaExceededError):
+        cached_api_call("test_key", "https://api.example.com/data")
+    mock_record.assert_called_once()
+
+
+@pytest.fixture
+def mock_refresh_task():
+    with patch('app.services.channel_service.refresh_channel_metadata_task') as mock, \
+         patch('app.services.channel_service.refresh_channels_metadata_task'):
+        yield mock
+
+
+def test_cached_channel_metadata_fresh_entry_from_l1(mock_redis_client, mock_refresh_task):
+    store_channel_metadata({"id": "UCZf5IX90oe5gdPppMXGImwg", "snippet": {"title": "Dr. Waku"}})
+    mock_redis_client.get.reset_mock()
+
+    metadata = get_cached_channel_metadata("UCZf5IX90oe5gdPppMXGImwg")
+    assert metadata["snippet"]["title"] == "Dr. Waku"
+    mock_redis_client.get.assert_not_called()
+    mock_refresh_task.delay.assert_not_called()
+
+
+def test_cached_channel_metadata_stale_entry_served_and_refreshed(mock_redis_client, mock_refresh_task):
+    stale_entry = {"metadata": {"id": "UCZf5IX90oe5gdPppMXGImwg", "snippet": {"title": "Dr. Waku"}}, "fetched_at": time.time() - 2 * 24 * 3600}
+    mock_redis_client.get.return_value = json.dumps(stale_entry)
+    mock_redis_client.set.return_value = True
+
+    metadata = get_cached_channel_metadata("UCZf5IX90oe5gdPppMXGImwg")
+    assert metadata["snippet"]["title"] == "Dr. Waku"
+    mock_refresh_task.delay.assert_called_once_with("UCZf5IX90oe5gdPppMXGImwg")
+
+
+def test_cached_channel_metadata_refresh_deduplicated(mock_redis_client, mock_refresh_task):
+    mock_redis_client.get.return_value = json.dumps({"id": "UCZf5IX90oe5gdPppMXGImwg", "snippet": {"title": "Legacy"}})
+    mock_redis_client.set.return_value = None  # A refresh is already queued
+
+    metadata = get_cached_channel_metadata("UCZf5IX90oe5gdPppMXGImwg")
+    assert metadata["snippet"]["title"] == "Legacy"
+    mock_refresh_task.delay.assert_not_called()
+
+
+@pytest.fixture
+def stale_bulk_entries(mock_redis_client):
+    stale_entry = {"metadata": {"id": "UC1", "snippet": {"title": "stale"}}, "fetched_at": time.time() - 2 * 24 * 3600}
+    mock_redis_client.mget.return_value = [json.dumps(stale_entry)] * 3
+    return mock_redis_client
+
+
+def test_get_channels_metadata_refreshes_only_unclaimed_stale_channels(stale_bulk_entries):
+    # UC2 already has a refresh queued by another reader
+    stale_bulk_entries.pipeline.return_value.execute.return_value = [True, None, True]
+    with patch('app.services.channel_service.refresh_channels_metadata_task') as mock_task:
+        metadata = get_channels_metadata(["UC1", "UC2", "UC3"])
+
+    assert len(metadata) == 3
+    mock_task.delay.assert_called_once_with(["UC1", "UC3"])
+
+
+def test_get_channels_metadata_survives_broker_errors(stale_bulk_entries):
+    stale_bulk_entries.pipeline.return_value.execute.return_value = [True, True, True]
+    with patch('app.services.channel_service.refresh_channels_metadata_task') as mock_task:
+        mock_task.delay.side_effect = ConnectionError("broker down")
+        metadata = get_channels_metadata(["UC1", "UC2", "UC3"])
+
+    assert len(metadata) == 3
+
+
+def test_refresh_task_leaves_lock_to_expire_after_success(mock_redis_client):
+    with patch('app.services.channel_service.get_channel_metadata', return_value={"id": "UC1", "snippet": {}}), \
+         patch('app.services.channel_service.store_channel_metadata'):
+        refresh_channel_metadata_task("UC1")
+
+    mock_redis_client.delete.assert_not_called()
+
+
+def test_refresh_task_releases_lock_on_failure(mock_redis_client):
+    with patch('app.services.channel_service.get_channel_metadata', side_effect=ValueError("bad response")):
+        with pytest.raises(ValueError):
+            refresh_channel_metadata_task("UC1")
+
+    mock_redis_client.delete.assert_called_once_with("metadata_refresh:UC1")
+
+
+def test_quota_deferral_stays_below_visibility_timeout(mock_redis_client):
+    error = QuotaExceededError("quota exhausted", retry_after=20 * 3600)
+    with patch('app.services.channel_service.fetch_channels_metadata', side_effect=error), \
+         patch.object(refresh_channels_metadata_task, 'retry', side_effect=RuntimeError("retry")) as mock_retry:
+        with pytest.raises(RuntimeError):
+            refresh_channels_metadata_task(["UC1"])
+
+    countdown = mock_retry.call_args[1]["countdown"]
+    assert countdown == settings.QUOTA_RETRY_MAX_COUNTDOWN
+    assert countdown < settings.BROKER_VISIBILITY_TIMEOUT
+
+
+@patch('app.services.channel_service.admit')
+def test_get_channels_metadata_uses_mget_and_groups_of_50(mock_admit, mock_redis_client, mock_http, mock_refresh_task):
+    channel_ids = [f"UC{i:03d}" for i in range(120)]
+    cached_entry = json.dumps({"metadata": {"id": "UC000", "snippet": {"title": "cached"}}, "fetched_at": time.time()})
+    mock_redis_client.mget.return_value = [cached_entry] + [None] * 119
+
+    def get_side_effect(url, **kwargs):
+        requested = parse_qs(urlparse(url).query)["id"][0].split(",")
+        return http_response({"items": [{"id": channel_id, "snippet": {"title": channel_id}} for channel_id in requested]})
+    mock_http.side_effect = get_side_effect
+
+    metadata = get_channels_metadata(channel_ids)
+
+    assert len(metadata) == 120
+    assert metadata["UC000"]["snippet"]["title"] == "cached"
+    mock_redis_client.mget.assert_called_once()
+    # 119 misses -> 3 requests of at most 50 IDs
+    assert mock_http.call_count == 3
+    assert mock_redis_client.pipeline.return_value.setex.call_count == 119
+    assert mock_admit.call_count == 3
+    mock_refresh_task.delay.assert_not_called()
+
+
+def responses_by_endpoint(payloads_by_endpoint):
+    def side_effect(url, **kwargs):
+        endpoint = next(key for key in payloads_by_endpoint if key in url)
+        return http_response(payloads_by_endpoint[endpoint])
+    return side_effect
+
+
+def test_resolve_channel_handle_uses_exact_lookup(mock_redis_client, mock_http):
+    mock_redis_client.get.return_value = None
+    mock_http.side_effect = responses_by_endpoint({"forHandle=": {"items": [{"id": "UCZf5IX90oe5gdPppMXGImwg"}]}})
+
+    assert resolve_channel_handle("@DrWaku") == "UCZf5IX90oe5gdPppMXGImwg"
+    mock_http.assert_called_once()
+    assert "forHandle=%40drwaku" in mock_http.call_args[0][0]
+    pipeline = mock_redis_client.pipeline.return_value
+    pipeline.set.assert_any_call("channel_handle:drwaku", "UCZf5IX90oe5gdPppMXGImwg")
+    pipeline.set.assert_any_call("channel_handle_reverse:UCZf5IX90oe5gdPppMXGImwg", "drwaku")
+
+
+def test_resolve_channel_handle_cached_mapping(mock_redis_client, mock_http):
+    mock_redis_client.get.side_effect = lambda key: b"UCZf5IX90oe5gdPppMXGImwg" if key == "channel_handle:drwaku" else None
+
+    assert resolve_channel_handle("drwaku") == "UCZf5IX90oe5gdPppMXGImwg"
+    mock_http.assert_not_called()
+
+
+def test_resolve_channel_handle_falls_back_to_search(mock_redis_client, mock_http):
+    mock_redis_client.get.return_value = None
+    mock_http.side_effect = responses_by_endpoint({
+        "forHandle=": {"items": []},
+        "forUsername=": {"items": []},
+        "/search?": {"items": [{"id": {"kind": "youtube#channel", "channelId": "UCZf5IX90oe5gdPppMXGImwg"}}]}
+    })
+
+    assert resolve_channel_handle("drwaku") == "UCZf5IX90oe5gdPppMXGImwg"
+    assert mock_http.call_count == 3
+    # A fuzzy search hit is never stored as the handle's permanent mapping
+    mock_redis_client.pipeline.return_value.set.assert_not_called()
+
+
+def test_search_channel_id_tolerates_results_without_ids(mock_redis_client, mock_http):
+    mock_redis_client.get.return_value = None
+    mock_http.side_effect = responses_by_endpoint({"/search?": {"items": [{"snippet": {}}, {"id": "unexpected"}]}})
+
+    assert search_channel_id("dr waku") is None
+
+
+def test_channel_url_with_id_needs_no_lookup(mock_redis_client, mock_http):
+    channel_id, _, _ = get_channel_id_from_name_or_url(channel_url="https://www.youtube.com/channel/UCZf5IX90oe5gdPppMXGImwg")
+    assert channel_id == "UCZf5IX90oe5gdPppMXGImwg"
+    mock_http.assert_not_called()
@@ -0,0 +1,53 @@
+# tests/unit/test_clients.py
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from app.core import clients
+from app.core.clients import register_client, get_client, reset_clients, warm_up_clients, LazyClient
+
+
+@pytest.fixture
+def factory():
+    factory = MagicMock(side_effect=lambda: MagicMock())
+    register_client("test_client", factory, ping=lambda client: client.ping())
+    reset_clients()
+    yield factory
+    reset_clients()
+
+
+def test_client_is_created_on_first_use_only(factory):
+    proxy = LazyClient("test_client")
+    factory.assert_not_called()
+
+    proxy.query("x")
+    proxy.query("y")
+
+    factory.assert_called_once()
+    assert get_client("test_client").query.call_count == 2
+
+
+def test_forked_process_gets_its_own_client(factory):
+    parent_client = get_client("test_client")
+    with patch('app.core.clients.os.getpid', return_value=clients._pid + 1):
+        child_client = get_client("test_client")
+
+    assert child_client is not parent_client
+    assert factory.call_count == 2
+
+
+def test_warm_up_pings_and_tolerates_failures(factory):
+    register_client("broken_client", MagicMock(side_effect=ConnectionError("down")))
+
+    warm_up_clients(["test_client", "broken_client"])
+
+    get_client("test_client").ping.assert_called_once()
+
+
+def test_patching_the_stand_in_does_not_build_the_client(factory):
+    module = SimpleNamespace(index=LazyClient("test_client"))
+
+    with patch.object(module, 'index') as mock_index:
+        module.index.query("x")
+
+    mock_index.query.assert_called_once_with("x")
+    factory.assert_not_called()
@@ -0,0 +1,39 @@
+# tests/unit/test_dead_letter_service.py
+import json
+import pytest
+from unittest.mock import patch
+from app.services.dead_letter_service import add_dead_letter, list_dead_letters, get_dead_letter
+
+
+@pytest.fixture
+def mock_redis_client():
+    with patch('app.services.dead_letter_service.redis_client') as mock:
+        yield mock
+
+
+def test_add_dead_letter_indexes_by_time(mock_redis_client):
+    add_dead_letter("video1", "UC1", "boom", "permanent", 1, job_id="job-1")
+    pipeline = mock_redis_client.pipeline.return_value
+    field, value = pipeline.hset.call_args[0][1:]
+    assert field == "video1"
+    assert json.loads(value)["job_id"] == "job-1"
+    pipeline.zadd.assert_called_once()
+    pipeline.execute.assert_called_once()
+
+
+def test_list_dead_letters(mock_redis_client):
+    entry = {"video_id": "video1", "channel_id": "UC1", "error": "boom", "error_class": "transient", "attempts": 5, "failed_at": 1.0}
+    mock_redis_client.zrevrange.return_value = [b"video1", b"video2"]
+    mock_redis_client.zcard.return_value = 2
+    # video2 was replayed between the two reads
+    mock_redis_client.hmget.return_value = [json.dumps(entry).encode(), None]
+
+    entries, total = list_dead_letters(limit=10)
+    assert entries == [entry]
+    assert total == 2
+    mock_redis_client.zrevrange.assert_called_once_with("dead_letters:by_time", 0, 9)
+
+
+def test_get_dead_letter_missing(mock_redis_client):
+    mock_redis_client.hget.return_value = None
+    assert get_dead_letter("video1") is None
@@ -0,0 +1,12 @@
+# tests/unit/test_http_client.py
+from app.core.config import settings
+from app.core.http_client import create_youtube_session
+
+
+def test_create_youtube_session_pools_and_compresses():
+    session = create_youtube_session()
+
+    adapter = session.get_adapter("https://www.googleapis.com/youtube/v3/channels")
+    assert adapter._pool_maxsize == settings.YOUTUBE_HTTP_POOL_SIZE
+    assert session.headers['Accept-Encoding'] == 'gzip'
+    assert 'gzip' in session.headers['User-Agent']
@@ -0,0 +1,146 @@
+# tests/unit/test_job_service.py
+import pytest
+import time
+from unittest.mock import patch
+from app.core.config import settings
+from app.services.job_service import (
+    claim_channel_job,
+    finish_job,
+    finish_job_if_complete,
+    finish_chunk_range,
+    lost_embedding_videos,
+    get_job,
+    job_progress,
+    default_priority,
+    get_recent_channel_run,
+    queue_for_priority
+)
+
+
+@pytest.fixture
+def mock_redis_client():
+    with patch('app.services.job_service.redis_client') as mock:
+        yield mock
+
+
+def job_record(status, total=10, processed=4):
+    return {
+        b'job_id': b'job-1', b'channel_id': b'UC1', b'priority': b'normal', b'status': status.encode(),
+        b'video_limit': b'10', b'total': str(total).encode(), b'processed': str(processed).encode(),
+        b'updated_at': str(time.time()).encode()
+    }
+
+
+def test_queue_for_priority():
+    assert queue_for_priority("high") == "channel-high"
+    assert queue_for_priority("normal") == "celery"
+    assert queue_for_priority("backfill") == "channel-backfill"
+    assert queue_for_priority("unknown") == "celery"
+
+
+def test_large_requests_default_to_backfill():
+    assert default_priority(5) == "normal"
+    assert default_priority(1000) == "backfill"
+
+
+def test_get_job_decodes_record(mock_redis_client):
+    mock_redis_client.hgetall.return_value = job_record("PROGRESS")
+    job = get_job("job-1")
+    assert job['channel_id'] == "UC1"
+    assert job['processed'] == 4
+    assert job_progress(job) == 40.0
+
+
+def test_claim_channel_job_registers_new_job(mock_redis_client):
+    mock_redis_client.set.return_value = True
+    assert claim_channel_job("job-1", "UC1", 10, "normal") is None
+    mock_redis_client.set.assert_called_once_with("active_job:UC1", "job-1", nx=True, ex=settings.JOB_RECORD_TTL)
+
+
+def test_claim_channel_job_returns_active_job(mock_redis_client):
+    mock_redis_client.set.return_value = False
+    mock_redis_client.get.return_value = b"job-1"
+    mock_redis_client.hgetall.return_value = job_record("PROGRESS")
+    assert claim_channel_job("job-2", "UC1", 10, "normal")['job_id'] == "job-1"
+    mock_redis_client.delete.assert_called_once_with("job:job-2")
+
+
+def test_claim_channel_job_replaces_stale_job(mock_redis_client):
+    mock_redis_client.set.side_effect = [False, True]
+    mock_redis_client.get.return_value = b"job-1"
+    stale = job_record("PROGRESS")
+    stale[b'updated_at'] = str(time.time() - settings.JOB_STALE_AFTER - 1).encode()
+    mock_redis_client.hgetall.return_value = stale
+    with patch('app.services.job_service.finish_job') as mock_finish_job:
+        assert claim_channel_job("job-2", "UC1", 10, "normal") is None
+    mock_finish_job.assert_called_once_with("job-1", "UC1", status='FAILED', error="Replaced by job job-2")
+
+
+def test_claim_channel_job_force_replaces_active_job(mock_redis_client):
+    mock_redis_client.set.side_effect = [False, True]
+    mock_redis_client.get.return_value = b"job-1"
+    mock_redis_client.hgetall.return_value = job_record("PROGRESS")
+    with patch('app.services.job_service.finish_job') as mock_finish_job:
+        assert claim_channel_job("job-2", "UC1", 10, "normal", force=True) is None
+    mock_finish_job.assert_called_once_with("job-1", "UC1", status='FAILED', error="Replaced by job job-2")
+
+
+def test_claim_channel_job_replaces_finished_job(mock_redis_client):
+    mock_redis_client.set.side_effect = [False, True]
+    mock_redis_client.get.return_value = b"job-1"
+    mock_redis_client.hgetall.return_value = job_record("SUCCESS")
+    assert claim_channel_job("job-2", "UC1", 10, "normal") is None
+    mock_redis_client.eval.assert_called_once()
+    assert mock_redis_client.eval.call_args[0][2:] == ("active_job:UC1", "job-1")
+
+
+def test_get_recent_channel_run(mock_redis_client):
+    mock_redis_client.hgetall.return_value = {b'processed_at': str(time.time()).encode(), b'video_limit': b'50', b'job_id': b'job-1'}
+    assert get_recent_channel_run("UC1", 20)['job_id'] == "job-1"
+    # A bigger request than the last run still needs processing
+    assert get_recent_channel_run("UC1", 100) is None
+
+
+def test_finish_job_only_clears_its_own_claim(mock_redis_client):
+    finish_job("job-1", "UC1", status="FAILED", error="boom")
+    # Clearing the active pointer is conditional on it still naming this job
+    assert mock_redis_client.eval.call_args[0][2:] == ("active_job:UC1", "job-1")
+    mock_redis_client.hset.assert_called_once()
+
+
+def test_finish_job_if_complete_waits_for_embedding_videos(mock_redis_client):
+    mock_redis_client.hgetall.side_effect = [job_record("PROGRESS", processed=10), {b'video1': b'done', b'video2': b'embedding'}]
+    mock_redis_client.exists.return_value = 1
+    assert finish_job_if_complete("job-1", "UC1") is False
+    mock_redis_client.exists.assert_called_once_with("embedding:video2")
+    mock_redis_client.eval.assert_not_called()
+
+
+def test_finish_job_if_complete_ignores_expired_markers(mock_redis_client):
+    mock_redis_client.hgetall.side_effect = [job_record("PROGRESS", processed=10), {b'video2': b'embedding'}, job_record("SUCCESS", processed=10)]
+    mock_redis_client.exists.return_value = 0
+    assert finish_job_if_complete("job-1", "UC1") is True
+    mock_redis_client.eval.assert_called_once()
+
+
+def test_finish_job_if_complete_skips_unfinished_jobs(mock_redis_client):
+    mock_redis_client.hgetall.return_value = job_record("PROGRESS", processed=4)
+    assert finish_job_if_complete("job-1", "UC1") is False
+    mock_redis_client.eval.assert_not_called()
+
+
+def test_finish_chunk_range_reports_only_the_last_range(mock_redis_client):
+    pipeline = mock_redis_client.pipeline.return_value
+    pipeline.execute.side_effect = [[1, 1], [1, 0], [0, 0]]
+
+    assert finish_chunk_range("video1", 0) is False
+    assert finish_chunk_range("video1", 50) is True
+    # A redelivered range that was already counted doesn't finalize the video again
+    assert finish_chunk_range("video1", 50) is False
+    pipeline.srem.assert_called_with("chunk_ranges:video1", 50)
+
+
+def test_lost_embedding_videos_are_those_whose_marker_expired(mock_redis_client):
+    mock_redis_client.hgetall.return_value = {b'video1': b'done', b'video2': b'embedding', b'video3': b'embedding'}
+    mock_redis_client.pipeline.return_value.execute.return_value = [1, 0]
+    assert lost_embedding_videos("job-1") == ["video3"]
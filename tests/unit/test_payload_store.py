@@ -0,0 +1,39 @@
+# tests/unit/test_payload_store.py
+import zlib
+import pytest
+from unittest.mock import patch
+from app.core.config import settings
+from app.services.payload_store import put_payload, get_payload, release_payload, payload_key
+
+
+@pytest.fixture
+def mock_redis_client():
+    with patch('app.services.payload_store.redis_client') as mock:
+        yield mock
+
+
+def test_put_payload_stores_compressed_by_content(mock_redis_client):
+    key = put_payload("a long transcript " * 100)
+
+    assert key == payload_key(("a long transcript " * 100).encode('utf-8'))
+    assert put_payload("a long transcript " * 100) == key
+    pipeline = mock_redis_client.pipeline.return_value
+    stored_key, blob = pipeline.set.call_args[0]
+    assert stored_key == key
+    assert zlib.decompress(blob).decode('utf-8') == "a long transcript " * 100
+    assert pipeline.set.call_args[1] == {"nx": True, "ex": settings.PAYLOAD_TTL}
+    pipeline.incr.assert_called_with(f"{key}:refs")
+
+
+def test_get_payload(mock_redis_client):
+    mock_redis_client.get.return_value = zlib.compress(b"transcript")
+    assert get_payload("payload:abc") == "transcript"
+
+    mock_redis_client.get.return_value = None
+    assert get_payload("payload:abc") is None
+
+
+def test_release_payload(mock_redis_client):
+    release_payload("payload:abc")
+    args = mock_redis_client.eval.call_args[0]
+    assert args[1:] == (2, "payload:abc", "payload:abc:refs")
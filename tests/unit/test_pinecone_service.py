@@ -1,6 +1,11 @@
 # tests/unit/test_pinecone_service.py
 import pytest
 from app.utils.embedding_utils import generate_embedding
+from tenacity import wait_none
+from app.services.pinecone_service import (
+    retrieve_relevant_transcripts_batch, store_embeddings, batch_vectors, upsert_batch, UpsertBatchError, ensure_index
+)
+from app.core.config import settings
 from unittest.mock import MagicMock
 
 
@@ -68,7 +73,17 @@ def test_generate_embedding(mock_openai):
     embedding = generate_embedding(text)
 
     assert len(embedding) == 1536
-    mock_openai.assert_called_once_with(input=text, model="text-embedding-3-small")
+    mock_openai.assert_called_once_with(input=text, model="text-embedding-3-small", dimensions=1536)
+
+
+def test_generate_embedding_uses_configured_dimensions(mock_openai, monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSIONS", 512)
+    mock_openai.return_value.data = [MagicMock(embedding=[0.1] * 512)]
+
+    assert len(generate_embedding("Test text")) == 512
+    assert mock_openai.call_args[1]["dimensions"] == 512
+    generate_embedding("Test text", model="text-embedding-ada-002")
+    assert "dimensions" not in mock_openai.call_args[1]
 
 
 # @pytest.mark.parametrize("channel_id,expected", [
@@ -84,3 +99,110 @@ def test_generate_embedding(mock_openai):
 
 #     assert result == expected
 #     mock_pinecone.query.assert_called_once()
+
+
+def test_retrieve_relevant_transcripts_batch(mocker):
+    mock_embed = mocker.patch('app.services.pinecone_service.generate_embeddings_batch', return_value=[[0.1] * 1536, [0.2] * 1536])
+    mocker.patch('app.services.pinecone_service.channel_exists_in_index', return_value=True)
+    mock_index = mocker.patch('app.services.pinecone_service.index')
+    mock_index.query.side_effect = lambda vector, **kwargs: {
+        "matches": [{"id": "videoA_1" if vector[0] == 0.1 else "videoB_0", "score": 0.9, "metadata": {"text": "hit"}}]
+    }
+    mock_index.fetch.return_value = {"vectors": {
+        "videoA_0": {"metadata": {"text": "A0"}},
+        "videoA_2": {"metadata": {"text": "A2"}},
+        "videoB_1": {"metadata": {"text": "B1"}}
+    }}
+
+    results = retrieve_relevant_transcripts_batch(["q1", "q2"], ["channel_a", "channel_b"], limit=1, context_window=1)
+
+    mock_embed.assert_called_once_with(["q1", "q2"])
+    assert mock_index.query.call_count == 2
+    mock_index.fetch.assert_called_once()
+    assert results[0][0]["context_before"] == ["A0"]
+    assert results[0][0]["context_after"] == ["A2"]
+    assert results[1][0]["context_before"] == []
+    assert results[1][0]["context_after"] == ["B1"]
+
+
+def test_store_embeddings_resumes_from_start_index(mocker):
+    mock_upsert = mocker.patch('app.services.pinecone_service.index').upsert
+    mocker.patch('app.services.pinecone_service.bump_channel_version')
+    mock_record = mocker.patch('app.services.pinecone_service.record_recent_chunks')
+    checkpoints = []
+
+    store_embeddings("test_channel", "test_video", ["chunk2", "chunk3"], [[0.1] * 4, [0.2] * 4],
+                     start_index=2, on_batch_stored=checkpoints.append)
+
+    vectors = mock_upsert.call_args[1]["vectors"]
+    assert [vector[0] for vector in vectors] == ["test_video_2", "test_video_3"]
+    assert vectors[0][2]["chunk_index"] == 2
+    assert checkpoints == [4]
+    mock_record.assert_called_once_with("test_channel", "test_video", 2, 4)
+
+
+def test_batch_vectors_respects_size_and_count():
+    vectors = [(f"v_{i}", [0.1] * 4, {"text": "x" * 100}) for i in range(5)]
+    assert [len(batch) for batch in batch_vectors(vectors, max_vectors=2)] == [2, 2, 1]
+    assert [len(batch) for batch in batch_vectors(vectors, max_bytes=200)] == [1] * 5
+
+
+@pytest.fixture
+def single_vector_batches(mocker):
+    mocker.patch('app.services.pinecone_service.batch_vectors', side_effect=lambda vectors: [[vector] for vector in vectors])
+    mocker.patch('app.services.pinecone_service.upsert_batch', upsert_batch.retry_with(wait=wait_none()))
+    mocker.patch('app.services.pinecone_service.record_recent_chunks')
+    return mocker.patch('app.services.pinecone_service.bump_channel_version')
+
+
+def test_store_embeddings_upserts_batches_concurrently(mocker, single_vector_batches):
+    mock_upsert = mocker.patch('app.services.pinecone_service.index').upsert
+    checkpoints = []
+
+    store_embeddings("test_channel", "test_video", ["c0", "c1", "c2"], [[0.1] * 4] * 3, on_batch_stored=checkpoints.append)
+
+    assert mock_upsert.call_count == 3
+    assert checkpoints[-1] == 3
+    assert checkpoints == sorted(checkpoints)
+    single_vector_batches.assert_called_once_with("test_channel")
+
+
+def test_store_embeddings_reports_failed_batches(mocker, single_vector_batches):
+    def upsert(vectors):
+        if vectors[0][0] == "test_video_1":
+            raise ConnectionError("reset")
+    mock_upsert = mocker.patch('app.services.pinecone_service.index').upsert
+    mock_upsert.side_effect = upsert
+    checkpoints = []
+
+    with pytest.raises(UpsertBatchError) as excinfo:
+        store_embeddings("test_channel", "test_video", ["c0", "c1", "c2"], [[0.1] * 4] * 3, on_batch_stored=checkpoints.append)
+
+    assert excinfo.value.failed_batches == [(1, 1, "reset")]
+    assert "chunks 1-1" in str(excinfo.value)
+    # The failed batch is retried on its own, three attempts in total rather than nine
+    assert mock_upsert.call_count == 2 + 3
+    # Chunk 2 was stored, but the checkpoint can't move past the gap at chunk 1
+    assert checkpoints == [1]
+    assert excinfo.value.stored == 1
+    single_vector_batches.assert_not_called()
+
+
+@pytest.mark.parametrize("dimension,expected", [(512, True), (1536, False)])
+def test_ensure_index_checks_existing_dimension(mocker, monkeypatch, dimension, expected):
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSIONS", 512)
+    pc = mocker.patch('app.services.pinecone_service.create_pinecone').return_value
+    pc.list_indexes.return_value.names.return_value = [settings.PINECONE_INDEX_NAME]
+    pc.describe_index.return_value.dimension = dimension
+
+    assert ensure_index() is expected
+    pc.create_index.assert_not_called()
+
+
+def test_ensure_index_creates_missing_index(mocker, monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSIONS", 512)
+    pc = mocker.patch('app.services.pinecone_service.create_pinecone').return_value
+    pc.list_indexes.return_value.names.return_value = []
+
+    assert ensure_index() is True
+    assert pc.create_index.call_args[1]["dimension"] == 512
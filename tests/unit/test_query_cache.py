@@ -0,0 +1,62 @@
+# tests/unit/test_query_cache.py
+import pytest
+from unittest.mock import patch
+from app.core.config import settings
+from app.services import query_cache
+from app.services.query_cache import (
+    normalize_query,
+    get_cached_embedding,
+    cache_embedding,
+    relevant_chunks_cache_key,
+    bump_channel_version
+)
+
+
+@pytest.fixture
+def mock_redis_client():
+    with patch('app.services.query_cache.redis_client') as mock:
+        yield mock
+
+
+@pytest.fixture
+def enable_query_cache():
+    query_cache.embedding_lru.clear()
+    with patch.object(settings, "QUERY_CACHE_ENABLED", True):
+        yield
+    query_cache.embedding_lru.clear()
+
+
+def test_normalize_query():
+    assert normalize_query("  What does he think   about AGI? ") == "what does he think about agi?"
+
+
+def test_embedding_cache_round_trip(mock_redis_client, enable_query_cache):
+    cache_embedding("AI ethics", [0.5, 0.25])
+    stored_key, ttl, stored_value = mock_redis_client.setex.call_args[0]
+    assert ttl == settings.QUERY_EMBEDDING_CACHE_TTL
+
+    # A fresh process only has Redis to go on
+    query_cache.embedding_lru.clear()
+    mock_redis_client.get.return_value = stored_value
+    assert get_cached_embedding("ai   ETHICS") == [0.5, 0.25]
+    mock_redis_client.get.assert_called_once_with(stored_key)
+
+
+def test_embedding_cache_disabled(mock_redis_client):
+    cache_embedding("AI ethics", [0.5, 0.25])
+    assert get_cached_embedding("AI ethics") is None
+    mock_redis_client.setex.assert_not_called()
+
+
+def test_result_key_changes_with_channel_version(mock_redis_client, enable_query_cache):
+    mock_redis_client.mget.return_value = [b"1"]
+    first_key = relevant_chunks_cache_key("AI ethics", ["channel_a"], 5, 1)
+    mock_redis_client.mget.return_value = [b"2"]
+    second_key = relevant_chunks_cache_key("AI ethics", ["channel_a"], 5, 1)
+    assert first_key != second_key
+
+
+def test_bump_channel_version(mock_redis_client):
+    mock_redis_client.incr.return_value = 3
+    assert bump_channel_version("channel_a") == 3
+    mock_redis_client.incr.assert_called_once_with("channel_version:channel_a")
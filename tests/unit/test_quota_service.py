@@ -0,0 +1,61 @@
+# tests/unit/test_quota_service.py
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from app.services.quota_service import (
+    admit,
+    endpoint_for_url,
+    priority_limits,
+    quota_window,
+    get_quota_status,
+    QuotaExceededError,
+    QUOTA_TIMEZONE
+)
+
+
+@pytest.fixture
+def mock_redis_client():
+    with patch('app.services.quota_service.redis_client') as mock:
+        yield mock
+
+
+def test_quota_window_resets_at_pacific_midnight():
+    day, resets_in = quota_window(datetime(2024, 3, 1, 23, 0, tzinfo=QUOTA_TIMEZONE))
+    assert day == "2024-03-01"
+    assert resets_in == 3600
+
+
+def test_endpoint_for_url():
+    assert endpoint_for_url("https://www.googleapis.com/youtube/v3/search?part=snippet&q=drwaku") == "search"
+    assert endpoint_for_url("https://www.googleapis.com/youtube/v3/channels?id=UC1&part=id") == "channels"
+
+
+def test_priority_limits_reserve_budget_for_higher_priorities():
+    limits = priority_limits()
+    assert limits["high"] > limits["normal"] > limits["low"]
+
+
+def test_admit_charges_endpoint_cost(mock_redis_client):
+    mock_redis_client.eval.return_value = 100
+    admit("search", "high")
+    args = mock_redis_client.eval.call_args[0]
+    # cost, limit for the priority, key ttl, endpoint
+    assert args[4] == 100
+    assert args[5] == priority_limits()["high"]
+    assert args[7] == "search"
+
+
+def test_admit_denies_when_budget_exhausted(mock_redis_client):
+    mock_redis_client.eval.return_value = -1
+    with pytest.raises(QuotaExceededError) as error:
+        admit("channels", "low")
+    assert error.value.retry_after > 0
+
+
+def test_get_quota_status(mock_redis_client):
+    mock_redis_client.get.return_value = b"250"
+    mock_redis_client.hgetall.return_value = {b"search": b"200", b"channels": b"50"}
+    status = get_quota_status()
+    assert status["used"] == 250
+    assert status["remaining"] == status["limit"] - 250
+    assert status["used_by_endpoint"] == {"search": 200, "channels": 50}
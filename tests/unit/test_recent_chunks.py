@@ -0,0 +1,49 @@
+# tests/unit/test_recent_chunks.py
+import pytest
+from unittest.mock import patch
+from app.core.config import settings
+from app.services.recent_chunks import record_recent_chunks, get_recent_chunk_ids, chunk_score
+
+
+@pytest.fixture
+def mock_redis_client():
+    with patch('app.services.recent_chunks.redis_client') as mock:
+        yield mock
+
+
+def test_chunk_score_orders_by_publish_time_then_chunk():
+    assert chunk_score(1_700_000_000, 3) < chunk_score(1_700_000_000, 4) < chunk_score(1_700_000_060, 0)
+    # Exact as a double, so Redis keeps the ordering
+    assert float(chunk_score(4_000_000_000, 9_999, 9_999)) == chunk_score(4_000_000_000, 9_999, 9_999)
+
+
+def test_chunk_score_keeps_videos_with_the_same_publish_time_apart():
+    older = [chunk_score(1_700_000_000, i, published_rank=0) for i in range(50)]
+    newer = [chunk_score(1_700_000_000, i, published_rank=1) for i in range(3)]
+    assert max(older) < min(newer)
+
+
+def test_record_recent_chunks_uses_listing_publish_time(mock_redis_client):
+    with patch('app.services.recent_chunks.get_video_metadata', return_value={"v1": {"published_at": 1_700_000_000.5, "published_rank": 2}}):
+        record_recent_chunks("UC1", "v1", 2, 4)
+
+    pipeline = mock_redis_client.pipeline.return_value
+    pipeline.zadd.assert_called_once_with("recent_chunks:UC1", {
+        "v1_2": chunk_score(1_700_000_000, 2, 2),
+        "v1_3": chunk_score(1_700_000_000, 3, 2)
+    })
+    pipeline.zremrangebyrank.assert_called_once_with("recent_chunks:UC1", 0, -settings.RECENT_CHUNKS_PER_CHANNEL - 1)
+
+
+def test_record_recent_chunks_sorts_unlisted_videos_last(mock_redis_client):
+    with patch('app.services.recent_chunks.get_video_metadata', return_value={}):
+        record_recent_chunks("UC1", "v1", 0, 1)
+
+    mock_redis_client.pipeline.return_value.zadd.assert_called_once_with("recent_chunks:UC1", {"v1_0": 0})
+
+
+def test_get_recent_chunk_ids(mock_redis_client):
+    mock_redis_client.zrevrange.return_value = [b"v2_0", b"v1_5"]
+
+    assert get_recent_chunk_ids("UC1", 2) == ["v2_0", "v1_5"]
+    mock_redis_client.zrevrange.assert_called_once_with("recent_chunks:UC1", 0, 1)
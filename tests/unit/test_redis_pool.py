@@ -0,0 +1,30 @@
+# tests/unit/test_redis_pool.py
+import ssl
+from unittest.mock import patch
+from app.core.config import settings
+from app.core.redis_pool import create_redis_client
+
+
+def test_create_redis_client_uses_one_bounded_pool():
+    with patch('app.core.redis_pool.redis.BlockingConnectionPool.from_url') as mock_from_url, \
+         patch('app.core.redis_pool.redis.Redis') as mock_redis, \
+         patch.object(settings, "REDIS_URL", "rediss://redis.example.com:6379/0"):
+        client = create_redis_client()
+
+    url, = mock_from_url.call_args[0]
+    options = mock_from_url.call_args[1]
+    assert url == "rediss://redis.example.com:6379/0"
+    assert options['max_connections'] == settings.REDIS_MAX_CONNECTIONS
+    assert options['health_check_interval'] == settings.REDIS_HEALTH_CHECK_INTERVAL
+    assert options['ssl_cert_reqs'] == ssl.CERT_NONE
+    mock_redis.assert_called_once_with(connection_pool=mock_from_url.return_value)
+    assert client is mock_redis.return_value
+
+
+def test_create_redis_client_without_tls():
+    with patch('app.core.redis_pool.redis.BlockingConnectionPool.from_url') as mock_from_url, \
+         patch('app.core.redis_pool.redis.Redis'), \
+         patch.object(settings, "REDIS_URL", "redis://localhost:6379/0"):
+        create_redis_client()
+
+    assert 'ssl_cert_reqs' not in mock_from_url.call_args[1]
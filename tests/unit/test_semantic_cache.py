@@ -0,0 +1,34 @@
+# tests/unit/test_semantic_cache.py
+from app.services.semantic_cache import SemanticCache
+
+SCOPE = (("channel_a",), (1,), 5, 1)
+RESULT = [{"main_chunk": "views on AGI", "context_before": [], "context_after": [], "score": 0.8}]
+
+
+def test_semantic_cache_serves_near_duplicate_queries():
+    cache = SemanticCache(capacity=4, threshold=0.95, max_scopes=8)
+    cache.add(SCOPE, [1.0, 0.0, 0.0], RESULT)
+
+    assert cache.lookup(SCOPE, [0.99, 0.05, 0.0]) == RESULT
+    assert cache.lookup(SCOPE, [0.0, 1.0, 0.0]) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_semantic_cache_is_scoped():
+    cache = SemanticCache(capacity=4, threshold=0.95, max_scopes=8)
+    cache.add(SCOPE, [1.0, 0.0], RESULT)
+
+    # A bumped channel version is a different scope
+    assert cache.lookup((("channel_a",), (2,), 5, 1), [1.0, 0.0]) is None
+
+
+def test_semantic_cache_ring_buffer_evicts_oldest():
+    cache = SemanticCache(capacity=2, threshold=0.99, max_scopes=8)
+    cache.add(SCOPE, [1.0, 0.0, 0.0], [{"main_chunk": "first"}])
+    cache.add(SCOPE, [0.0, 1.0, 0.0], [{"main_chunk": "second"}])
+    cache.add(SCOPE, [0.0, 0.0, 1.0], [{"main_chunk": "third"}])
+
+    assert cache.lookup(SCOPE, [1.0, 0.0, 0.0]) is None
+    assert cache.lookup(SCOPE, [0.0, 0.0, 1.0]) == [{"main_chunk": "third"}]
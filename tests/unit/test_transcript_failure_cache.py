@@ -0,0 +1,39 @@
+# tests/unit/test_transcript_failure_cache.py
+import json
+import pytest
+from unittest.mock import patch
+from app.core.config import settings
+from app.services.transcript_failure_cache import (
+    record_transcript_failure,
+    get_transcript_failure_counts
+)
+
+
+class TranscriptsDisabled(Exception):
+    pass
+
+
+@pytest.fixture
+def mock_redis_client():
+    with patch('app.services.transcript_failure_cache.redis_client') as mock:
+        yield mock
+
+
+@pytest.mark.parametrize("error,failure_class,ttl", [
+    (TranscriptsDisabled("captions off"), "permanent", settings.TRANSCRIPT_FAILURE_PERMANENT_TTL),
+    (None, "permanent", settings.TRANSCRIPT_FAILURE_PERMANENT_TTL),
+    (TimeoutError("timed out"), "transient", settings.TRANSCRIPT_FAILURE_TRANSIENT_TTL),
+])
+def test_record_transcript_failure_ttl(mock_redis_client, error, failure_class, ttl):
+    record_transcript_failure("video1", "UC1", error)
+    pipeline = mock_redis_client.pipeline.return_value
+    key, value = pipeline.set.call_args[0]
+    assert key == "transcript_unavailable:video1"
+    assert json.loads(value)["failure_class"] == failure_class
+    assert pipeline.set.call_args[1] == {"ex": ttl}
+    assert pipeline.zadd.call_args[0][0] == f"transcript_unavailable:channel:UC1:{failure_class}"
+
+
+def test_get_transcript_failure_counts(mock_redis_client):
+    mock_redis_client.zcount.side_effect = [4, 1]
+    assert get_transcript_failure_counts("UC1") == {"permanent": 4, "transient": 1}
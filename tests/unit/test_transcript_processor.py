@@ -1,6 +1,14 @@
 # tests/unit/test_transcript_processor.py
 import pytest
-from app.services.transcript_processor import process_transcript, split_into_chunks
+from app.core.config import settings
+from app.services.transcript_processor import (
+    process_transcript,
+    chunk_transcript,
+    split_into_chunks,
+    dispatch_chunk_ranges,
+    embed_chunk_range,
+    finalize_chunked_video
+)
 from unittest.mock import patch
 
 
@@ -22,7 +30,8 @@ def test_process_transcript(mock_generate_embeddings, mock_store_embeddings):
 
     mock_generate_embeddings.assert_called_once()
     mock_store_embeddings.assert_called_once()
-    mock_update_state.assert_called_with(state='SUCCESS', meta={'video_id': 'test_video'})
+    # The task ignores its result, so nothing is written to the result backend
+    mock_update_state.assert_not_called()
     assert result == {'status': 'success', 'video_id': 'test_video'}
 
 
@@ -36,5 +45,160 @@ def test_process_transcript_with_error(mock_generate_embeddings, mock_store_embe
 
     mock_generate_embeddings.assert_called_once()
     mock_store_embeddings.assert_not_called()
-    mock_update_state.assert_called_with(state='FAILURE', meta={'video_id': 'test_video', 'error': 'Embedding generation failed'})
+    mock_update_state.assert_not_called()
     assert result == {'status': 'failure', 'video_id': 'test_video', 'error': 'Embedding generation failed'}
+
+
+@patch('app.services.transcript_processor.release_payload')
+@patch('app.services.transcript_processor.get_payload')
+@patch('app.services.transcript_processor.store_embeddings')
+@patch('app.services.transcript_processor.generate_embeddings')
+@patch('app.services.transcript_processor.split_into_chunks', side_effect=lambda text: [text])
+def test_process_transcript_from_payload(mock_split_into_chunks, mock_generate_embeddings, mock_store_embeddings, mock_get_payload, mock_release_payload):
+    mock_generate_embeddings.return_value = [[0.1] * 1536]
+    mock_get_payload.return_value = "This is a test transcript."
+
+    with patch('celery.app.task.Task.update_state'):
+        result = process_transcript("test_channel", "test_video", payload_key="payload:abc")
+
+    mock_get_payload.assert_called_once_with("payload:abc")
+    assert mock_store_embeddings.call_args[0][2] == ["This is a test transcript."]
+    mock_release_payload.assert_called_once_with("payload:abc")
+    assert result == {'status': 'success', 'video_id': 'test_video'}
+
+
+@patch('app.services.transcript_processor.release_payload')
+@patch('app.services.transcript_processor.get_payload', return_value=None)
+@patch('app.services.transcript_processor.generate_embeddings')
+def test_process_transcript_with_expired_payload(mock_generate_embeddings, mock_get_payload, mock_release_payload):
+    with patch('celery.app.task.Task.update_state'):
+        result = process_transcript("test_channel", "test_video", payload_key="payload:abc")
+
+    mock_generate_embeddings.assert_not_called()
+    mock_release_payload.assert_called_once_with("payload:abc")
+    assert result['status'] == 'failure'
+
+
+@patch('app.services.transcript_processor.start_chunk_ranges')
+@patch('app.services.transcript_processor.mark_video_embedding')
+@patch('app.services.transcript_processor.embed_chunk_range')
+@patch('app.services.transcript_processor.put_payload', return_value="payload:chunks")
+def test_dispatch_chunk_ranges(mock_put_payload, mock_embed_chunk_range, mock_mark_video_embedding, mock_start_chunk_ranges, monkeypatch):
+    monkeypatch.setattr(settings, "CHUNK_RANGE_SIZE", 2)
+    chunks = ["c0", "c1", "c2", "c3", "c4"]
+
+    assert dispatch_chunk_ranges("test_channel", "test_video", chunks, "job-1", start_index=1) == 2
+
+    assert [c.args for c in mock_embed_chunk_range.delay.call_args_list] == [
+        ("test_channel", "test_video", "payload:chunks", 1, 3, "job-1"),
+        ("test_channel", "test_video", "payload:chunks", 3, 5, "job-1")
+    ]
+    mock_mark_video_embedding.assert_called_once_with("test_video", "job-1")
+    mock_start_chunk_ranges.assert_called_once_with("test_video", [1, 3])
+
+
+@patch('app.services.transcript_processor.release_payload')
+@patch('app.services.transcript_processor.clear_chunk_ranges')
+@patch('app.services.transcript_processor.clear_video_embedding')
+@patch('app.services.transcript_processor.start_chunk_ranges')
+@patch('app.services.transcript_processor.mark_video_embedding')
+@patch('app.services.transcript_processor.embed_chunk_range')
+@patch('app.services.transcript_processor.put_payload', return_value="payload:chunks")
+def test_dispatch_chunk_ranges_clears_marker_when_broker_fails(mock_put_payload, mock_embed_chunk_range, mock_mark_video_embedding, mock_start_chunk_ranges,
+                                                               mock_clear_video_embedding, mock_clear_chunk_ranges, mock_release_payload):
+    mock_embed_chunk_range.delay.side_effect = Exception("Broker unavailable")
+
+    with pytest.raises(Exception):
+        dispatch_chunk_ranges("test_channel", "test_video", ["c0", "c1"], "job-1")
+
+    mock_clear_video_embedding.assert_called_once_with("test_video")
+    mock_clear_chunk_ranges.assert_called_once_with("test_video")
+    mock_release_payload.assert_called_once_with("payload:chunks")
+
+
+@patch('app.services.transcript_processor.finalize_chunked_video')
+@patch('app.services.transcript_processor.finish_chunk_range', return_value=False)
+@patch('app.services.transcript_processor.store_embeddings')
+@patch('app.services.transcript_processor.generate_embeddings', side_effect=lambda chunks, task=None: [[0.1]] * len(chunks))
+@patch('app.services.transcript_processor.get_payload', return_value='["c0", "c1", "c2", "c3"]')
+def test_embed_chunk_range_keeps_absolute_chunk_ids(mock_get_payload, mock_generate_embeddings, mock_store_embeddings, mock_finish_chunk_range,
+                                                    mock_finalize_chunked_video):
+    assert embed_chunk_range("test_channel", "test_video", "payload:chunks", 2, 4) == 2
+
+    mock_store_embeddings.assert_called_once_with("test_channel", "test_video", ["c2", "c3"], [[0.1], [0.1]], start_index=2)
+    mock_finish_chunk_range.assert_called_once_with("test_video", 2)
+    # Other ranges are still outstanding
+    mock_finalize_chunked_video.assert_not_called()
+
+
+@patch('app.services.transcript_processor.finalize_chunked_video')
+@patch('app.services.transcript_processor.finish_chunk_range', return_value=True)
+@patch('app.services.transcript_processor.store_embeddings')
+@patch('app.services.transcript_processor.generate_embeddings', side_effect=lambda chunks, task=None: [[0.1]] * len(chunks))
+@patch('app.services.transcript_processor.get_payload', return_value='["c0", "c1", "c2", "c3"]')
+def test_last_chunk_range_finalizes_the_video(mock_get_payload, mock_generate_embeddings, mock_store_embeddings, mock_finish_chunk_range,
+                                              mock_finalize_chunked_video):
+    embed_chunk_range("test_channel", "test_video", "payload:chunks", 2, 4, "job-1")
+
+    mock_finalize_chunked_video.assert_called_once_with("test_channel", "test_video", "payload:chunks", "job-1")
+
+
+@patch('app.services.transcript_processor.finish_job_if_complete')
+@patch('app.services.transcript_processor.clear_video_embedding')
+@patch('app.services.transcript_processor.set_video_status')
+@patch('app.services.transcript_processor.release_payload')
+def test_finalize_chunked_video(mock_release_payload, mock_set_video_status, mock_clear_video_embedding, mock_finish_job_if_complete):
+    with patch('app.services.transcript_processor.redis_client') as mock_redis_client:
+        finalize_chunked_video("test_channel", "test_video", "payload:chunks", "job-1")
+
+    mock_release_payload.assert_called_once_with("payload:chunks")
+    mock_redis_client.set.assert_called_once_with("processed:test_video", "1")
+    mock_clear_video_embedding.assert_called_once_with("test_video")
+    mock_set_video_status.assert_called_once_with("job-1", "test_video", "done")
+    mock_finish_job_if_complete.assert_called_once_with("job-1", "test_channel")
+
+
+@patch('app.services.transcript_processor.release_payload')
+@patch('app.services.transcript_processor.dispatch_chunk_ranges')
+@patch('app.services.transcript_processor.split_into_chunks', return_value=["c0", "c1", "c2"])
+@patch('app.services.transcript_processor.get_payload', return_value="This is a test transcript.")
+def test_chunk_transcript_hands_chunks_to_embedding(mock_get_payload, mock_split_into_chunks, mock_dispatch_chunk_ranges, mock_release_payload, monkeypatch):
+    monkeypatch.setattr(settings, "PARALLEL_EMBEDDING_CHUNK_THRESHOLD", 2)
+    chunk_transcript("test_channel", "test_video", "payload:abc")
+
+    mock_split_into_chunks.assert_called_once_with("This is a test transcript.")
+    mock_dispatch_chunk_ranges.assert_called_once_with("test_channel", "test_video", ["c0", "c1", "c2"])
+    mock_release_payload.assert_called_once_with("payload:abc")
+
+
+@patch('app.services.transcript_processor.release_payload')
+@patch('app.services.transcript_processor.dispatch_chunk_ranges')
+@patch('app.services.transcript_processor.process_transcript')
+@patch('app.services.transcript_processor.put_payload', return_value="payload:chunks")
+@patch('app.services.transcript_processor.split_into_chunks', return_value=["c0", "c1"])
+@patch('app.services.transcript_processor.get_payload', return_value="This is a test transcript.")
+def test_chunk_transcript_hands_short_videos_to_process_transcript(mock_get_payload, mock_split_into_chunks, mock_put_payload, mock_process_transcript,
+                                                                   mock_dispatch_chunk_ranges, mock_release_payload, monkeypatch):
+    monkeypatch.setattr(settings, "PARALLEL_EMBEDDING_CHUNK_THRESHOLD", 2)
+    chunk_transcript("test_channel", "test_video", "payload:abc")
+
+    # Embedding waits on OpenAI and Pinecone, so it runs on the thread-pool transcript-queue, not here
+    mock_dispatch_chunk_ranges.assert_not_called()
+    mock_put_payload.assert_called_once_with('["c0", "c1"]')
+    mock_process_transcript.delay.assert_called_once_with("test_channel", "test_video", payload_key="payload:chunks", chunked=True)
+    mock_release_payload.assert_called_once_with("payload:abc")
+
+
+@patch('app.services.transcript_processor.release_payload')
+@patch('app.services.transcript_processor.get_payload', return_value='["c0", "c1"]')
+@patch('app.services.transcript_processor.store_embeddings')
+@patch('app.services.transcript_processor.generate_embeddings', return_value=[[0.1], [0.1]])
+@patch('app.services.transcript_processor.split_into_chunks')
+def test_process_transcript_from_chunk_payload(mock_split_into_chunks, mock_generate_embeddings, mock_store_embeddings, mock_get_payload, mock_release_payload):
+    with patch('celery.app.task.Task.update_state'):
+        result = process_transcript("test_channel", "test_video", payload_key="payload:chunks", chunked=True)
+
+    mock_split_into_chunks.assert_not_called()
+    mock_store_embeddings.assert_called_once_with("test_channel", "test_video", ["c0", "c1"], [[0.1], [0.1]])
+    mock_release_payload.assert_called_once_with("payload:chunks")
+    assert result == {'status': 'success', 'video_id': 'test_video'}
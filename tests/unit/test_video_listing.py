@@ -0,0 +1,109 @@
+# tests/unit/test_video_listing.py
+import json
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+from app.core.config import settings
+from app.services.video_listing import (
+    refresh_listing,
+    iter_video_ids,
+    parse_relative_time
+)
+
+
+def video(video_id, published="1 day ago"):
+    return {"videoId": video_id, "title": {"runs": [{"text": f"Title {video_id}"}]}, "publishedTimeText": {"simpleText": published}}
+
+
+@pytest.fixture
+def mock_redis_client():
+    with patch('app.services.video_listing.redis_client') as mock:
+        mock.hgetall.return_value = {}
+        mock.llen.return_value = 0
+        yield mock
+
+
+@pytest.fixture
+def mock_lease():
+    with patch('app.services.video_listing.RedisLease') as mock:
+        mock.return_value.acquire.return_value = True
+        yield mock
+
+
+@pytest.fixture
+def scraper():
+    scraper = MagicMock()
+    scraper.iter_channel_videos.side_effect = lambda: iter([video("v4"), video("v3"), video("v2"), video("v1")])
+    return scraper
+
+
+def test_refresh_listing_skips_fresh_listing(mock_redis_client, mock_lease, scraper):
+    mock_redis_client.hgetall.return_value = {b"refreshed_at": str(time.time()).encode(), b"complete": b"0"}
+    mock_redis_client.llen.return_value = 10
+
+    refresh_listing(scraper, "UC1", needed=5)
+
+    scraper.iter_channel_videos.assert_not_called()
+    mock_lease.assert_not_called()
+
+
+def test_refresh_listing_builds_new_listing(mock_redis_client, mock_lease, scraper):
+    refresh_listing(scraper, "UC1", needed=2)
+
+    pipeline = mock_redis_client.pipeline.return_value
+    # Pushed oldest first so the list reads newest first
+    pipeline.lpush.assert_called_once_with("video_list:UC1", "v3", "v4")
+    pipeline.rpush.assert_not_called()
+    assert pipeline.hset.call_args_list[-1][1]["mapping"]["complete"] == 0
+    mock_lease.return_value.release.assert_called_once()
+
+
+def test_refresh_listing_ranks_videos_with_the_same_publish_time(mock_redis_client, mock_lease, scraper):
+    scraper.iter_channel_videos.side_effect = lambda: iter([video("v3", "2 weeks ago"), video("v2", "3 weeks ago"), video("v1", "3 weeks ago")])
+
+    refresh_listing(scraper, "UC1")
+
+    mapping = mock_redis_client.pipeline.return_value.hset.call_args_list[0][1]["mapping"]
+    entries = {video_id: json.loads(entry) for video_id, entry in mapping.items()}
+    assert entries["v2"]["published_at"] == entries["v1"]["published_at"]
+    assert [entries[video_id]["published_rank"] for video_id in ("v1", "v2", "v3")] == [0, 1, 0]
+
+
+def test_refresh_listing_only_adds_new_videos(mock_redis_client, mock_lease, scraper):
+    mock_redis_client.llen.return_value = 2
+    mock_redis_client.lindex.return_value = b"v2"
+
+    refresh_listing(scraper, "UC1", needed=2)
+
+    pipeline = mock_redis_client.pipeline.return_value
+    pipeline.delete.assert_not_called()
+    pipeline.lpush.assert_called_once_with("video_list:UC1", "v3", "v4")
+    pipeline.rpush.assert_not_called()
+
+
+def test_refresh_listing_extends_older_videos(mock_redis_client, mock_lease, scraper):
+    mock_redis_client.llen.return_value = 2
+    mock_redis_client.lindex.return_value = b"v4"
+
+    refresh_listing(scraper, "UC1", needed=4)
+
+    pipeline = mock_redis_client.pipeline.return_value
+    pipeline.lpush.assert_not_called()
+    # v3 is already listed, so only the videos past it are appended
+    pipeline.rpush.assert_called_once_with("video_list:UC1", "v2", "v1")
+
+
+def test_iter_video_ids_pages_through_listing(mock_redis_client, mock_lease, scraper, monkeypatch):
+    monkeypatch.setattr(settings, "VIDEO_LISTING_PAGE_SIZE", 2)
+    mock_redis_client.hgetall.return_value = {b"refreshed_at": str(time.time()).encode(), b"complete": b"1"}
+    mock_redis_client.lrange.side_effect = [[b"v4", b"v3"], [b"v2"]]
+
+    assert list(iter_video_ids(scraper, "UC1", offset=0, limit=3)) == ["v4", "v3", "v2"]
+    assert [c[0] for c in mock_redis_client.lrange.call_args_list] == [("video_list:UC1", 0, 1), ("video_list:UC1", 2, 2)]
+
+
+def test_parse_relative_time():
+    now = 1_000_000.0
+    assert parse_relative_time("3 weeks ago", now) == now - 3 * 7 * 86400
+    assert parse_relative_time("Streamed 1 hour ago", now) == now - 3600
+    assert parse_relative_time(None, now) is None
@@ -0,0 +1,58 @@
+# tests/unit/test_youtube_channel_scraper.py
+import time
+import pytest
+from unittest.mock import patch
+from app.services.youtube_channel_scraper import YoutubeScraper
+
+
+class TooManyRequests(Exception):
+    pass
+
+
+class TranscriptsDisabled(Exception):
+    pass
+
+
+@pytest.fixture
+def mock_get_transcript():
+    with patch('app.services.youtube_channel_scraper.YouTubeTranscriptApi.get_transcript', create=True) as mock, \
+         patch('app.services.youtube_channel_scraper.backoff_delay', return_value=0):
+        yield mock
+
+
+def test_iter_video_transcripts_yields_in_completion_order(mock_get_transcript):
+    def get_transcript(video_id):
+        if video_id == "slow":
+            time.sleep(0.2)
+        return [{"text": video_id}, {"text": "text"}]
+    mock_get_transcript.side_effect = get_transcript
+
+    results = list(YoutubeScraper("UC1").iter_video_transcripts(["slow", "fast"], max_workers=2))
+    assert results == [("fast", "fast text"), ("slow", "slow text")]
+
+
+def test_iter_video_transcripts_retries_rate_limits(mock_get_transcript):
+    mock_get_transcript.side_effect = [TooManyRequests("slow down"), [{"text": "hello"}]]
+
+    results = list(YoutubeScraper("UC1").iter_video_transcripts(["video1"], max_attempts=3))
+    assert results == [("video1", "hello")]
+    assert mock_get_transcript.call_count == 2
+
+
+def test_iter_video_transcripts_does_not_retry_missing_transcripts(mock_get_transcript):
+    error = TranscriptsDisabled("captions off")
+    mock_get_transcript.side_effect = error
+
+    scraper = YoutubeScraper("UC1")
+    assert list(scraper.iter_video_transcripts(["video1"])) == [("video1", None)]
+    assert list(scraper.iter_video_transcripts(["video1"], return_exceptions=True)) == [("video1", error)]
+    assert mock_get_transcript.call_count == 2
+
+
+def test_get_video_ids_replaces_previous_ids():
+    scraper = YoutubeScraper("UC1")
+    with patch('app.services.youtube_channel_scraper.video_listing.iter_video_ids') as mock_iter:
+        mock_iter.side_effect = [iter(["v1", "v2"]), iter(["v3"])]
+        assert scraper.get_video_ids(limit=2) == ["v1", "v2"]
+        assert scraper.get_video_ids(limit=1, offset=2) == ["v3"]
+    mock_iter.assert_called_with(scraper, "UC1", offset=2, limit=1)
@@ -1,9 +1,16 @@
 # tests/unit/test_youtube_scraper.py
 import pytest
-from app.services.youtube_scraper import start_channel_processing
+from app.core.config import settings
+from app.services.youtube_scraper import start_channel_processing, check_job_completion
 from unittest.mock import patch
 
 
+@pytest.fixture(autouse=True)
+def mock_embedding_marker():
+    with patch('app.services.youtube_scraper.is_video_embedding', return_value=False) as mock:
+        yield mock
+
+
 @pytest.fixture
 def mock_celery_task():
     with patch('celery.app.task.Task.update_state') as mock:
@@ -40,24 +47,47 @@ def mock_pinecone():
         yield mock
 
 
+@pytest.fixture
+def mock_lease():
+    with patch('app.services.youtube_scraper.RedisLease') as mock, \
+         patch('app.services.youtube_scraper.mark_channel_processed'):
+        mock.return_value.acquire.return_value = True
+        mock.return_value.__enter__.return_value.acquired = True
+        yield mock
+
+
+@pytest.fixture
+def mock_failure_cache():
+    with patch('app.services.youtube_scraper.get_transcript_failure', return_value=None) as mock_get, \
+         patch('app.services.youtube_scraper.record_transcript_failure') as mock_record:
+        yield {'get': mock_get, 'record': mock_record}
+
+
+def iter_transcripts(transcripts):
+    # Stands in for YoutubeScraper.iter_video_transcripts
+    return lambda video_ids, **kwargs: [(video_id, transcripts[video_id]) for video_id in video_ids]
+
+
 def test_start_channel_processing_with_channel_id(
     mock_youtube_scraper,
     mock_pinecone,
     mock_celery_task,
     mock_transcript_exists,
     mock_store_embeddings,
-    mock_redis_client
+    mock_redis_client,
+    mock_lease,
+    mock_failure_cache
 ):
     # Mock dependencies
     mock_youtube_scraper.return_value.get_video_ids.return_value = ["video1", "video2"]
-    mock_youtube_scraper.return_value.get_video_transcript.return_value = "Test transcript"
+    mock_youtube_scraper.return_value.iter_video_transcripts.side_effect = iter_transcripts({"video1": "Test transcript", "video2": "Test transcript"})
     mock_transcript_exists.side_effect = [False, False]
 
     # Test with channel ID
     result = start_channel_processing(channel_id="UCZf5IX90oe5gdPppMXGImwg", video_limit=2)
     assert result == {'status': 'All videos processed', 'progress': 100, 'channel_id': 'UCZf5IX90oe5gdPppMXGImwg'}
     mock_youtube_scraper.return_value.get_video_ids.assert_called_once()
-    assert mock_youtube_scraper.return_value.get_video_transcript.call_count == 2
+    assert mock_youtube_scraper.return_value.iter_video_transcripts.call_args[0][0] == ["video1", "video2"]
     assert mock_store_embeddings.call_count == 2
     assert mock_redis_client.set.call_count == 2
 
@@ -68,7 +98,9 @@ def test_start_channel_processing_with_invalid_channel_id(
     mock_celery_task,
     mock_transcript_exists,
     mock_store_embeddings,
-    mock_redis_client
+    mock_redis_client,
+    mock_lease,
+    mock_failure_cache
 ):
     # Mock YoutubeScraper to raise an exception when initialized with an invalid channel_id
     mock_youtube_scraper.side_effect = Exception("Invalid channel ID")
@@ -80,3 +112,363 @@ def test_start_channel_processing_with_invalid_channel_id(
     mock_youtube_scraper.return_value.get_video_ids.assert_not_called()
     assert mock_store_embeddings.call_count == 0
     assert mock_redis_client.set.call_count == 0
+
+
+@pytest.fixture
+def mock_job_registry():
+    with patch('app.services.youtube_scraper.get_job') as mock_get_job, \
+         patch('app.services.youtube_scraper.has_job_videos', return_value=False), \
+         patch('app.services.youtube_scraper.set_job_videos') as mock_set_videos, \
+         patch('app.services.youtube_scraper.get_job_videos') as mock_get_videos, \
+         patch('app.services.youtube_scraper.update_job_progress'), \
+         patch('app.services.youtube_scraper.get_video_statuses', return_value={}) as mock_statuses, \
+         patch('app.services.youtube_scraper.set_video_status') as mock_set_status, \
+         patch('app.services.youtube_scraper.get_chunk_checkpoint', return_value=0) as mock_checkpoint, \
+         patch('app.services.youtube_scraper.set_chunk_checkpoint'), \
+         patch('app.services.youtube_scraper.finish_job'), \
+         patch('app.services.youtube_scraper.finish_job_if_complete', return_value=True) as mock_finish:
+        mock_get_job.return_value = {'job_id': 'job-1', 'priority': 'backfill', 'status': 'PROGRESS', 'total': 3, 'processed': 0}
+        yield {
+            'get_job': mock_get_job,
+            'get_videos': mock_get_videos,
+            'set_videos': mock_set_videos,
+            'statuses': mock_statuses,
+            'set_status': mock_set_status,
+            'checkpoint': mock_checkpoint,
+            'finish': mock_finish
+        }
+
+
+def test_start_channel_processing_requeues_remaining_slice(
+    mock_youtube_scraper,
+    mock_pinecone,
+    mock_celery_task,
+    mock_transcript_exists,
+    mock_store_embeddings,
+    mock_redis_client,
+    mock_lease,
+    mock_failure_cache,
+    mock_job_registry
+):
+    mock_youtube_scraper.return_value.get_video_ids.return_value = ["video1", "video2", "video3"]
+    mock_job_registry['get_videos'].return_value = ["video1", "video2"]
+    mock_transcript_exists.return_value = True
+
+    with patch('app.services.youtube_scraper.settings.CHANNEL_PROCESSING_SLICE_SIZE', 2), \
+         patch('app.services.youtube_scraper.start_channel_processing.apply_async') as mock_apply_async:
+        result = start_channel_processing(channel_id="UC1", video_limit=3, job_id="job-1")
+
+    assert result['status'] == 'Requeued'
+    mock_job_registry['set_videos'].assert_called_once_with("job-1", ["video1", "video2", "video3"])
+    mock_job_registry['get_videos'].assert_called_once_with("job-1", 0, 2)
+    mock_apply_async.assert_called_once_with(
+        kwargs={'channel_id': "UC1", 'video_limit': 3, 'job_id': "job-1", 'offset': 2},
+        queue="channel-backfill",
+        ignore_result=True
+    )
+    mock_job_registry['finish'].assert_not_called()
+
+
+def test_start_channel_processing_finishes_job_on_last_slice(
+    mock_youtube_scraper,
+    mock_pinecone,
+    mock_celery_task,
+    mock_transcript_exists,
+    mock_store_embeddings,
+    mock_redis_client,
+    mock_lease,
+    mock_failure_cache,
+    mock_job_registry
+):
+    mock_job_registry['get_videos'].return_value = ["video3"]
+    mock_transcript_exists.return_value = True
+
+    with patch('app.services.youtube_scraper.has_job_videos', return_value=True), \
+         patch('app.services.youtube_scraper.start_channel_processing.apply_async') as mock_apply_async:
+        result = start_channel_processing(channel_id="UC1", video_limit=3, job_id="job-1", offset=2)
+
+    assert result['status'] == 'All videos processed'
+    mock_youtube_scraper.return_value.get_video_ids.assert_not_called()
+    mock_apply_async.assert_not_called()
+    mock_job_registry['finish'].assert_called_once_with("job-1", "UC1")
+
+
+def test_last_slice_waits_for_embedding_videos(
+    mock_youtube_scraper,
+    mock_pinecone,
+    mock_celery_task,
+    mock_transcript_exists,
+    mock_store_embeddings,
+    mock_redis_client,
+    mock_lease,
+    mock_failure_cache,
+    mock_job_registry
+):
+    mock_job_registry['get_videos'].return_value = ["video3"]
+    mock_job_registry['finish'].return_value = False
+    mock_transcript_exists.return_value = True
+
+    with patch('app.services.youtube_scraper.has_job_videos', return_value=True), \
+         patch('app.services.youtube_scraper.check_job_completion') as mock_check:
+        result = start_channel_processing(channel_id="UC1", video_limit=3, job_id="job-1", offset=2)
+
+    # finalize_chunked_video completes the job once the long video is stored; the check covers a lost last range
+    assert result['status'] == 'Embedding'
+    mock_job_registry['finish'].assert_called_once_with("job-1", "UC1")
+    assert mock_check.apply_async.call_args[1]['countdown'] == settings.JOB_COMPLETION_CHECK_INTERVAL
+
+
+def test_job_completion_check_dead_letters_lost_chunked_videos(mock_job_registry):
+    with patch('app.services.youtube_scraper.lost_embedding_videos', return_value=["video3"]), \
+         patch('app.services.youtube_scraper.add_dead_letter') as mock_dead_letter, \
+         patch('app.services.youtube_scraper.check_job_completion.apply_async') as mock_reschedule:
+        check_job_completion("UC1", "job-1")
+
+    assert mock_dead_letter.call_args[0][:2] == ("video3", "UC1")
+    mock_job_registry['set_status'].assert_called_once_with("job-1", "video3", "failed")
+    mock_job_registry['finish'].assert_called_once_with("job-1", "UC1")
+    mock_reschedule.assert_not_called()
+
+
+def test_job_completion_check_waits_for_embedding_videos(mock_job_registry):
+    mock_job_registry['finish'].return_value = False
+    with patch('app.services.youtube_scraper.lost_embedding_videos', return_value=[]), \
+         patch('app.services.youtube_scraper.check_job_completion.apply_async') as mock_reschedule:
+        check_job_completion("UC1", "job-1")
+
+    mock_job_registry['set_status'].assert_not_called()
+    mock_reschedule.assert_called_once()
+
+
+def test_video_still_embedding_elsewhere_is_skipped(
+    mock_youtube_scraper,
+    mock_pinecone,
+    mock_celery_task,
+    mock_transcript_exists,
+    mock_store_embeddings,
+    mock_redis_client,
+    mock_lease,
+    mock_failure_cache,
+    mock_job_registry,
+    mock_embedding_marker
+):
+    mock_job_registry['get_videos'].return_value = ["video3"]
+    mock_embedding_marker.return_value = True
+
+    with patch('app.services.youtube_scraper.has_job_videos', return_value=True):
+        start_channel_processing(channel_id="UC1", video_limit=3, job_id="job-1", offset=2)
+
+    # transcript_exists would see the ranges stored so far, so the marker is checked first
+    mock_transcript_exists.assert_not_called()
+    assert mock_youtube_scraper.return_value.iter_video_transcripts.call_args[0][0] == []
+
+
+def test_start_channel_processing_skips_locked_channel(
+    mock_youtube_scraper,
+    mock_pinecone,
+    mock_celery_task,
+    mock_transcript_exists,
+    mock_store_embeddings,
+    mock_redis_client,
+    mock_lease,
+    mock_failure_cache
+):
+    mock_lease.return_value.acquire.return_value = False
+    mock_lease.return_value.holder.return_value = "other-job"
+
+    result = start_channel_processing(channel_id="UC1", video_limit=2)
+    assert result['status'] == 'Already processing'
+    assert result['job_id'] == "other-job"
+    mock_youtube_scraper.assert_not_called()
+    mock_lease.return_value.release.assert_not_called()
+
+
+def test_start_channel_processing_skips_video_locked_elsewhere(
+    mock_youtube_scraper,
+    mock_pinecone,
+    mock_celery_task,
+    mock_transcript_exists,
+    mock_store_embeddings,
+    mock_redis_client,
+    mock_lease,
+    mock_failure_cache
+):
+    mock_youtube_scraper.return_value.get_video_ids.return_value = ["video1"]
+    mock_transcript_exists.return_value = False
+    # The channel lease is free, the video lease is held elsewhere
+    mock_lease.return_value.acquire.side_effect = [True, False]
+
+    result = start_channel_processing(channel_id="UC1", video_limit=1)
+    assert result['status'] == 'All videos processed'
+    assert mock_youtube_scraper.return_value.iter_video_transcripts.call_args[0][0] == []
+    mock_store_embeddings.assert_not_called()
+
+
+def test_redelivered_slice_resumes_from_checkpoint(
+    mock_youtube_scraper,
+    mock_pinecone,
+    mock_celery_task,
+    mock_transcript_exists,
+    mock_store_embeddings,
+    mock_redis_client,
+    mock_lease,
+    mock_failure_cache,
+    mock_job_registry
+):
+    mock_job_registry['get_videos'].return_value = ["video1", "video2", "video3"]
+    mock_job_registry['statuses'].return_value = {"video1": "done", "video2": "in_progress"}
+    mock_job_registry['checkpoint'].return_value = 2
+    # video2 is half stored, so the index reports it as existing
+    mock_transcript_exists.side_effect = lambda video_id: video_id == "video2"
+
+    mock_youtube_scraper.return_value.iter_video_transcripts.side_effect = iter_transcripts({"video2": "transcript", "video3": "transcript"})
+
+    with patch('app.services.youtube_scraper.has_job_videos', return_value=True), \
+         patch('app.services.youtube_scraper.split_into_chunks', return_value=["c0", "c1", "c2", "c3"]), \
+         patch('app.services.youtube_scraper.generate_embeddings', side_effect=lambda chunks: [[0.1]] * len(chunks)) as mock_generate:
+        result = start_channel_processing(channel_id="UC1", video_limit=3, job_id="job-1")
+
+    assert result['status'] == 'All videos processed'
+    mock_youtube_scraper.return_value.get_video_ids.assert_not_called()
+    # video1 is skipped outright; video2 resumes at chunk 2; video3 starts from scratch
+    assert mock_youtube_scraper.return_value.iter_video_transcripts.call_args[0][0] == ["video2", "video3"]
+    assert mock_generate.call_args_list[0][0][0] == ["c2", "c3"]
+    first_store = mock_store_embeddings.call_args_list[0]
+    assert first_store[0][1] == "video2"
+    assert first_store[0][2] == ["c2", "c3"]
+    assert first_store[1]['start_index'] == 2
+    mock_job_registry['set_status'].assert_any_call("job-1", "video2", "done")
+
+
+def test_slice_of_finished_job_is_ignored(
+    mock_youtube_scraper,
+    mock_pinecone,
+    mock_celery_task,
+    mock_transcript_exists,
+    mock_store_embeddings,
+    mock_redis_client,
+    mock_lease,
+    mock_failure_cache,
+    mock_job_registry
+):
+    mock_job_registry['get_job'].return_value = {'job_id': 'job-1', 'priority': 'normal', 'status': 'SUCCESS', 'total': 3, 'processed': 3}
+
+    result = start_channel_processing(channel_id="UC1", video_limit=3, job_id="job-1", offset=2)
+    assert result['status'] == 'SUCCESS'
+    mock_youtube_scraper.assert_not_called()
+    mock_job_registry['finish'].assert_not_called()
+
+
+class TooManyRequests(Exception):
+    pass
+
+
+class NoTranscriptFound(Exception):
+    pass
+
+
+def test_failing_video_is_retried_without_stopping_the_job(
+    mock_youtube_scraper,
+    mock_pinecone,
+    mock_celery_task,
+    mock_transcript_exists,
+    mock_store_embeddings,
+    mock_redis_client,
+    mock_lease,
+    mock_failure_cache,
+    mock_job_registry
+):
+    mock_job_registry['get_videos'].return_value = ["video1", "video2", "video3"]
+    mock_transcript_exists.return_value = False
+    mock_youtube_scraper.return_value.iter_video_transcripts.side_effect = iter_transcripts({
+        "video1": TooManyRequests("slow down"), "video2": NoTranscriptFound("disabled"), "video3": "Test transcript"
+    })
+
+    with patch('app.services.youtube_scraper.has_job_videos', return_value=True), \
+         patch('app.services.youtube_scraper.split_into_chunks', return_value=["c0"]), \
+         patch('app.services.youtube_scraper.generate_embeddings', return_value=[[0.1]]), \
+         patch('app.services.youtube_scraper.retry_channel_video') as mock_retry, \
+         patch('app.services.youtube_scraper.add_dead_letter') as mock_dead_letter:
+        result = start_channel_processing(channel_id="UC1", video_limit=3, job_id="job-1")
+
+    assert result['status'] == 'All videos processed'
+    assert mock_store_embeddings.call_count == 1
+    retry_kwargs = mock_retry.apply_async.call_args[1]
+    assert retry_kwargs['kwargs'] == {'channel_id': "UC1", 'video_id': "video1", 'job_id': "job-1", 'attempt': 2}
+    assert retry_kwargs['countdown'] > 0
+    mock_job_registry['set_status'].assert_any_call("job-1", "video1", "retrying")
+    mock_job_registry['set_status'].assert_any_call("job-1", "video2", "no_transcript")
+    mock_dead_letter.assert_not_called()
+
+
+def test_video_is_dead_lettered_after_last_attempt(mock_youtube_scraper, mock_lease, mock_failure_cache, mock_job_registry):
+    from app.services.youtube_scraper import retry_channel_video
+    mock_youtube_scraper.return_value.get_video_transcript.side_effect = TooManyRequests("slow down")
+
+    with patch('app.services.youtube_scraper.settings.VIDEO_MAX_ATTEMPTS', 3), \
+         patch('app.services.youtube_scraper.retry_channel_video.apply_async') as mock_apply_async, \
+         patch('app.services.youtube_scraper.add_dead_letter') as mock_dead_letter:
+        result = retry_channel_video(channel_id="UC1", video_id="video1", job_id="job-1", attempt=3)
+
+    assert result['status'] == 'failure'
+    mock_apply_async.assert_not_called()
+    mock_dead_letter.assert_called_once_with("video1", "UC1", "slow down", "rate_limit", 3, "job-1")
+    mock_job_registry['set_status'].assert_called_with("job-1", "video1", "failed")
+
+
+def test_cached_transcript_failure_skips_fetch(
+    mock_youtube_scraper,
+    mock_pinecone,
+    mock_celery_task,
+    mock_transcript_exists,
+    mock_store_embeddings,
+    mock_redis_client,
+    mock_lease,
+    mock_failure_cache,
+    mock_job_registry
+):
+    mock_job_registry['get_job'].return_value['total'] = 2
+    mock_job_registry['get_videos'].return_value = ["video1", "video2"]
+    mock_transcript_exists.return_value = False
+    mock_failure_cache['get'].side_effect = lambda video_id: {
+        "reason": "TranscriptsDisabled", "failure_class": "permanent"
+    } if video_id == "video1" else None
+    mock_youtube_scraper.return_value.iter_video_transcripts.side_effect = iter_transcripts({"video2": NoTranscriptFound("none")})
+
+    with patch('app.services.youtube_scraper.has_job_videos', return_value=True):
+        start_channel_processing(channel_id="UC1", video_limit=2, job_id="job-1")
+
+    # Only video2 is fetched; its failure is cached for the next sync
+    assert mock_youtube_scraper.return_value.iter_video_transcripts.call_args[0][0] == ["video2"]
+    error = mock_failure_cache['record'].call_args[0][2]
+    assert mock_failure_cache['record'].call_args[0][:2] == ("video2", "UC1")
+    assert isinstance(error, NoTranscriptFound)
+    mock_job_registry['set_status'].assert_any_call("job-1", "video1", "no_transcript")
+
+
+def test_long_video_is_split_into_chunk_ranges(
+    mock_youtube_scraper,
+    mock_pinecone,
+    mock_celery_task,
+    mock_transcript_exists,
+    mock_store_embeddings,
+    mock_redis_client,
+    mock_lease,
+    mock_failure_cache,
+    mock_job_registry,
+    monkeypatch
+):
+    monkeypatch.setattr(settings, "PARALLEL_EMBEDDING_CHUNK_THRESHOLD", 3)
+    mock_job_registry['get_job'].return_value = {'job_id': 'job-1', 'priority': 'normal', 'status': 'PROGRESS', 'total': 1, 'processed': 0}
+    mock_job_registry['get_videos'].return_value = ["video1"]
+    mock_transcript_exists.return_value = False
+    mock_youtube_scraper.return_value.iter_video_transcripts.side_effect = iter_transcripts({"video1": "transcript"})
+
+    with patch('app.services.youtube_scraper.has_job_videos', return_value=True), \
+         patch('app.services.youtube_scraper.split_into_chunks', return_value=["c0", "c1", "c2", "c3"]), \
+         patch('app.services.youtube_scraper.dispatch_chunk_ranges') as mock_dispatch:
+        start_channel_processing(channel_id="UC1", video_limit=1, job_id="job-1")
+
+    mock_dispatch.assert_called_once_with("UC1", "video1", ["c0", "c1", "c2", "c3"], "job-1", 0)
+    mock_store_embeddings.assert_not_called()
+    mock_job_registry['set_status'].assert_called_with("job-1", "video1", "embedding")